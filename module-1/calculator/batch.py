@@ -0,0 +1,246 @@
+"""Non-interactive evaluation of calculator lines.
+
+Every input line is one calculation, either an operation name followed by
+its operands or an expression without variables::
+
+    add 2 3
+    left_shift 0x10 4
+    logical_not false
+    (2 + 3) ** 2 % 7 & 0xFF
+
+Blank lines and lines starting with ``#`` are skipped. Lines are read and
+evaluated a chunk at a time, so input of any size streams through with
+constant memory. Each chunk is formatted into a single block of output,
+either the plain results or one JSON object per line, and with several
+jobs the chunks are evaluated by a process pool and written in input order.
+
+A line that fails produces an error in place of its result and does not
+stop the run.
+
+Expressions that differ only in their numbers share one compilation: the
+numeric literals of a line are replaced by parameters, so
+``(5 + 3) * 2 % 7`` and ``(6 + 3) * 2 % 7`` are both evaluated by the
+compiled template ``(_0000 + _0001) * _0002 % _0003``.
+"""
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from bignum import format_result, printable, set_max_bits
+from calculator import Calculator, parse_value
+from expression import compile_expression
+from history import DEFAULT_CAPACITY, History
+from operations import OPERATIONS
+
+CHUNK_LINES = 10000
+OUTPUT_FORMATS = ("text", "jsonl")
+
+# A complete numeric literal, not part of a name, a longer number or a complex
+# literal: group 1 matches integers, group 2 floats
+NUMBER = re.compile(r"(?<![\w.])(?:(0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+|\d+)"
+                    r"|(\d+\.\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+))(?![\w.])")
+
+
+def evaluate_line(calc, line, record=False):
+    """Evaluate one batch line with a Calculator
+
+    Args:
+        calc: Calculator to evaluate with
+        line: Operation or expression line
+        record: Save the calculation in the Calculator's history
+
+    Raises:
+        ValueError: For an invalid line, or the exception of the operation
+    """
+    parts = line.split()
+    operation = OPERATIONS.get(parts[0])
+    if operation is None:
+        result = _evaluate_expression(line)
+        if record:
+            calc.save_operation("Expression", [line], result)
+        return result
+
+    if len(parts) - 1 != operation.arity:
+        raise ValueError(f"{operation.name} takes {operation.arity} operand(s), got {len(parts) - 1}")
+    operands = [parse_value(operand) for operand in parts[1:]]
+    result = operation.function(calc, *operands)
+    if record:
+        calc.save_operation(operation.name, operands, result)
+    return result
+
+
+def _evaluate_expression(line):
+    """Evaluate an expression line through the template of its numbers"""
+    # Lines with underscores could name a parameter themselves
+    if "_" not in line and "\0" not in line:
+        try:
+            values = [int(integer, 0) if integer else float(number) for integer, number in NUMBER.findall(line)]
+        except ValueError:
+            # A literal such as 0777 that Python rejects; let the compiler report it
+            values = None
+        if values is not None:
+            try:
+                template = _compile_template(NUMBER.sub("\0", line))
+            except ValueError:
+                # Report the error of the line itself
+                template = None
+            if template is not None:
+                return template.function(*values)
+    return compile_expression(line).evaluate()
+
+
+@lru_cache(maxsize=1024)
+def _compile_template(shape):
+    """Compile an expression whose numbers were replaced by NUL characters
+
+    Returns None when the template has other variables than its parameters.
+    """
+    parts = shape.split("\0")
+    parameters = tuple(f"_{i:04d}" for i in range(len(parts) - 1))
+    template = parts[0] + "".join(name + part for name, part in zip(parameters, parts[1:]))
+    expression = compile_expression(template)
+    return expression if expression.variables == parameters else None
+
+
+def evaluate_chunk(start, lines, output_format="text", record=False, max_bits=None):
+    """Evaluate a chunk of lines and format the output
+
+    Args:
+        start: Line number of the first line
+        lines: Input lines
+        output_format: "text" or "jsonl"
+        record: Also return the successful calculations
+        max_bits: Bit-length budget to set in this process
+
+    Returns:
+        tuple: (output text, number of lines evaluated, number of errors,
+        list of (operation, inputs, result) or None)
+    """
+    if max_bits:
+        set_max_bits(max_bits)
+    calc = Calculator(history_size=max(len(lines), 1))
+    jsonl = output_format == "jsonl"
+    output = []
+    count = errors = 0
+    for number, line in enumerate(lines, start):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        count += 1
+        try:
+            result = evaluate_line(calc, line, record)
+            if jsonl:
+                output.append(json.dumps({"line": number, "input": line, "result": printable(result)}, default=str))
+            else:
+                output.append(format_result(result))
+        except Exception as e:
+            errors += 1
+            if jsonl:
+                output.append(json.dumps({"line": number, "input": line, "error": str(e),
+                                          "type": type(e).__name__}))
+            else:
+                output.append(f"Error (line {number}): {e}")
+    if output:
+        output.append("")
+    records = [(entry.operation, entry.inputs, entry.result) for entry in calc.history] if record else None
+    return "\n".join(output), count, errors, records
+
+
+def run_batch(lines, output, output_format="text", jobs=1, chunk_lines=CHUNK_LINES, history=None,
+              max_bits=None):
+    """Evaluate lines as a stream and write the results to output
+
+    Args:
+        lines: Iterable of input lines
+        output: Text stream to write to
+        output_format: "text" or "jsonl"
+        jobs: Number of processes; 1 evaluates in this process
+        chunk_lines: Lines sent to a process at a time
+        history: Optional History the successful calculations are added to
+        max_bits: Bit-length budget of the evaluating processes
+
+    Returns:
+        tuple: (number of lines evaluated, number of errors)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    totals = [0, 0]
+
+    def write(text, count, errors, records):
+        output.write(text)
+        totals[0] += count
+        totals[1] += errors
+        if history is not None:
+            history.extend(records)
+
+    record = history is not None
+    chunks = _chunks(lines, chunk_lines)
+    if jobs <= 1:
+        for start, chunk in chunks:
+            write(*evaluate_chunk(start, chunk, output_format, record, max_bits))
+        return tuple(totals)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # A bounded window of chunks in flight keeps memory constant and the output in order
+        pending = deque()
+        for start, chunk in chunks:
+            pending.append(executor.submit(evaluate_chunk, start, chunk, output_format, record, max_bits))
+            if len(pending) >= jobs * 2:
+                write(*pending.popleft().result())
+        while pending:
+            write(*pending.popleft().result())
+    return tuple(totals)
+
+
+def run_batch_file(path, output_format="text", jobs=1, history_size=None, history_path=None, max_bits=None):
+    """Run a batch from a file, or from stdin for "-", and print the results
+
+    With a history_path the calculations are appended to that history file.
+
+    Returns:
+        int: Exit status, 1 if any line failed or an input cannot be read
+    """
+    history = None
+    try:
+        if history_path:
+            history = History(history_size or DEFAULT_CAPACITY, history_path)
+        if path == "-":
+            count, errors = run_batch(sys.stdin, sys.stdout, output_format, jobs, history=history, max_bits=max_bits)
+        else:
+            with open(path, 'r', encoding='utf-8') as file:
+                count, errors = run_batch(file, sys.stdout, output_format, jobs, history=history, max_bits=max_bits)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error reading batch input: {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if history is not None:
+            history.close()
+    if errors:
+        print(f"{errors} of {count} line(s) failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _chunks(lines, size):
+    """Yield (first line number, list of lines) for consecutive chunks"""
+    lines = iter(lines)
+    start = 1
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Measure what each Calculator evaluation path costs.
+
+Times every registered operation on int, float and big-int operands, the
+overhead of each way of dispatching a single calculation (direct method,
+registry, batch line, compiled expression) and the per-element cost of
+the batch and vectorized paths. Every result is a time per calculation,
+so lower is better.
+
+    python benchmarks/bench_calculator.py --save baseline.json
+    python benchmarks/bench_calculator.py --compare baseline.json --threshold 1.2
+
+With ``--compare`` each result is shown next to its baseline and the run
+exits with status 1 if any is slower than the baseline by more than the
+threshold factor.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import evaluate_line, run_batch
+from calculator import Calculator
+from expression import compile_expression
+from operations import MENU, OPERATIONS
+from vectorized import apply_batch, evaluate_batch, np
+
+# (first operand, second operand, small operand for exponents and shift counts)
+OPERANDS = {
+    "int": (123456789, 98765, 13),
+    "float": (12345.678, 98.765, 13.0),
+    "bigint": (3 ** 5000 + 1, 7 ** 3000 + 3, 13),
+}
+SMALL_SECOND = {"power", "left_shift", "right_shift"}
+
+
+def best_time(func, number, repeat):
+    """Return the best time per call of func over repeat runs of number calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def operation_args(name, kind):
+    a, b, small = OPERANDS[kind]
+    operation = OPERATIONS[name]
+    if name == "modular_power":
+        return (a, b, b)
+    if operation.arity == 1:
+        return (a,)
+    return (a, small if name in SMALL_SECOND else b)
+
+
+def bench_operations(calc, number):
+    """Yield (name, function, calls, elements) for every operation and operand kind it accepts"""
+    for name, operation in OPERATIONS.items():
+        for kind in OPERANDS:
+            args = operation_args(name, kind)
+            try:
+                operation.function(calc, *args)
+            except (TypeError, ValueError, OverflowError):
+                # Operands this operation does not accept
+                continue
+            # Big powers and modular powers are memoized, so repeating them measures the memo
+            yield f"operation/{name}/{kind}", lambda: operation.function(calc, *args), number, 1
+
+
+def bench_dispatch(calc, number):
+    """Yield (name, function, calls, elements) for the ways of running one addition"""
+    a, b = 123456789, 98765
+    function = compile_expression("a + b").function
+    yield "dispatch/python operator", lambda: a + b, number, 1
+    yield "dispatch/method", lambda: calc.add(a, b), number, 1
+    yield "dispatch/registry", lambda: OPERATIONS["add"].function(calc, a, b), number, 1
+    yield "dispatch/menu choice", lambda: OPERATIONS[MENU["1"]].function(calc, a, b), number, 1
+    yield "dispatch/compiled expression", lambda: function(a, b), number, 1
+    yield "dispatch/expression text", lambda: compile_expression("a + b").evaluate({"a": a, "b": b}), number, 1
+    yield "dispatch/batch operation line", lambda: evaluate_line(calc, "add 123456789 98765"), number, 1
+    yield "dispatch/batch expression line", lambda: evaluate_line(calc, "(123456789 + 98765) * 2 % 7"), number, 1
+
+
+def bench_throughput(size):
+    """Yield (name, function, calls, elements) for the batch and vectorized paths"""
+    lines = [f"add {i} {i * 7 + 1}" if i % 2 else f"({i} + 3) * 2 % 7" for i in range(size)]
+    yield "batch/run_batch lines", lambda: run_batch(lines, io.StringIO()), 1, size
+
+    for kind in OPERANDS:
+        a, b, small = OPERANDS[kind]
+        step = 0.5 if kind == "float" else 1
+        column_a = [a + i * step for i in range(size)]
+        column_b = [b + i * step for i in range(size)]
+        yield f"vectorized/add list/{kind}", lambda: apply_batch("add", column_a, column_b), 1, size
+        yield f"vectorized/expression list/{kind}", \
+            lambda: evaluate_batch("(a + b) * 2 - a", {"a": column_a, "b": column_b}), 1, size
+        if np is not None and kind != "bigint":
+            array_a, array_b = np.array(column_a), np.array(column_b)
+            yield f"vectorized/add numpy/{kind}", lambda: apply_batch("add", array_a, array_b), 1, size
+            yield f"vectorized/expression numpy/{kind}", \
+                lambda: evaluate_batch("(a + b) * 2 - a", {"a": array_a, "b": array_b}), 1, size
+
+
+def run(number, size, repeat, name_filter=None):
+    """Return {name: seconds per calculation} for the benchmarks matching name_filter"""
+    calc = Calculator(history_size=1)
+    results = {}
+    for bench in (bench_operations(calc, number), bench_dispatch(calc, number), bench_throughput(size)):
+        # Each function is timed before the generator moves on and rebinds its variables
+        for name, function, calls, elements in bench:
+            if name_filter is None or name_filter in name:
+                results[name] = best_time(function, calls, repeat) / elements
+    return results
+
+
+def format_time(seconds):
+    return f"{seconds * 1e9:12.1f} ns" if seconds < 1e-3 else f"{seconds * 1e3:12.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing of a single calculation")
+    parser.add_argument("--size", type=int, default=100000, help="Elements per batch and vectorized timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is kept")
+    parser.add_argument("--filter", help="Only report results whose name contains this text")
+    parser.add_argument("--save", metavar="PATH", help="Save the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown factor over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)["results"]
+
+    results = run(args.number, args.size, args.repeat, args.filter)
+
+    regressions = []
+    width = max(map(len, results), default=0)
+    for name, seconds in results.items():
+        line = f"{name:<{width}} {format_time(seconds)}"
+        if baseline and name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"  {ratio:6.2f}x baseline"
+            if ratio > args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__ if np is not None else None,
+                       "results": results}, file, indent=2)
+        print(f"\nSaved {len(results)} results to {args.save}")
+    if regressions:
+        print(f"\n{len(regressions)} result(s) slower than {args.threshold}x the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Cost checks and memoization for big-integer arithmetic.
+
+Python integers grow without limit, so ``10 ** 10**9`` or ``1 << 10**10``
+would run for minutes and exhaust memory. The checked operations estimate
+the bit length of an integer result from the bit lengths of the operands,
+which costs a few float operations, and raise OverflowError instead of
+computing a result above the budget. The budget is ``max_bits`` when it
+is given and otherwise the process-wide one set with ``set_max_bits``,
+which also applies to expressions and batch evaluation.
+
+Results that are expensive to compute (large powers and modular powers
+with large operands) are memoized in a bounded LRU cache, so repeating
+such a calculation costs a dictionary lookup.
+
+Integers above Python's limit for conversion to decimal text (4300 digits
+by default) are written as hexadecimal by ``format_result``, which takes
+linear time.
+"""
+import math
+import sys
+from functools import lru_cache
+
+DEFAULT_MAX_BITS = 1_000_000
+MEMO_SIZE = 128
+# Smaller results are cheaper to recompute than to hash and look up
+MEMO_MIN_BITS = 1 << 16
+MEMO_MIN_COST = 1 << 24
+
+_max_digits = getattr(sys, "get_int_max_str_digits", lambda: 0)() or 4300
+DECIMAL_MAX_BITS = int(_max_digits * math.log2(10))
+
+_memo_power = lru_cache(maxsize=MEMO_SIZE, typed=True)(pow)
+_max_bits = DEFAULT_MAX_BITS
+
+
+def set_max_bits(max_bits):
+    """Set the process-wide bit-length budget"""
+    global _max_bits
+    if max_bits < 1:
+        raise ValueError("The bit-length budget must be at least 1")
+    _max_bits = max_bits
+
+
+def get_max_bits():
+    """Return the process-wide bit-length budget"""
+    return _max_bits
+
+
+def power_bits(a, b):
+    """Estimate the bit length of a ** b for integers with b >= 0"""
+    if b == 0 or -1 <= a <= 1:
+        return 1
+    if b > sys.maxsize:
+        return b
+    return math.ceil(b * math.log2(abs(a))) + 1
+
+
+def checked_power(a, b, max_bits=None):
+    """Return a ** b, refusing integer results of more than max_bits bits
+
+    Raises:
+        OverflowError: If the result would exceed the budget
+    """
+    if not (isinstance(a, int) and isinstance(b, int)) or b < 0:
+        return a ** b
+    max_bits = max_bits or _max_bits
+    bits = power_bits(a, b)
+    if bits > max_bits:
+        raise OverflowError(f"Result of power would have about {_count(bits)} bits, above the limit of {max_bits}")
+    if bits >= MEMO_MIN_BITS:
+        return _memo_power(a, b)
+    return a ** b
+
+
+def checked_modular_power(a, b, modulus, max_bits=None):
+    """Return pow(a, b, modulus) for integers
+
+    The result is smaller than the modulus, so only the operands are
+    checked against the budget. A negative exponent computes the power
+    of the modular inverse.
+
+    Raises:
+        TypeError: For non-integer operands
+        ZeroDivisionError: For a zero modulus
+        OverflowError: If an operand exceeds the budget
+        ValueError: If a negative exponent is used and a has no inverse
+    """
+    if not all(isinstance(x, int) for x in (a, b, modulus)):
+        raise TypeError("Modular exponentiation requires integer operands")
+    if modulus == 0:
+        raise ZeroDivisionError("Cannot find modulo with zero")
+    max_bits = max_bits or _max_bits
+    bits = max(a.bit_length(), b.bit_length(), modulus.bit_length())
+    if bits > max_bits:
+        raise OverflowError(f"Operands of modular power have {_count(bits)} bits, above the limit of {max_bits}")
+    # Square-and-multiply: one multiplication of modulus-sized numbers per exponent bit
+    if b.bit_length() * modulus.bit_length() ** 2 >= MEMO_MIN_COST:
+        return _memo_power(a, b, modulus)
+    return pow(a, b, modulus)
+
+
+def checked_left_shift(a, b, max_bits=None):
+    """Return a << b, refusing results of more than max_bits bits
+
+    Raises:
+        OverflowError: If the result would exceed the budget
+    """
+    if a and b > 0:
+        max_bits = max_bits or _max_bits
+        bits = a.bit_length() + b
+        if bits > max_bits:
+            raise OverflowError(f"Result of left shift would have {_count(bits)} bits, above the limit of {max_bits}")
+    return a << b
+
+
+def format_result(value):
+    """Return a result as text, in hexadecimal for very long integers"""
+    if isinstance(value, int) and value.bit_length() > DECIMAL_MAX_BITS:
+        return hex(value)
+    return str(value)
+
+
+def printable(value):
+    """Replace very long integers in a result or list of inputs by hexadecimal text
+
+    Such integers cannot be converted to decimal, by str() or by json.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return hex(value) if value.bit_length() > DECIMAL_MAX_BITS else value
+    if isinstance(value, (list, tuple)):
+        return [printable(item) for item in value]
+    if isinstance(value, dict):
+        return {key: printable(item) for key, item in value.items()}
+    return value
+
+
+def _count(bits):
+    """Write a bit count for an error message, as a power of two when it is huge"""
+    return str(bits) if bits < 10 ** 15 else f"2**{bits.bit_length() - 1}"
+
+
+def memo_info():
+    """Return the statistics of the power memo"""
+    return _memo_power.cache_info()
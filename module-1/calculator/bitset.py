@@ -0,0 +1,303 @@
+"""Fixed-size bitsets for bitwise operations on large bitmaps.
+
+A ``Bitset`` of ``size`` bits is stored in a ``bytearray``, bit ``i`` in
+bit ``i % 8`` of byte ``i // 8`` (the little-endian order of
+``int.to_bytes``). It behaves as a set of bit indexes::
+
+    users = Bitset.from_indices([3, 17, 2_000_000], size=4_000_000)
+    active &= users          # in place
+    len(list(active)), active.count()
+
+``&=``, ``|=``, ``^=``, ``<<=``, ``>>=`` and ``invert`` change a bitset in
+place, and ``&``, ``|``, ``^``, ``~``, ``<<``, ``>>`` return a new one.
+Shifts keep the size: bits shifted past either end are dropped.
+
+With NumPy installed the buffer is also viewed as ``uint64`` words, and
+AND/OR/XOR/NOT run as NumPy ufuncs writing into the buffer itself.
+Otherwise, and for the shifts and the popcount, the buffer is processed
+``CHUNK_BYTES`` at a time through Python integers of that size, so
+combining multi-megabit bitmaps never creates an integer of the size of
+the whole bitmap.
+"""
+import operator
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_BYTES = 1 << 16
+
+# Positions of the set bits of each byte value
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+_NONZERO_BYTES = re.compile(rb"[^\x00]+")
+
+
+class Bitset:
+    """Fixed-size set of bit indexes in a bytearray"""
+
+    __slots__ = ("size", "_buffer", "_view", "_words")
+
+    def __init__(self, size):
+        """Create a bitset of size bits, all clear
+
+        Raises:
+            ValueError: For a negative size
+        """
+        if not isinstance(size, int) or size < 0:
+            raise ValueError("Bitset size must be a non-negative integer")
+        self.size = size
+        # Whole 64-bit words, so the buffer can be viewed as uint64
+        self._buffer = bytearray((size + 63) // 64 * 8)
+        self._view = memoryview(self._buffer)
+        self._words = np.frombuffer(self._buffer, dtype="<u8") if np is not None else None
+
+    @classmethod
+    def from_int(cls, value, size=None):
+        """Create a bitset with the bits of a non-negative integer
+
+        Raises:
+            ValueError: For a negative value or one longer than size bits
+        """
+        if not isinstance(value, int) or value < 0:
+            raise ValueError("Bitsets hold non-negative integers")
+        size = value.bit_length() if size is None else size
+        if value.bit_length() > size:
+            raise ValueError(f"Value has {value.bit_length()} bits, more than the bitset size {size}")
+        bitset = cls(size)
+        bitset._buffer[:] = value.to_bytes(len(bitset._buffer), "little")
+        return bitset
+
+    @classmethod
+    def from_indices(cls, indices, size):
+        """Create a bitset with the given bits set
+
+        Raises:
+            IndexError: For an index outside 0 <= index < size
+        """
+        bitset = cls(size)
+        if bitset._words is not None:
+            indices = np.asarray(indices if hasattr(indices, "__len__") else list(indices))
+            if indices.size:
+                if indices.dtype.kind not in "iu":
+                    raise TypeError("Bit indexes must be integers")
+                if indices.min() < 0 or indices.max() >= size:
+                    raise IndexError(f"Bit index out of range for a bitset of {size} bits")
+                bits = np.zeros(len(bitset._buffer) * 8, dtype=np.uint8)
+                bits[indices] = 1
+                bitset._buffer[:] = np.packbits(bits, bitorder="little").tobytes()
+            return bitset
+        for index in indices:
+            bitset[index] = True
+        return bitset
+
+    @classmethod
+    def from_bytes(cls, data, size=None):
+        """Create a bitset from bytes in the order of to_bytes"""
+        size = len(data) * 8 if size is None else size
+        used = (size + 7) // 8
+        if any(data[used:]) or size % 8 and len(data) >= used and data[used - 1] >> size % 8:
+            raise ValueError(f"Data has bits set past the bitset size {size}")
+        bitset = cls(size)
+        data = data[:used]
+        bitset._buffer[:len(data)] = data
+        return bitset
+
+    def to_int(self):
+        """Return the bits as an integer"""
+        return int.from_bytes(self._buffer, "little")
+
+    def to_bytes(self):
+        """Return the bits as (size + 7) // 8 bytes"""
+        return bytes(self._view[:(self.size + 7) // 8])
+
+    def copy(self):
+        """Return an independent copy"""
+        bitset = Bitset(self.size)
+        bitset._buffer[:] = self._buffer
+        return bitset
+
+    def count(self):
+        """Return the number of set bits (popcount)"""
+        view = self._view
+        return sum(int.from_bytes(view[start:start + CHUNK_BYTES], "little").bit_count()
+                   for start in range(0, len(view), CHUNK_BYTES))
+
+    def __iter__(self):
+        """Yield the indexes of the set bits in increasing order"""
+        if self._words is not None:
+            # Unpack only the non-zero words into their 64 bits
+            step = CHUNK_BYTES // 8
+            for start in range(0, len(self._words), step):
+                words = self._words[start:start + step]
+                nonzero = np.flatnonzero(words)
+                if nonzero.size:
+                    bits = np.unpackbits(words[nonzero].view(np.uint8), bitorder="little").reshape(-1, 64)
+                    rows, columns = np.nonzero(bits)
+                    yield from ((nonzero[rows] + start) * 64 + columns).tolist()
+            return
+        view = self._view
+        for start in range(0, len(view), CHUNK_BYTES):
+            # The regular expression skips runs of zero bytes in C
+            for run in _NONZERO_BYTES.finditer(view[start:start + CHUNK_BYTES]):
+                base = (start + run.start()) * 8
+                for position, byte in enumerate(run.group()):
+                    for bit in _BYTE_BITS[byte]:
+                        yield base + position * 8 + bit
+
+    def __contains__(self, index):
+        return isinstance(index, int) and 0 <= index < self.size and bool(self._buffer[index >> 3] >> (index & 7) & 1)
+
+    def __getitem__(self, index):
+        """Return whether a bit is set"""
+        self._check_index(index)
+        return bool(self._buffer[index >> 3] >> (index & 7) & 1)
+
+    def __setitem__(self, index, value):
+        """Set or clear a bit"""
+        self._check_index(index)
+        if value:
+            self._buffer[index >> 3] |= 1 << (index & 7)
+        else:
+            self._buffer[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def __bool__(self):
+        return any(int.from_bytes(self._view[start:start + CHUNK_BYTES], "little")
+                   for start in range(0, len(self._view), CHUNK_BYTES))
+
+    def __eq__(self, other):
+        if not isinstance(other, Bitset):
+            return NotImplemented
+        return self.size == other.size and self._buffer == other._buffer
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Bitset(size={self.size}, count={self.count()})"
+
+    def intersection_update(self, other):
+        """Keep only the bits also set in other (in-place AND)"""
+        return self._combine(other, operator.and_, np.bitwise_and if np is not None else None)
+
+    def update(self, other):
+        """Set the bits set in other (in-place OR)"""
+        return self._combine(other, operator.or_, np.bitwise_or if np is not None else None)
+
+    def symmetric_difference_update(self, other):
+        """Flip the bits set in other (in-place XOR)"""
+        return self._combine(other, operator.xor, np.bitwise_xor if np is not None else None)
+
+    def invert(self):
+        """Flip every bit in place (NOT)"""
+        if self._words is not None:
+            np.invert(self._words, out=self._words)
+        else:
+            view = self._view
+            for start in range(0, len(view), CHUNK_BYTES):
+                chunk = view[start:start + CHUNK_BYTES]
+                ones = (1 << len(chunk) * 8) - 1
+                chunk[:] = (int.from_bytes(chunk, "little") ^ ones).to_bytes(len(chunk), "little")
+        self._clear_padding()
+        return self
+
+    def shift_left(self, count):
+        """Move every bit to an index count higher, in place; bits past the end are dropped"""
+        if count < 0:
+            raise ValueError("negative shift count")
+        moved, bits = divmod(min(count, len(self._buffer) * 8), 8)
+        view = self._view
+        if moved:
+            view[moved:] = view[:len(view) - moved]
+            view[:moved] = bytes(moved)
+        if bits:
+            carry = 0
+            for start in range(moved, len(view), CHUNK_BYTES):
+                chunk = view[start:start + CHUNK_BYTES]
+                value = int.from_bytes(chunk, "little")
+                width = len(chunk) * 8
+                chunk[:] = ((value << bits | carry) & ((1 << width) - 1)).to_bytes(len(chunk), "little")
+                carry = value >> (width - bits)
+        self._clear_padding()
+        return self
+
+    def shift_right(self, count):
+        """Move every bit to an index count lower, in place; bits past index 0 are dropped"""
+        if count < 0:
+            raise ValueError("negative shift count")
+        moved, bits = divmod(min(count, len(self._buffer) * 8), 8)
+        view = self._view
+        end = len(view) - moved
+        if moved:
+            view[:end] = view[moved:]
+            view[end:] = bytes(moved)
+        if bits:
+            carry = 0
+            for start in range((end - 1) // CHUNK_BYTES * CHUNK_BYTES, -1, -CHUNK_BYTES):
+                chunk = view[start:min(start + CHUNK_BYTES, end)]
+                value = int.from_bytes(chunk, "little")
+                chunk[:] = (value >> bits | carry << (len(chunk) * 8 - bits)).to_bytes(len(chunk), "little")
+                carry = value & ((1 << bits) - 1)
+        return self
+
+    def __iand__(self, other):
+        return self.intersection_update(other) if isinstance(other, Bitset) else NotImplemented
+
+    def __ior__(self, other):
+        return self.update(other) if isinstance(other, Bitset) else NotImplemented
+
+    def __ixor__(self, other):
+        return self.symmetric_difference_update(other) if isinstance(other, Bitset) else NotImplemented
+
+    def __ilshift__(self, count):
+        return self.shift_left(count) if isinstance(count, int) else NotImplemented
+
+    def __irshift__(self, count):
+        return self.shift_right(count) if isinstance(count, int) else NotImplemented
+
+    def __and__(self, other):
+        return self.copy().intersection_update(other) if isinstance(other, Bitset) else NotImplemented
+
+    def __or__(self, other):
+        return self.copy().update(other) if isinstance(other, Bitset) else NotImplemented
+
+    def __xor__(self, other):
+        return self.copy().symmetric_difference_update(other) if isinstance(other, Bitset) else NotImplemented
+
+    def __invert__(self):
+        return self.copy().invert()
+
+    def __lshift__(self, count):
+        return self.copy().shift_left(count) if isinstance(count, int) else NotImplemented
+
+    def __rshift__(self, count):
+        return self.copy().shift_right(count) if isinstance(count, int) else NotImplemented
+
+    def _combine(self, other, function, numpy_function):
+        """Apply a bitwise operation with other into this bitset, a chunk at a time"""
+        if not isinstance(other, Bitset):
+            raise TypeError("Bitsets can only be combined with bitsets")
+        if other.size != self.size:
+            raise ValueError(f"Bitsets have different sizes: {self.size} and {other.size}")
+        if self._words is not None and other._words is not None:
+            numpy_function(self._words, other._words, out=self._words)
+            return self
+        view, other_view = self._view, other._view
+        for start in range(0, len(view), CHUNK_BYTES):
+            chunk = view[start:start + CHUNK_BYTES]
+            value = function(int.from_bytes(chunk, "little"),
+                             int.from_bytes(other_view[start:start + CHUNK_BYTES], "little"))
+            chunk[:] = value.to_bytes(len(chunk), "little")
+        return self
+
+    def _clear_padding(self):
+        """Clear the bits after size in the last word"""
+        if self.size % 8:
+            self._buffer[self.size // 8] &= (1 << self.size % 8) - 1
+        self._view[(self.size + 7) // 8:] = bytes(len(self._buffer) - (self.size + 7) // 8)
+
+    def _check_index(self, index):
+        if not isinstance(index, int):
+            raise TypeError("Bit indexes must be integers")
+        if not 0 <= index < self.size:
+            raise IndexError(f"Bit index {index} out of range for a bitset of {self.size} bits")
@@ -1,6 +1,14 @@
+import argparse
+import sys
+from bignum import (DEFAULT_MAX_BITS, checked_left_shift, checked_modular_power, checked_power, format_result,
+                    printable, set_max_bits)
+from history import DEFAULT_CAPACITY, History
+
+
 class Calculator:
-    def __init__(self):
-        self.history = []
+    def __init__(self, history_size=DEFAULT_CAPACITY, history_path=None, max_bits=None):
+        self.history = History(history_size, history_path)
+        self.max_bits = max_bits
         
     def add(self, a, b):
         """Addition operation"""
@@ -22,7 +30,11 @@ class Calculator:
         
     def power(self, a, b):
         """Exponential operation"""
-        return a ** b
+        return checked_power(a, b, self.max_bits)
+    
+    def modular_power(self, a, b, modulus):
+        """Modular exponentiation, pow(a, b, modulus)"""
+        return checked_modular_power(a, b, modulus, self.max_bits)
         
     def modulo(self, a, b):
         """Modulo operation"""
@@ -53,75 +65,120 @@ class Calculator:
         return bool(a) != bool(b)
     
     def bitwise_and(self, a, b):
-        """Bitwise AND operation"""
-        if not all(isinstance(x, int) for x in [a, b]):
+        """Bitwise AND operation, of integers or of bitsets of equal size"""
+        if not all(isinstance(x, int) for x in [a, b]) and not _are_bitsets(a, b):
             raise TypeError("Bitwise operations require integer operands")
         return a & b
         
     def bitwise_or(self, a, b):
-        """Bitwise OR operation"""
-        if not all(isinstance(x, int) for x in [a, b]):
+        """Bitwise OR operation, of integers or of bitsets of equal size"""
+        if not all(isinstance(x, int) for x in [a, b]) and not _are_bitsets(a, b):
             raise TypeError("Bitwise operations require integer operands")
         return a | b
         
     def bitwise_xor(self, a, b):
-        """Bitwise XOR operation"""
-        if not all(isinstance(x, int) for x in [a, b]):
+        """Bitwise XOR operation, of integers or of bitsets of equal size"""
+        if not all(isinstance(x, int) for x in [a, b]) and not _are_bitsets(a, b):
             raise TypeError("Bitwise operations require integer operands")
         return a ^ b
         
     def bitwise_not(self, a):
-        """Bitwise NOT operation"""
-        if not isinstance(a, int):
+        """Bitwise NOT operation, of an integer or a bitset"""
+        if not isinstance(a, int) and not _are_bitsets(a):
             raise TypeError("Bitwise operations require integer operands")
         return ~a
         
     def left_shift(self, a, b):
-        """Left shift operation"""
+        """Left shift operation; a bitset keeps its size"""
+        if isinstance(b, int) and _are_bitsets(a):
+            return a << b
         if not all(isinstance(x, int) for x in [a, b]):
             raise TypeError("Shift operations require integer operands")
-        return a << b
+        return checked_left_shift(a, b, self.max_bits)
         
     def right_shift(self, a, b):
         """Right shift operation"""
-        if not all(isinstance(x, int) for x in [a, b]):
+        if not all(isinstance(x, int) for x in [a, b]) and not (isinstance(b, int) and _are_bitsets(a)):
             raise TypeError("Shift operations require integer operands")
         return a >> b
     
+    def bitset(self, value=0, size=None):
+        """Create a bitset from a non-negative integer or an iterable of bit indexes"""
+        from bitset import Bitset
+        if isinstance(value, int):
+            return Bitset.from_int(value, size)
+        if size is None:
+            raise ValueError("A bitset of indexes needs a size")
+        return Bitset.from_indices(value, size)
+    
+    def popcount(self, a):
+        """Number of set bits of a non-negative integer or a bitset"""
+        if _are_bitsets(a):
+            return a.count()
+        if not isinstance(a, int) or a < 0:
+            raise TypeError("Popcount requires a non-negative integer or a bitset")
+        return a.bit_count()
+    
+    def combine_bitsets(self, operation, target, *others):
+        """Combine bitsets into target in place with "and", "or" or "xor" and return it"""
+        methods = {"and": "intersection_update", "or": "update", "xor": "symmetric_difference_update"}
+        if operation not in methods:
+            raise ValueError(f"Unknown bitset operation: {operation}")
+        if not _are_bitsets(target, *others):
+            raise TypeError("combine_bitsets requires bitset operands")
+        combine = getattr(target, methods[operation])
+        for other in others:
+            combine(other)
+        return target
+    
+    def evaluate(self, expression, variables=None):
+        """Evaluate an expression such as "(a + b) ** 2 % m" with the given variables"""
+        from expression import compile_expression
+        return compile_expression(expression).evaluate(variables)
+    
+    def batch(self, operation, a, b=None, c=None):
+        """Apply an operation element-wise to columns of operands"""
+        from vectorized import apply_batch
+        return apply_batch(operation, a, b, c)
+    
+    def evaluate_batch(self, expression, columns):
+        """Evaluate an expression element-wise over columns of variable values"""
+        from vectorized import evaluate_batch
+        return evaluate_batch(expression, columns)
+    
     def save_operation(self, operation, inputs, result):
         """Save the operation in history"""
-        self.history.append({
-            'operation': operation,
-            'inputs': inputs,
-            'result': result
-        })
+        self.history.append(operation, inputs, result)
     
     def get_history(self):
         """Return calculation history"""
-        return self.history
+        return [entry.as_dict() for entry in self.history]
+    
+    def query_history(self, operation=None, start=None, stop=None):
+        """Return the history entries of an operation and/or index range"""
+        return self.history.query(operation, start, stop)
+    
+    def close(self):
+        """Write any buffered history to its file"""
+        self.history.close()
+
+
+def _are_bitsets(*operands):
+    """Check for Bitset operands without importing bitset.py for integer ones"""
+    if not all(type(x).__name__ == "Bitset" for x in operands):
+        return False
+    from bitset import Bitset
+    return all(isinstance(x, Bitset) for x in operands)
 
 
 def display_menu():
     """Display the calculator menu"""
     print("\n===== CALCULATOR MENU =====")
-    print("1. Addition")
-    print("2. Subtraction")
-    print("3. Multiplication")
-    print("4. Division")
-    print("5. Exponentiation")
-    print("6. Modulo")
-    print("7. Floor Division")
-    print("8. Logical AND")
-    print("9. Logical OR")
-    print("10. Logical NOT")
-    print("11. Logical XOR")
-    print("12. Bitwise AND")
-    print("13. Bitwise OR")
-    print("14. Bitwise XOR")
-    print("15. Bitwise NOT")
-    print("16. Left Shift")
-    print("17. Right Shift")
+    from operations import MENU, OPERATIONS
+    for choice, name in MENU.items():
+        print(f"{choice}. {OPERATIONS[name].label}")
     print("18. View History")
+    print("19. Evaluate Expression")
     print("0. Exit")
     print("==========================")
 
@@ -147,8 +204,99 @@ def get_int_input(prompt_msg):
             print("Invalid input! Please enter an integer.")
 
 
-def main():
-    calc = Calculator()
+def parse_value(text):
+    """Convert text to an integer (decimal, 0x, 0o or 0b), float or boolean
+
+    Raises:
+        ValueError: If the text is not a number
+    """
+    value = text.strip()
+    if value.lower() in ['true', 'false']:
+        return value.lower() == 'true'
+    try:
+        return int(value, 0)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid number: {text!r}")
+
+
+def get_value_input(prompt_msg):
+    """Get an integer, float or boolean input with validation"""
+    while True:
+        try:
+            return parse_value(input(prompt_msg))
+        except ValueError:
+            print("Invalid input! Please enter a number.")
+
+
+def parse_args(argv=None):
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(
+        description="Advanced Calculator. Runs the interactive menu unless --batch or --serve is given.")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="Evaluate one operation ('add 2 3') or expression ('(2 + 3) * 4') per line "
+                             "of FILE, or of stdin if FILE is '-' or omitted, without prompts")
+    parser.add_argument("--output-format", choices=["text", "jsonl"], default="text",
+                        help="With --batch, print plain results or one JSON object per line (default: text)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="With --batch, number of processes evaluating chunks of lines")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="Serve JSON-RPC requests on a Unix socket path or localhost 'host:port'")
+    parser.add_argument("--workers", type=int, default=2, metavar="N",
+                        help="With --serve, number of processes for big-integer calculations (default: 2)")
+    parser.add_argument("--max-bits", type=int, default=DEFAULT_MAX_BITS, metavar="N",
+                        help=f"Refuse integer results longer than N bits (default: {DEFAULT_MAX_BITS})")
+    parser.add_argument("--history-size", type=int, default=DEFAULT_CAPACITY, metavar="N",
+                        help=f"Number of calculations kept in memory (default: {DEFAULT_CAPACITY})")
+    parser.add_argument("--history-file", metavar="PATH",
+                        help="Append the history to a JSON Lines file, or an SQLite database for "
+                             ".db/.sqlite/.sqlite3 paths, and reload it on start")
+    args = parser.parse_args(argv)
+    if args.batch is None and (args.output_format != "text" or args.jobs != 1):
+        parser.error("--output-format and --jobs require --batch")
+    if args.batch is not None and args.serve:
+        parser.error("--batch and --serve cannot be combined")
+    if args.serve is None and args.workers != 2:
+        parser.error("--workers requires --serve")
+    if args.jobs < 1 or args.workers < 1:
+        parser.error("--jobs and --workers must be at least 1")
+    if args.history_size < 1:
+        parser.error("--history-size must be at least 1")
+    return args
+
+
+def main(argv=None):
+    from operations import INTEGER, MENU, NUMBER, OPERATIONS
+    # Input function and prompt words per operand type
+    operand_inputs = {NUMBER: (get_numeric_input, "a value", "value"), INTEGER: (get_int_input, "an integer", "integer")}
+    args = parse_args(argv)
+    try:
+        set_max_bits(args.max_bits)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.batch is not None:
+        from batch import run_batch_file
+        sys.exit(run_batch_file(args.batch, args.output_format, args.jobs,
+                                args.history_size, args.history_file, args.max_bits))
+    if args.serve:
+        from server import CalculatorServer
+        try:
+            server = CalculatorServer(args.serve, args.workers, args.history_size, args.max_bits)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        server.serve_forever()
+        return
+
+    try:
+        calc = Calculator(args.history_size, args.history_file)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     result = None
     
     print("Welcome to the Advanced Calculator!")
@@ -157,103 +305,70 @@ def main():
         display_menu()
         
         if result is not None:
-            print(f"\nPrevious result: {result}")
+            print(f"\nPrevious result: {format_result(result)}")
             print("You can use 'result' as an input for your next calculation.")
         
         try:
-            choice = input("\nEnter your choice (0-18): ")
+            choice = input("\nEnter your choice (0-19): ")
             
             if choice == '0':
+                calc.close()
                 print("Thank you for using the calculator. Goodbye!")
                 break
                 
             elif choice == '18':
-                history = calc.get_history()
+                history = calc.query_history()
                 if not history:
                     print("No calculation history available.")
                 else:
                     print("\n===== CALCULATION HISTORY =====")
-                    for i, entry in enumerate(history, 1):
-                        print(f"{i}. {entry['operation']}: {entry['inputs']} = {entry['result']}")
+                    for entry in history:
+                        print(f"{entry.index + 1}. {entry.operation}: {printable(entry.inputs)} = {format_result(entry.result)}")
                 continue
                 
-                a = result if result is not None and input(f"Use previous result {result}? (y/n): ").lower() == 'y' else (
-                    get_numeric_input("Enter a value: ") if choice == '10' else get_int_input("Enter an integer: ")
-                )
+            elif choice in MENU:
+                operation = OPERATIONS[MENU[choice]]
+                get_input, single, kind = operand_inputs[operation.operand_type]
                 
-                if choice == '10':
-                    result = calc.logical_not(a)
-                    calc.save_operation("Logical NOT", [a], result)
+                if operation.arity == 1:
+                    if result is not None and input(f"Use previous result {format_result(result)}? (y/n): ").lower() == 'y':
+                        a = result
+                    else:
+                        a = get_input(f"Enter {single}: ")
+                    operands = [a]
                 else:
-                    result = calc.bitwise_not(a)
-                    calc.save_operation("Bitwise NOT", [a], result)
-                    
-                print(f"Result: {result}")
+                    if result is not None and input(f"Use previous result {format_result(result)} as first operand? (y/n): ").lower() == 'y':
+                        a = result
+                    else:
+                        a = get_input(f"Enter first {kind}: ")
+                    operands = [a, get_input(f"Enter second {kind}: ")]
                 
-            elif choice in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '11', '12', '13', '14', '16', '17']:
-                needs_int = choice in ['12', '13', '14', '16', '17']
+                result = operation.function(calc, *operands)
+                calc.save_operation(operation.label, operands, result)
+                print(f"Result: {format_result(result)}")
                 
-                if result is not None and input(f"Use previous result {result} as first operand? (y/n): ").lower() == 'y':
-                    a = result
-                else:
-                    a = get_int_input("Enter first integer: ") if needs_int else get_numeric_input("Enter first value: ")
-                
-                b = get_int_input("Enter second integer: ") if needs_int else get_numeric_input("Enter second value: ")
-                
-                if choice == '1':
-                    result = calc.add(a, b)
-                    calc.save_operation("Addition", [a, b], result)
-                elif choice == '2':
-                    result = calc.subtract(a, b)
-                    calc.save_operation("Subtraction", [a, b], result)
-                elif choice == '3':
-                    result = calc.multiply(a, b)
-                    calc.save_operation("Multiplication", [a, b], result)
-                elif choice == '4':
-                    result = calc.divide(a, b)
-                    calc.save_operation("Division", [a, b], result)
-                elif choice == '5':
-                    result = calc.power(a, b)
-                    calc.save_operation("Exponentiation", [a, b], result)
-                elif choice == '6':
-                    result = calc.modulo(a, b)
-                    calc.save_operation("Modulo", [a, b], result)
-                elif choice == '7':
-                    result = calc.floor_divide(a, b)
-                    calc.save_operation("Floor Division", [a, b], result)
-                elif choice == '8':
-                    result = calc.logical_and(a, b)
-                    calc.save_operation("Logical AND", [a, b], result)
-                elif choice == '9':
-                    result = calc.logical_or(a, b)
-                    calc.save_operation("Logical OR", [a, b], result)
-                elif choice == '11':
-                    result = calc.logical_xor(a, b)
-                    calc.save_operation("Logical XOR", [a, b], result)
-                elif choice == '12':
-                    result = calc.bitwise_and(a, b)
-                    calc.save_operation("Bitwise AND", [a, b], result)
-                elif choice == '13':
-                    result = calc.bitwise_or(a, b)
-                    calc.save_operation("Bitwise OR", [a, b], result)
-                elif choice == '14':
-                    result = calc.bitwise_xor(a, b)
-                    calc.save_operation("Bitwise XOR", [a, b], result)
-                elif choice == '16':
-                    result = calc.left_shift(a, b)
-                    calc.save_operation("Left Shift", [a, b], result)
-                elif choice == '17':
-                    result = calc.right_shift(a, b)
-                    calc.save_operation("Right Shift", [a, b], result)
-                    
-                print(f"Result: {result}")
+            elif choice == '19':
+                from expression import compile_expression
+                expression = compile_expression(input("Enter expression (e.g. (a + b) ** 2 % m & 0xFF): "))
+                variables = {}
+                for name in expression.variables:
+                    if name == 'result' and result is not None:
+                        variables[name] = result
+                    else:
+                        variables[name] = get_value_input(f"Enter {name}: ")
+                result = expression.evaluate(variables)
+                calc.save_operation("Expression", [expression.text, variables], result)
+                print(f"Result: {format_result(result)}")
                 
             else:
-                print("Invalid choice! Please enter a number between 0 and 18.")
+                print("Invalid choice! Please enter a number between 0 and 19.")
                 
         except ZeroDivisionError as e:
             print(f"Error: {e}")
             
+        except OverflowError as e:
+            print(f"Error: {e}")
+            
         except ValueError as e:
             print(f"Error: {e}")
             
@@ -0,0 +1,156 @@
+"""Compiled expressions over the Calculator operations.
+
+An expression such as ``(a + b) ** 2 % m & 0xFF`` is parsed once with
+``ast``, checked against a whitelist of node types, and compiled into a
+plain Python function of its variables, so evaluating it again costs one
+function call. Compiled expressions are kept in an LRU cache keyed by the
+expression text.
+
+Operators map to the Calculator operations::
+
+    +  -  *  /  **  %  //        add, subtract, multiply, divide, power,
+                                 modulo, floor_divide
+    and  or  not                 logical_and, logical_or, logical_not
+    &  |  ^  ~  <<  >>           bitwise_and, bitwise_or, bitwise_xor,
+                                 bitwise_not, left_shift, right_shift
+
+and every operation can also be called by name, e.g.
+``logical_xor(a, b)`` or ``modular_power(a, b, m)``. Operators raise the
+same exception types as the Calculator methods (ZeroDivisionError,
+TypeError for non-integer bitwise operands). ``**`` and ``<<`` are
+compiled into calls of the power and left_shift operations, so they are
+subject to the big-number budget of bignum.py.
+"""
+import ast
+from functools import lru_cache
+from calculator import Calculator
+from operations import OPERATIONS
+
+# Operations callable by name, with their number of operands
+FUNCTIONS = {name: operation.arity for name, operation in OPERATIONS.items()}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv,
+    ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift,
+    ast.And, ast.Or, ast.Not, ast.Invert, ast.USub, ast.UAdd,
+)
+
+_calculator = Calculator()
+_NAMESPACE = {name: getattr(_calculator, name) for name in OPERATIONS}
+_NAMESPACE["__builtins__"] = {}
+
+
+class Expression:
+    """A compiled expression.
+
+    Call it with the variable values, positionally in the order of
+    ``variables`` or by name, or pass a dictionary to ``evaluate``.
+    """
+
+    __slots__ = ("text", "variables", "function")
+
+    def __init__(self, text, variables, function):
+        self.text = text
+        self.variables = variables
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def evaluate(self, bindings=None):
+        """Evaluate the expression with a dictionary of variable values"""
+        bindings = bindings or {}
+        try:
+            args = [bindings[name] for name in self.variables]
+        except KeyError as e:
+            raise ValueError(f"No value given for variable '{e.args[0]}'")
+        return self.function(*args)
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text):
+    """Parse and compile an expression, or return the cached compilation
+
+    Raises:
+        ValueError: If the expression is invalid or uses unsupported syntax
+    """
+    body, variables = parse_expression(text)
+    body = _CheckedOperators().visit(body)
+    return Expression(text, variables, build_function(body, variables, _NAMESPACE))
+
+
+def parse_expression(text):
+    """Parse and check an expression
+
+    Returns:
+        tuple: (expression body as a new ast node, sorted variable names)
+
+    Raises:
+        ValueError: If the expression is invalid or uses unsupported syntax
+    """
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+
+    calls = set()
+    variables = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float, bool):
+            raise ValueError(f"Unsupported constant in expression: {node.value!r}")
+        if isinstance(node, ast.Call):
+            _check_call(node)
+            calls.add(id(node.func))
+        elif isinstance(node, ast.Name) and id(node) not in calls:
+            variables.add(node.id)
+
+    for name in variables:
+        if name.startswith("__") or name in FUNCTIONS:
+            raise ValueError(f"Invalid variable name: {name}")
+    return tree.body, tuple(sorted(variables))
+
+
+def build_function(body, variables, namespace):
+    """Compile an expression body into a function of its variables
+
+    Names other than the variables are looked up in namespace.
+    """
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in variables],
+                              kwonlyargs=[], kw_defaults=[], defaults=[])
+    function = ast.Expression(body=ast.Lambda(args=arguments, body=body))
+    code = compile(ast.fix_missing_locations(function), "<expression>", "eval")
+    return eval(code, dict(namespace))
+
+
+def evaluate(text, bindings=None):
+    """Evaluate an expression once, compiling it on first use"""
+    return compile_expression(text).evaluate(bindings)
+
+
+def _check_call(node):
+    """Only allow calls of the Calculator operations with the right arity"""
+    if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+        raise ValueError("Only the calculator operations can be called in an expression")
+    if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+        raise ValueError(f"{node.func.id}() only takes positional operands")
+    if len(node.args) != FUNCTIONS[node.func.id]:
+        raise ValueError(f"{node.func.id}() takes {FUNCTIONS[node.func.id]} operand(s), got {len(node.args)}")
+
+
+class _CheckedOperators(ast.NodeTransformer):
+    """Replace ** and << by calls of the checked Calculator operations"""
+
+    OPERATIONS = {ast.Pow: "power", ast.LShift: "left_shift"}
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        name = self.OPERATIONS.get(type(node.op))
+        if name is None:
+            return node
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=[node.left, node.right], keywords=[])
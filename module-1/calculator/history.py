@@ -0,0 +1,372 @@
+"""Bounded calculation history with optional append-only persistence.
+
+``History`` keeps the last ``capacity`` entries in a ring buffer, so a
+long-running session uses constant memory. Every entry gets an index that
+keeps increasing over the lifetime of the history (and across sessions
+when it is persisted), and an index per operation makes queries by
+operation type proportional to the number of matching entries.
+
+With a ``path``, entries are also appended to a store and form a durable
+audit trail: a JSON Lines file, or an SQLite database for paths ending in
+``.db``, ``.sqlite`` or ``.sqlite3``. Writes are batched and flushed every
+``flush_every`` entries, on ``flush``/``close`` and at interpreter exit.
+Reopening a store continues its numbering and reloads its latest entries.
+The store numbers entries itself when it writes them, so several sessions
+can append to the same store; their entries are interleaved in the store
+and get different indexes there than in each session's memory.
+"""
+import atexit
+import json
+import os
+import sqlite3
+from collections import deque
+from bignum import printable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CAPACITY = 10000
+FLUSH_EVERY = 1000
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+TAIL_BLOCK = 1 << 16
+
+# One encoder for all entries; json.dumps with options builds a new one per call
+_encoder = json.JSONEncoder(default=str, separators=(",", ":"))
+
+
+class HistoryEntry:
+    """One calculation: operation name, tuple of inputs and result"""
+
+    __slots__ = ("index", "operation", "inputs", "result")
+
+    def __init__(self, index, operation, inputs, result):
+        self.index = index
+        self.operation = operation
+        self.inputs = inputs
+        self.result = result
+
+    def as_dict(self):
+        """Return the entry in the dictionary form of get_history"""
+        return {'operation': self.operation, 'inputs': list(self.inputs), 'result': self.result}
+
+    def __eq__(self, other):
+        if not isinstance(other, HistoryEntry):
+            return NotImplemented
+        return (self.index, self.operation, self.inputs, self.result) == \
+            (other.index, other.operation, other.inputs, other.result)
+
+    def __repr__(self):
+        return f"HistoryEntry({self.index}, {self.operation!r}, {self.inputs!r}, {self.result!r})"
+
+
+class History:
+    """Ring buffer of the most recent calculations"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None, flush_every=FLUSH_EVERY):
+        """Create a history.
+
+        Args:
+            capacity: Number of entries kept in memory
+            path: Optional JSON Lines or SQLite file the entries are appended to
+            flush_every: Number of entries buffered before they are written
+
+        Raises:
+            ValueError: For a capacity below 1 or a store that cannot be opened
+        """
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        self.flush_every = max(1, flush_every)
+        self.store = open_store(path) if path else None
+
+        self._entries = []
+        self._by_operation = {}
+        self._pending = []
+        self._origin = self._next_index = 0
+        if self.store:
+            recent, self._next_index = self.store.load(capacity)
+            # Only reload the run of consecutive indexes at the end
+            for position in range(len(recent) - 1, 0, -1):
+                if recent[position].index != recent[position - 1].index + 1:
+                    recent = recent[position:]
+                    break
+            self._origin = self._next_index - len(recent)
+            for entry in recent:
+                self._insert(entry)
+            atexit.register(self.close)
+
+    @property
+    def first_index(self):
+        """Index of the oldest entry still in memory"""
+        return self._next_index - len(self._entries)
+
+    @property
+    def next_index(self):
+        """Index the next entry will get"""
+        return self._next_index
+
+    def append(self, operation, inputs, result):
+        """Record a calculation and return its entry"""
+        entry = HistoryEntry(self._next_index, operation, tuple(inputs), result)
+        self._next_index += 1
+        self._insert(entry)
+        if self.store:
+            self._pending.append(entry)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+        return entry
+
+    def extend(self, records):
+        """Record (operation, inputs, result) tuples"""
+        for operation, inputs, result in records:
+            self.append(operation, inputs, result)
+
+    def query(self, operation=None, start=None, stop=None):
+        """Return the entries in memory with start <= index < stop, oldest first
+
+        Args:
+            operation: Only return entries of this operation
+            start: Smallest index (default: the oldest entry in memory)
+            stop: Index after the last one returned (default: all entries)
+        """
+        first = self.first_index
+        start = first if start is None else max(start, first)
+        stop = self._next_index if stop is None else min(stop, self._next_index)
+        if start >= stop:
+            return []
+        if operation is None:
+            return [self._slot(index) for index in range(start, stop)]
+        return [self._slot(index) for index in self._by_operation.get(operation, ())
+                if start <= index < stop]
+
+    def operations(self):
+        """Return the number of entries in memory per operation"""
+        return {operation: len(indexes) for operation, indexes in self._by_operation.items()}
+
+    def flush(self):
+        """Write the buffered entries to the store"""
+        if self.store and self._pending:
+            self.store.append(self._pending)
+            self._pending = []
+
+    def close(self):
+        """Flush and close the store"""
+        if self.store:
+            self.flush()
+            self.store.close()
+            self.store = None
+            atexit.unregister(self.close)
+
+    def clear(self):
+        """Forget the entries in memory; stored entries are kept"""
+        self._entries = []
+        self._by_operation = {}
+        self._origin = self._next_index
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for index in range(self.first_index, self._next_index):
+            yield self._slot(index)
+
+    def __getitem__(self, index):
+        """Return the entry with the given history index"""
+        if not self.first_index <= index < self._next_index:
+            raise IndexError(f"History index {index} is not in memory")
+        return self._slot(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _slot(self, index):
+        return self._entries[(index - self._origin) % self.capacity]
+
+    def _insert(self, entry):
+        """Put an entry in the ring, evicting the oldest one when it is full"""
+        if len(self._entries) < self.capacity:
+            self._entries.append(entry)
+        else:
+            slot = (entry.index - self._origin) % self.capacity
+            oldest = self._entries[slot]
+            indexes = self._by_operation[oldest.operation]
+            indexes.popleft()
+            if not indexes:
+                del self._by_operation[oldest.operation]
+            self._entries[slot] = entry
+        self._by_operation.setdefault(entry.operation, deque()).append(entry.index)
+
+
+def _encode(value):
+    """Encode a value as JSON, with integers too long for decimal text in hexadecimal"""
+    try:
+        return _encoder.encode(value)
+    except ValueError:
+        return _encoder.encode(printable(value))
+
+
+def open_store(path):
+    """Open the history store for a path, chosen by its extension"""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return SQLiteHistoryStore(path)
+    return JSONLHistoryStore(path)
+
+
+class JSONLHistoryStore:
+    """Append-only JSON Lines file with one entry per line
+
+    Appends hold an exclusive lock on the file (where ``fcntl`` is
+    available) and number the entries after the last index in the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self.file = open(path, 'a+b')
+        except OSError as e:
+            raise ValueError(f"Error opening history file {path}: {str(e)}")
+
+    def load(self, limit):
+        """Return (the last limit entries, the next index)"""
+        recent = deque(self._read(), maxlen=limit)
+        next_index = recent[-1].index + 1 if recent else 0
+        return list(recent), next_index
+
+    def append(self, entries):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+            try:
+                first, complete = self._tail()
+                lines = [_encode([first + offset, entry.operation, entry.inputs, entry.result])
+                         for offset, entry in enumerate(entries)]
+                # Start a new line after a line cut short by a crash
+                self.file.write(("" if complete else "\n").encode() + "\n".join(lines).encode("utf-8") + b"\n")
+                self.file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self.file, fcntl.LOCK_UN)
+        except OSError as e:
+            raise ValueError(f"Error writing history file {self.path}: {str(e)}")
+
+    def query(self, operation=None, start=None, stop=None):
+        """Return the stored entries matching the History.query arguments"""
+        return [entry for entry in self._read()
+                if (operation is None or entry.operation == operation)
+                and (start is None or entry.index >= start) and (stop is None or entry.index < stop)]
+
+    def close(self):
+        self.file.close()
+
+    def _tail(self):
+        """Return (the index after the last stored entry, whether the file ends with a newline)
+
+        The file is read backwards a block at a time, so only its last
+        lines are decoded.
+        """
+        position = self.file.seek(0, os.SEEK_END)
+        if position == 0:
+            return 0, True
+        self.file.seek(position - 1)
+        complete = self.file.read(1) == b"\n"
+        fragment = b""
+        while position > 0:
+            start = max(0, position - TAIL_BLOCK)
+            self.file.seek(start)
+            lines = (self.file.read(position - start) + fragment).split(b"\n")
+            position = start
+            # The first piece is only a whole line at the start of the file
+            fragment = lines.pop(0) if start else b""
+            for line in reversed(lines):
+                try:
+                    return json.loads(line)[0] + 1, complete
+                except (ValueError, TypeError, IndexError, KeyError):
+                    continue
+        return 0, complete
+
+    def _read(self):
+        """Yield the stored entries, skipping a line cut short by a crash"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    index, operation, inputs, result = json.loads(line)
+                except ValueError:
+                    continue
+                yield HistoryEntry(index, operation, tuple(inputs), result)
+
+
+class SQLiteHistoryStore:
+    """Append-only SQLite table of entries, indexed by operation"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS history (
+                    id INTEGER PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    inputs TEXT NOT NULL,
+                    result TEXT
+                )
+            ''')
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_history_operation ON history (operation, id)")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            raise ValueError(f"Error opening history database {path}: {str(e)}")
+
+    def load(self, limit):
+        """Return (the last limit entries, the next index)"""
+        rows = self.connection.execute(
+            "SELECT id, operation, inputs, result FROM history ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        recent = [self._entry(row) for row in reversed(rows)]
+        next_index = recent[-1].index + 1 if recent else 0
+        return recent, next_index
+
+    def append(self, entries):
+        try:
+            with self.connection:
+                # Take the write lock first, then number the entries after the
+                # last stored one, which may come from another session
+                self.connection.execute("BEGIN IMMEDIATE")
+                first = self.connection.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM history").fetchone()[0]
+                rows = [(first + offset, entry.operation, _encode(entry.inputs), _encode(entry.result))
+                        for offset, entry in enumerate(entries)]
+                self.connection.executemany(
+                    "INSERT INTO history (id, operation, inputs, result) VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            raise ValueError(f"Error writing history database {self.path}: {str(e)}")
+
+    def query(self, operation=None, start=None, stop=None):
+        """Return the stored entries matching the History.query arguments"""
+        conditions, params = [], []
+        if operation is not None:
+            conditions.append("operation = ?")
+            params.append(operation)
+        if start is not None:
+            conditions.append("id >= ?")
+            params.append(start)
+        if stop is not None:
+            conditions.append("id < ?")
+            params.append(stop)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT id, operation, inputs, result FROM history {where} ORDER BY id", params)
+        return [self._entry(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def _entry(row):
+        index, operation, inputs, result = row
+        return HistoryEntry(index, operation, tuple(json.loads(inputs)), json.loads(result))
@@ -0,0 +1,141 @@
+"""Load test for the calculator server.
+
+Opens several connections to a running server (``calculator.py --serve``),
+keeps a number of requests pipelined on each one and reports the
+throughput and the latency percentiles::
+
+    python loadtest.py /tmp/calculator.sock --connections 8 --pipeline 32 --requests 200000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from server import parse_tcp_address
+
+DEFAULT_ADDRESS = "/tmp/calculator.sock"
+
+# (method, params) mixes of cheap requests; heavy adds big powers served by the pool
+MIXES = {
+    "arithmetic": [
+        ("add", lambda: [random.randint(-10 ** 6, 10 ** 6), random.randint(-10 ** 6, 10 ** 6)]),
+        ("multiply", lambda: [random.random() * 100, random.randint(1, 1000)]),
+        ("floor_divide", lambda: [random.randint(0, 10 ** 9), random.randint(1, 1000)]),
+        ("bitwise_xor", lambda: [random.getrandbits(64), random.getrandbits(64)]),
+        ("left_shift", lambda: [random.getrandbits(32), random.randint(0, 64)]),
+    ],
+    "expression": [
+        ("evaluate", lambda: {"expression": "(a + b) ** 2 % m & 0xFF",
+                              "variables": {"a": random.randint(0, 1000), "b": random.randint(0, 1000),
+                                            "m": random.randint(1, 97)}}),
+    ],
+    "heavy": [
+        ("power", lambda: [random.randint(3, 1000), random.randint(20000, 40000)]),
+        ("modular_power", lambda: [random.getrandbits(2048), random.getrandbits(2048), random.getrandbits(2048) | 1]),
+    ],
+}
+
+
+async def _connect(address):
+    host, port = parse_tcp_address(address)
+    if port is not None:
+        return await asyncio.open_connection(host, port, limit=16 * 1024 * 1024)
+    return await asyncio.open_unix_connection(address, limit=16 * 1024 * 1024)
+
+
+async def _client(address, requests, pipeline, batch_size, mix, latencies, errors):
+    """Send requests on one connection with up to pipeline lines in flight"""
+    reader, writer = await _connect(address)
+    sent = {}
+    window = asyncio.Semaphore(pipeline)
+
+    async def receive(lines):
+        for _ in range(lines):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection")
+            now = time.perf_counter()
+            responses = json.loads(line)
+            for response in responses if isinstance(responses, list) else [responses]:
+                latencies.append(now - sent.pop(response["id"]))
+                if "error" in response:
+                    errors.append(response["error"]["message"])
+            window.release()
+
+    lines = (requests + batch_size - 1) // batch_size
+    receiver = asyncio.create_task(receive(lines))
+    request_id = 0
+    for _ in range(lines):
+        await window.acquire()
+        batch = []
+        for _ in range(min(batch_size, requests - request_id)):
+            method, params = random.choice(mix)
+            batch.append({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params()})
+            request_id += 1
+        now = time.perf_counter()
+        for request in batch:
+            sent[request["id"]] = now
+        writer.write((json.dumps(batch if batch_size > 1 else batch[0]) + "\n").encode("utf-8"))
+        if window.locked():
+            await writer.drain()
+    await receiver
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_load(address, connections=4, requests=100000, pipeline=16, batch_size=1, mixes=("arithmetic",)):
+    """Run the load test and return (elapsed seconds, sorted latencies, error messages)"""
+    mix = [item for name in mixes for item in MIXES[name]]
+    latencies, errors = [], []
+    per_connection = [requests // connections + (i < requests % connections) for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(address, count, pipeline, batch_size, mix, latencies, errors)
+                           for count in per_connection if count))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies, errors
+
+
+def percentile(values, fraction):
+    """Return the value below which a fraction of the sorted values lie"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test a calculator server")
+    parser.add_argument("address", nargs="?", default=DEFAULT_ADDRESS,
+                        help=f"Unix socket path or 'host:port' (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("--connections", type=int, default=4, metavar="N", help="Concurrent connections")
+    parser.add_argument("--requests", type=int, default=100000, metavar="N", help="Total number of requests")
+    parser.add_argument("--pipeline", type=int, default=16, metavar="N",
+                        help="Lines in flight per connection (1 waits for each response)")
+    parser.add_argument("--batch-size", type=int, default=1, metavar="N", help="Requests per JSON-RPC batch")
+    parser.add_argument("--mix", choices=sorted(MIXES), action="append",
+                        help="Request mix; may be repeated (default: arithmetic)")
+    args = parser.parse_args(argv)
+    if min(args.connections, args.requests, args.pipeline, args.batch_size) < 1:
+        parser.error("--connections, --requests, --pipeline and --batch-size must be at least 1")
+
+    try:
+        elapsed, latencies, errors = asyncio.run(run_load(
+            args.address, args.connections, args.requests, args.pipeline, args.batch_size,
+            args.mix or ["arithmetic"]))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{len(latencies)} requests in {elapsed:.2f}s: {len(latencies) / elapsed:,.0f} req/s")
+    print("Latency (ms): " + ", ".join(
+        f"{name} {percentile(latencies, fraction) * 1000:.2f}"
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99.9", 0.999))) +
+        f", max {latencies[-1] * 1000 if latencies else 0:.2f}")
+    if errors:
+        print(f"{len(errors)} request(s) failed, e.g.: {errors[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
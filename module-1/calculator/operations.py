@@ -0,0 +1,60 @@
+"""Registry of the Calculator operations.
+
+Every operation is described once, with its number of operands, the type
+of operands the interactive menu asks for and its menu label, and maps to
+the Calculator method implementing it. The menu, the batch mode and the
+expression compiler all dispatch through this table::
+
+    operation = OPERATIONS["add"]
+    operation.function(calc, 2, 3)         # Calculator.add(calc, 2, 3)
+    OPERATIONS[MENU["1"]] is operation     # menu choice 1
+"""
+from calculator import Calculator
+
+NUMBER = "number"
+INTEGER = "integer"
+
+
+class Operation:
+    """One Calculator operation and how to call it"""
+
+    __slots__ = ("name", "label", "arity", "operand_type", "function")
+
+    def __init__(self, name, label, arity, operand_type):
+        self.name = name
+        self.label = label
+        self.arity = arity
+        self.operand_type = operand_type
+        self.function = getattr(Calculator, name)
+
+    def __repr__(self):
+        return f"Operation({self.name!r}, arity={self.arity})"
+
+
+# (menu choice or None, operation) in menu order
+_REGISTRY = [
+    ("1", Operation("add", "Addition", 2, NUMBER)),
+    ("2", Operation("subtract", "Subtraction", 2, NUMBER)),
+    ("3", Operation("multiply", "Multiplication", 2, NUMBER)),
+    ("4", Operation("divide", "Division", 2, NUMBER)),
+    ("5", Operation("power", "Exponentiation", 2, NUMBER)),
+    ("6", Operation("modulo", "Modulo", 2, NUMBER)),
+    ("7", Operation("floor_divide", "Floor Division", 2, NUMBER)),
+    (None, Operation("modular_power", "Modular Exponentiation", 3, INTEGER)),
+    ("8", Operation("logical_and", "Logical AND", 2, NUMBER)),
+    ("9", Operation("logical_or", "Logical OR", 2, NUMBER)),
+    ("10", Operation("logical_not", "Logical NOT", 1, NUMBER)),
+    ("11", Operation("logical_xor", "Logical XOR", 2, NUMBER)),
+    ("12", Operation("bitwise_and", "Bitwise AND", 2, INTEGER)),
+    ("13", Operation("bitwise_or", "Bitwise OR", 2, INTEGER)),
+    ("14", Operation("bitwise_xor", "Bitwise XOR", 2, INTEGER)),
+    ("15", Operation("bitwise_not", "Bitwise NOT", 1, INTEGER)),
+    ("16", Operation("left_shift", "Left Shift", 2, INTEGER)),
+    ("17", Operation("right_shift", "Right Shift", 2, INTEGER)),
+]
+
+# Operation name -> Operation
+OPERATIONS = {operation.name: operation for _, operation in _REGISTRY}
+
+# Menu choice -> operation name
+MENU = {choice: operation.name for choice, operation in _REGISTRY if choice is not None}
@@ -0,0 +1,464 @@
+"""Asyncio JSON-RPC server for the Calculator operations.
+
+Requests are JSON-RPC 2.0 objects, one per line, over a Unix domain socket
+or a localhost TCP socket::
+
+    {"jsonrpc": "2.0", "id": 1, "method": "add", "params": [2, 3]}
+    {"jsonrpc": "2.0", "id": 2, "method": "evaluate",
+     "params": {"expression": "(a + b) ** 2 % m", "variables": {"a": 1, "b": 2, "m": 7}}}
+
+Every Calculator operation is a method taking its operands as a list;
+operands may also be strings such as "0x1F" for integers too long for
+JSON. The other methods are ``evaluate`` (a compiled expression),
+``batch`` and ``evaluate_batch`` (element-wise over lists), ``history``
+(the session's calculations, by operation and index range) and
+``methods``. A JSON array of requests is a batch and gets an array of
+responses; requests without an id are notifications and get none.
+
+Clients may pipeline: a connection reads requests as they arrive and
+answers them in order, while up to ``MAX_IN_FLIGHT`` of them are pending.
+Each connection is a session with its own capped history. Calculations are
+recorded in request order, and a ``history`` request waits for the ones
+before it that are still in the pool, so a pipelined ``history`` sees them.
+
+Operands longer than the bit-length budget (``--max-bits``) are refused.
+Calculations run on the event loop under a small budget of
+``INLINE_MAX_BITS``. One that needs more (a big power or shift) is retried
+in a process pool under the full budget. Calls with an operand above the
+small budget, expensive modular powers, long columns and long expressions
+go to the pool directly, so big-integer work does not block the loop.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from bignum import get_max_bits, printable, set_max_bits
+from calculator import Calculator, parse_value
+from expression import FUNCTIONS
+
+MAX_IN_FLIGHT = 256
+MAX_LINE = 16 * 1024 * 1024
+INLINE_MAX_BITS = 1 << 16
+INLINE_MAX_ELEMENTS = 10000
+# Exponent bits times squared modulus bits; about a millisecond of modular power
+INLINE_MAX_COST = 1 << 28
+# Longer expressions are compiled in the pool, as they may hold long literals
+INLINE_MAX_EXPRESSION = 4096
+SESSION_HISTORY = 1000
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+CALCULATION_ERROR = -32000
+
+METHODS = sorted(FUNCTIONS) + ["batch", "evaluate", "evaluate_batch", "history", "methods"]
+
+_encode = json.JSONEncoder(default=str, separators=(",", ":")).encode
+
+
+class CalculatorServer:
+    """Serves Calculator operations to local clients"""
+
+    def __init__(self, address, workers=2, history_size=SESSION_HISTORY, max_bits=None):
+        """Create a server.
+
+        Args:
+            address: Unix socket path, or "host:port" for TCP
+            workers: Number of processes for heavy calculations
+            history_size: Calculations kept in each session's history
+            max_bits: Bit-length budget (default: the process-wide budget)
+
+        Raises:
+            ValueError: For a TCP address on a host other than the loopback
+        """
+        parse_tcp_address(address)
+        self.address = address
+        self.workers = workers
+        self.history_size = history_size
+        self.max_bits = max_bits or get_max_bits()
+        self.inline_bits = min(INLINE_MAX_BITS, self.max_bits)
+        self.pool = None
+        # Session -> task recording its latest calculation that went to the pool
+        self.last_record = {}
+
+    def serve_forever(self):
+        """Answer requests until interrupted"""
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            pass
+        print("\nShutting down server")
+
+    async def _serve(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=set_max_bits,
+                                        initargs=(self.max_bits,))
+        host, port = parse_tcp_address(self.address)
+        if port is not None:
+            server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_LINE)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            server = await asyncio.start_unix_server(self._handle_connection, self.address, limit=MAX_LINE)
+
+        stop = asyncio.get_running_loop().create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        print(f"Serving calculator on {self.address} with {self.workers} workers (Ctrl+C to stop)")
+        try:
+            async with server:
+                await stop
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if port is None and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    async def _handle_connection(self, reader, writer):
+        """Read pipelined requests and queue their responses in order"""
+        session = Calculator(history_size=self.history_size)
+        responses = asyncio.Queue(MAX_IN_FLIGHT)
+        sender = asyncio.create_task(self._send_responses(responses, writer))
+        try:
+            while not sender.done():
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # A line over MAX_LINE, or the client went away
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await responses.put(self._handle_line(session, line))
+        finally:
+            await responses.put(None)
+            await sender
+            self.last_record.pop(session, None)
+            writer.close()
+
+    async def _send_responses(self, responses, writer):
+        """Write the responses in request order, draining when the queue is empty"""
+        try:
+            while True:
+                response = await responses.get()
+                if response is None:
+                    return
+                if not isinstance(response, bytes):
+                    response = await response
+                if response:
+                    writer.write(response)
+                if responses.empty():
+                    await writer.drain()
+        except ConnectionError:
+            pass
+
+    def _handle_line(self, session, line):
+        """Answer one line: bytes when done inline, otherwise an awaitable of bytes"""
+        try:
+            request = json.loads(line)
+        except (ValueError, RecursionError) as e:
+            return _line(_error(None, PARSE_ERROR, f"Parse error: {str(e)}"))
+
+        if isinstance(request, list):
+            if not request:
+                return _line(_error(None, INVALID_REQUEST, "Empty batch"))
+            replies = [self._handle_request(session, item) for item in request]
+            if any(asyncio.isfuture(reply) for reply in replies):
+                return self._gather_batch(replies)
+            return _line([reply for reply in replies if reply is not None] or None)
+
+        reply = self._handle_request(session, request)
+        if asyncio.isfuture(reply):
+            return self._await_reply(reply)
+        return _line(reply)
+
+    async def _await_reply(self, reply):
+        return _line(await reply)
+
+    async def _gather_batch(self, replies):
+        replies = [await reply if asyncio.isfuture(reply) else reply for reply in replies]
+        return _line([reply for reply in replies if reply is not None] or None)
+
+    def _handle_request(self, session, request):
+        """Answer one request with a response, None for a notification, or a future"""
+        try:
+            return self._dispatch(session, request)
+        except Exception as e:
+            # A bug must not end the session and lose the pipelined responses after it
+            set_max_bits(self.max_bits)
+            request_id = request.get("id") if isinstance(request, dict) else None
+            return _error(request_id, INTERNAL_ERROR, f"Internal error: {e}", {"type": type(e).__name__})
+
+    def _dispatch(self, session, request):
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" \
+                or not isinstance(request.get("method"), str):
+            return _error(request.get("id") if isinstance(request, dict) else None,
+                          INVALID_REQUEST, "Invalid request")
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params", [])
+        if method not in METHODS:
+            return _reply(request, _error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}"))
+
+        try:
+            args = _arguments(method, params)
+            bits = _operand_bits(args)
+            if bits > self.max_bits:
+                raise ValueError(f"Operand has {bits} bits, above the limit of {self.max_bits}")
+        except (ValueError, TypeError) as e:
+            return _reply(request, _error(request_id, INVALID_PARAMS, str(e)))
+
+        if method == "methods":
+            return _reply(request, _result(request_id, METHODS))
+        if method == "history":
+            pending = self.last_record.get(session)
+            if pending is not None and not pending.done():
+                return asyncio.ensure_future(self._history_after(pending, session, request, args))
+            return _history(session, request, args)
+
+        # Any work on long operands (a division of two multi-megabit integers takes
+        # seconds) goes to the pool, as do long columns and expressions
+        if bits > self.inline_bits \
+                or method in ("batch", "evaluate_batch") and _elements(args) > INLINE_MAX_ELEMENTS \
+                or method in ("evaluate", "evaluate_batch") and len(args[0]) > INLINE_MAX_EXPRESSION \
+                or method == "modular_power" and _modular_cost(*args) > INLINE_MAX_COST:
+            return self._offload(session, request, method, args)
+        set_max_bits(self.inline_bits)
+        try:
+            result = _call(session, method, args)
+        except OverflowError as e:
+            if self.inline_bits >= self.max_bits:
+                return _reply(request, _calculation_error(request_id, e))
+            return self._offload(session, request, method, args)
+        except Exception as e:
+            return _reply(request, _calculation_error(request_id, e))
+        finally:
+            set_max_bits(self.max_bits)
+        self._record_in_order(session, method, args, result)
+        return _reply(request, _result(request_id, result))
+
+    def _offload(self, session, request, method, args):
+        """Run a heavy calculation in the pool; returns a future of the response"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, _call_in_worker, method, args)
+        previous = self.last_record.get(session)
+        task = asyncio.ensure_future(self._complete(session, request, method, args, future, previous))
+        self.last_record[session] = task
+        return task
+
+    async def _complete(self, session, request, method, args, future, previous):
+        try:
+            result = await future
+        except Exception as e:
+            await _settled(previous)
+            return _reply(request, _calculation_error(request.get("id"), e))
+        await _settled(previous)
+        _record(session, method, args, result)
+        return _reply(request, _result(request.get("id"), result))
+
+    def _record_in_order(self, session, method, args, result):
+        """Record an inline calculation after the earlier ones still in the pool"""
+        pending = self.last_record.get(session)
+        if pending is None or pending.done():
+            _record(session, method, args, result)
+        else:
+            self.last_record[session] = asyncio.ensure_future(
+                self._record_after(pending, session, method, args, result))
+
+    async def _record_after(self, pending, session, method, args, result):
+        await _settled(pending)
+        _record(session, method, args, result)
+
+    async def _history_after(self, pending, session, request, args):
+        await _settled(pending)
+        return _history(session, request, args)
+
+
+def parse_tcp_address(address):
+    """Split "host:port" into (host, port); returns (None, None) for socket paths
+
+    Raises:
+        ValueError: If the host is not localhost or a loopback address; the
+            server has no authentication and must not be reachable from
+            other machines
+    """
+    host, _, port = address.rpartition(":")
+    if port.isdigit() and "/" not in address:
+        host = host or "127.0.0.1"
+        if not _is_loopback(host):
+            raise ValueError(f"Refusing to serve on {host}: only localhost and loopback addresses are allowed")
+        return host, int(port)
+    return None, None
+
+
+def _is_loopback(host):
+    """Return True for "localhost" and loopback IP addresses"""
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _arguments(method, params):
+    """Check the params of a request and return the call arguments
+
+    Raises:
+        ValueError, TypeError: For invalid params
+    """
+    if method in FUNCTIONS:
+        if not isinstance(params, list):
+            raise TypeError(f"{method} takes a list of operands")
+        if len(params) != FUNCTIONS[method]:
+            raise ValueError(f"{method} takes {FUNCTIONS[method]} operand(s), got {len(params)}")
+        return [_operand(value) for value in params]
+    if isinstance(params, list):
+        params = dict(zip(_PARAM_NAMES[method], params))
+    if not isinstance(params, dict):
+        raise TypeError("params must be a list or an object")
+    unknown = set(params) - set(_PARAM_NAMES[method])
+    if unknown:
+        raise ValueError(f"Unknown params for {method}: {', '.join(sorted(unknown))}")
+    if method == "evaluate":
+        return [_string(params, "expression"), _bindings(params.get("variables") or {})]
+    if method == "evaluate_batch":
+        columns = params.get("columns") or {}
+        if not isinstance(columns, dict):
+            raise TypeError("columns must be an object")
+        return [_string(params, "expression"), {name: _column(value) for name, value in columns.items()}]
+    if method == "batch":
+        operation = _string(params, "operation")
+        if operation not in FUNCTIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        return [operation] + [_column(params[name]) if name in params else None for name in ("a", "b", "c")]
+    if method == "history":
+        operation = params.get("operation")
+        if operation is not None and not isinstance(operation, str):
+            raise TypeError("operation must be a string")
+        for name in ("start", "stop"):
+            if params.get(name) is not None and (not isinstance(params[name], int) or isinstance(params[name], bool)):
+                raise TypeError(f"{name} must be an integer")
+        return [operation, params.get("start"), params.get("stop")]
+    return []
+
+
+_PARAM_NAMES = {
+    "evaluate": ("expression", "variables"),
+    "evaluate_batch": ("expression", "columns"),
+    "batch": ("operation", "a", "b", "c"),
+    "history": ("operation", "start", "stop"),
+    "methods": (),
+}
+
+
+def _operand(value):
+    if isinstance(value, str):
+        return parse_value(value)
+    if not isinstance(value, (int, float)):
+        raise TypeError(f"Operands must be numbers, got {type(value).__name__}")
+    return value
+
+
+def _column(value):
+    return [_operand(item) for item in value] if isinstance(value, list) else _operand(value)
+
+
+def _bindings(variables):
+    if not isinstance(variables, dict):
+        raise TypeError("variables must be an object")
+    return {name: _operand(value) for name, value in variables.items()}
+
+
+def _string(params, name):
+    value = params.get(name)
+    if not isinstance(value, str):
+        raise TypeError(f"{name} must be a string")
+    return value
+
+
+def _operand_bits(args):
+    """Return the bit length of the longest integer in the arguments, columns and variables"""
+    bits = 0
+    for arg in args:
+        values = arg.values() if isinstance(arg, dict) else [arg]
+        for value in values:
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, int) and item.bit_length() > bits:
+                    bits = item.bit_length()
+    return bits
+
+
+def _elements(args):
+    """Count the elements of the columns of a batch or evaluate_batch call"""
+    columns = list(args[1].values()) if isinstance(args[1], dict) else args[1:]
+    return sum(len(column) for column in columns if isinstance(column, list))
+
+
+def _modular_cost(a, b, modulus):
+    """Estimate the work of pow(a, b, modulus) for the choice of running it inline"""
+    if not all(isinstance(x, int) for x in (a, b, modulus)):
+        return 0
+    return b.bit_length() * modulus.bit_length() ** 2
+
+
+def _call(calc, method, args):
+    """Run a calculation method with checked arguments"""
+    return getattr(calc, method)(*args)
+
+
+_worker_calculator = None
+
+
+def _call_in_worker(method, args):
+    """Run a calculation in a pool process, under the full budget"""
+    global _worker_calculator
+    if _worker_calculator is None:
+        _worker_calculator = Calculator(history_size=1)
+    return _call(_worker_calculator, method, args)
+
+
+async def _settled(pending):
+    """Wait for a pending record, if any, ignoring its outcome"""
+    if pending is not None:
+        await asyncio.wait([pending])
+
+
+def _history(session, request, args):
+    entries = session.query_history(*args)
+    return _reply(request, _result(request.get("id"), [
+        {"index": entry.index, "operation": entry.operation,
+         "inputs": printable(entry.inputs), "result": printable(entry.result)} for entry in entries]))
+
+
+def _record(session, method, args, result):
+    if method in FUNCTIONS:
+        session.save_operation(method, args, result)
+    elif method == "evaluate":
+        session.save_operation("Expression", args, result)
+
+
+def _result(request_id, result):
+    return {"jsonrpc": "2.0", "id": request_id, "result": printable(result)}
+
+
+def _error(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def _calculation_error(request_id, e):
+    return _error(request_id, CALCULATION_ERROR, str(e), {"type": type(e).__name__})
+
+
+def _reply(request, response):
+    """Drop the response to a notification"""
+    return response if "id" in request else None
+
+
+def _line(response):
+    return (_encode(response) + "\n").encode("utf-8") if response is not None else b""
@@ -0,0 +1,519 @@
+"""Element-wise batch evaluation of the Calculator operations.
+
+``apply_batch("divide", a, b)`` applies one operation to whole columns and
+``evaluate_batch("(a + b) % m", {"a": a, "b": b, "m": 7})`` evaluates a
+compiled expression over them. Operands are sequences (lists, tuples,
+``array.array``), NumPy arrays, or scalars, which are broadcast.
+
+NumPy arrays are computed with NumPy when it is installed, and give NumPy
+arrays back. The checks of the Calculator methods are applied to whole
+columns as masks before anything is computed: a zero anywhere in a
+divisor raises ZeroDivisionError, non-integer operands of the bitwise and
+shift operations raise TypeError. Integer columns whose results could
+overflow int64 (or lose precision in a float division) are computed on
+Python integers instead, so results match the scalar operations (float
+powers can differ from Python's in the last bit).
+
+Other sequences give lists. They are computed with ``map`` over the
+``operator`` functions, which keeps the loop in C, and the integer check
+converts a column to ``array('q')`` in a single call instead of testing
+every element in Python.
+
+Integer powers and left shifts computed on Python integers are checked
+against the default big-number budget of bignum.py.
+
+In expressions, ``and`` and ``or`` keep Python's short-circuiting per
+element: the right operand is only evaluated on the rows where the left
+one does not decide the result, so ``b and a % b`` does not divide
+by the zeros of ``b``.
+"""
+import ast
+import operator
+from array import array
+from functools import lru_cache
+from itertools import compress, repeat
+from bignum import checked_left_shift, checked_modular_power, checked_power
+from expression import Expression, FUNCTIONS, build_function, parse_expression
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INT64_MAX = 2 ** 63 - 1
+FLOAT_EXACT_MAX = 2 ** 53
+
+
+def apply_batch(operation, a, b=None, c=None):
+    """Apply a Calculator operation element-wise
+
+    Args:
+        operation: Name of the operation, such as "divide" or "left_shift"
+        a: First operand column (or scalar)
+        b: Second operand column (or scalar), for binary operations
+        c: Third operand column (or scalar), the modulus of modular_power
+
+    Returns:
+        list, NumPy array, or a scalar when all operands are scalars
+
+    Raises:
+        ValueError: For an unknown operation or columns of different lengths
+    """
+    if operation not in FUNCTIONS:
+        raise ValueError(f"Unknown operation: {operation}")
+    operands = _align([a, b, c][:FUNCTIONS[operation]])
+    return VECTOR_OPERATIONS[operation](*operands)
+
+
+@lru_cache(maxsize=256)
+def compile_batch_expression(text):
+    """Compile an expression whose operators work on whole columns
+
+    Raises:
+        ValueError: If the expression is invalid or uses unsupported syntax
+    """
+    body, variables = parse_expression(text)
+    body = _Vectorize(variables).visit(body)
+    return Expression(text, variables, build_function(body, variables, _NAMESPACE))
+
+
+def evaluate_batch(text, columns):
+    """Evaluate an expression element-wise
+
+    Args:
+        text: Expression such as "(a + b) ** 2 % m"
+        columns: Dictionary of variable name to column (or scalar)
+    """
+    expression = compile_batch_expression(text)
+    try:
+        operands = [columns[name] for name in expression.variables]
+    except KeyError as e:
+        raise ValueError(f"No values given for variable '{e.args[0]}'")
+    return expression.function(*_align(operands))
+
+
+def _align(operands):
+    """Convert operands to lists, arrays or scalars and check their lengths"""
+    uses_numpy = np is not None and any(isinstance(x, np.ndarray) for x in operands)
+    aligned = []
+    for x in operands:
+        if np is not None and isinstance(x, np.generic):
+            x = x.item()
+        if _is_scalar(x):
+            pass
+        elif uses_numpy:
+            x = np.asarray(x)
+        elif not isinstance(x, (list, tuple, array)):
+            x = list(x)
+        aligned.append(x)
+    if not uses_numpy:
+        lengths = {len(x) for x in aligned if not _is_scalar(x)}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+    return aligned
+
+
+def _is_scalar(x):
+    return isinstance(x, (int, float))
+
+
+def _is_numpy(*operands):
+    return np is not None and any(isinstance(x, np.ndarray) for x in operands)
+
+
+def _map(function, a, b):
+    """Apply a binary function element-wise to lists and scalars"""
+    if _is_scalar(a):
+        if _is_scalar(b):
+            return function(a, b)
+        return list(map(function, repeat(a, len(b)), b))
+    if _is_scalar(b):
+        return list(map(function, a, repeat(b)))
+    return list(map(function, a, b))
+
+
+def _map_all(function, *operands):
+    """Apply a function of any number of operands element-wise"""
+    lengths = [len(x) for x in operands if not _is_scalar(x)]
+    if not lengths:
+        return function(*operands)
+    return list(map(function, *(repeat(x, lengths[0]) if _is_scalar(x) else x for x in operands)))
+
+
+def _map_unary(function, a):
+    if _is_scalar(a):
+        return function(a)
+    return list(map(function, a))
+
+
+# ----- Checks shared by both paths
+
+def _has_zero(values):
+    if _is_scalar(values):
+        return values == 0
+    if _is_numpy(values):
+        return bool((values == 0).any())
+    return 0 in values
+
+
+def _require_integers(values, message):
+    """Raise TypeError unless every value is an integer (or a bool)"""
+    if _is_scalar(values):
+        if not isinstance(values, int):
+            raise TypeError(message)
+    elif _is_numpy(values):
+        kind = values.dtype.kind
+        if kind == "O":
+            if not all(isinstance(x, int) for x in values.flat):
+                raise TypeError(message)
+        elif kind not in "biu":
+            raise TypeError(message)
+    else:
+        try:
+            array("q", values)
+        except OverflowError:
+            if not all(isinstance(x, int) for x in values):
+                raise TypeError(message)
+        except TypeError:
+            raise TypeError(message)
+
+
+def _require_non_negative(values):
+    if _is_scalar(values):
+        negative = values < 0
+    elif _is_numpy(values):
+        negative = bool((values < 0).any())
+    else:
+        negative = min(values, default=0) < 0
+    if negative:
+        raise ValueError("negative shift count")
+
+
+# ----- NumPy helpers
+
+def _numeric(x, keep_bool=False):
+    """Return a NumPy operand with Python's view of its values
+
+    Booleans become integers (True + True is 2), unsigned integers become
+    signed ones, and non-numeric arrays are rejected.
+    """
+    if not _is_numpy(x):
+        return x
+    kind = x.dtype.kind
+    if kind == "b":
+        return x if keep_bool else x.astype(np.int64)
+    if kind == "u":
+        return x.astype(np.int64) if x.size == 0 or int(x.max()) <= INT64_MAX else x.astype(object)
+    if kind not in "ifO":
+        raise TypeError("Batch operations require numeric operands")
+    return x
+
+
+def _is_int(x):
+    if _is_scalar(x):
+        return isinstance(x, int)
+    return x.dtype.kind in "iu"
+
+
+def _magnitude(x):
+    """Largest absolute value of an integer operand, as a Python int"""
+    if _is_scalar(x):
+        return abs(int(x))
+    if x.size == 0:
+        return 0
+    return max(abs(int(x.max())), abs(int(x.min())))
+
+
+def _minimum(x):
+    if _is_scalar(x):
+        return x
+    return x.min() if x.size else 0
+
+
+def _exact(a, b, fits):
+    """Move int64 operands to Python ints unless fits(max |a|, max |b|)"""
+    if _is_int(a) and _is_int(b) and not fits(_magnitude(a), _magnitude(b)):
+        return _objects(a), _objects(b)
+    return a, b
+
+
+def _objects(x):
+    return x.astype(object) if _is_numpy(x) else x
+
+
+def _is_objects(x):
+    return _is_numpy(x) and x.dtype.kind == "O"
+
+
+def _python(function, *operands):
+    """Apply a Python function element-wise to NumPy operands, giving an object array"""
+    return np.frompyfunc(function, len(operands), 1)(*operands)
+
+
+# ----- Operations
+
+def _arithmetic(numpy_function, python_function, fits):
+    """Build an add/subtract/multiply style operation"""
+    def apply(a, b):
+        if _is_numpy(a, b):
+            a, b = _exact(_numeric(a), _numeric(b), fits)
+            return numpy_function(a, b)
+        return _map(python_function, a, b)
+    return apply
+
+
+def _divide(a, b):
+    if _has_zero(b):
+        raise ZeroDivisionError("Cannot divide by zero")
+    if _is_numpy(a, b):
+        a, b = _exact(_numeric(a), _numeric(b), lambda x, y: x <= FLOAT_EXACT_MAX and y <= FLOAT_EXACT_MAX)
+        return np.true_divide(a, b)
+    return _map(operator.truediv, a, b)
+
+
+def _checked_division(numpy_function, python_function, message):
+    """Build floor_divide and modulo, which reject zero divisors"""
+    def apply(a, b):
+        if _has_zero(b):
+            raise ZeroDivisionError(message)
+        if _is_numpy(a, b):
+            # Only INT64_MIN // -1 can overflow
+            a, b = _exact(_numeric(a), _numeric(b), lambda x, y: x <= INT64_MAX)
+            return numpy_function(a, b)
+        return _map(python_function, a, b)
+    return apply
+
+
+def _power(a, b):
+    if not _is_numpy(a, b):
+        return _map(checked_power, a, b)
+    a, b = _numeric(a), _numeric(b)
+    if _is_int(a) and _is_int(b):
+        # Negative integer exponents give floats in Python
+        if _minimum(b) < 0:
+            return _python(checked_power, a, b)
+        a, b = _exact(a, b, lambda x, y: x.bit_length() * y < 63)
+        if _is_objects(a):
+            return _python(checked_power, a, b)
+        return np.power(a, b)
+    if _is_objects(a) or _is_objects(b):
+        return _python(checked_power, a, b)
+    if bool(np.any((np.asarray(a) == 0) & (np.asarray(b) < 0))):
+        raise ZeroDivisionError("0.0 cannot be raised to a negative power")
+    if bool(np.any((np.asarray(a) < 0) & (np.asarray(b) != np.floor(b)))):
+        # Python returns complex numbers here
+        return np.power(np.asarray(a).astype(object), np.asarray(b).astype(object))
+    with np.errstate(all="ignore"):
+        result = np.power(a, b)
+    if bool(np.any(np.isinf(result) & np.isfinite(a) & np.isfinite(b))):
+        raise OverflowError("Numerical result out of range")
+    return result
+
+
+def _logical_and(a, b):
+    if _is_numpy(a, b):
+        return np.where(_numeric(a, keep_bool=True) != 0, b, a)
+    return _map(lambda x, y: x and y, a, b)
+
+
+def _logical_or(a, b):
+    if _is_numpy(a, b):
+        return np.where(_numeric(a, keep_bool=True) != 0, a, b)
+    return _map(lambda x, y: x or y, a, b)
+
+
+def _logical_not(a):
+    if _is_numpy(a):
+        return _numeric(a, keep_bool=True) == 0
+    return _map_unary(operator.not_, a)
+
+
+def _logical_xor(a, b):
+    if _is_numpy(a, b):
+        return (_numeric(a, keep_bool=True) != 0) != (_numeric(b, keep_bool=True) != 0)
+    if _is_scalar(a) and _is_scalar(b):
+        return bool(a) != bool(b)
+    a = _map_unary(bool, a)
+    b = _map_unary(bool, b)
+    return _map(operator.ne, a, b)
+
+
+def _bitwise(numpy_function, python_function):
+    """Build bitwise_and/or/xor, which require integer operands"""
+    def apply(a, b):
+        _require_integers(a, "Bitwise operations require integer operands")
+        _require_integers(b, "Bitwise operations require integer operands")
+        if _is_numpy(a, b):
+            return numpy_function(_numeric(a, keep_bool=True), _numeric(b, keep_bool=True))
+        return _map(python_function, a, b)
+    return apply
+
+
+def _bitwise_not(a):
+    _require_integers(a, "Bitwise operations require integer operands")
+    if _is_numpy(a):
+        # ~ on a NumPy bool is a logical not, on a Python bool it is -2 or -1
+        return np.invert(_numeric(a))
+    return _map_unary(operator.invert, a)
+
+
+def _left_shift(a, b):
+    _require_integers(a, "Shift operations require integer operands")
+    _require_integers(b, "Shift operations require integer operands")
+    _require_non_negative(b)
+    if _is_numpy(a, b):
+        a, b = _exact(_numeric(a), _numeric(b), lambda x, y: x.bit_length() + y < 63)
+        if _is_objects(a) or _is_objects(b):
+            return _python(checked_left_shift, a, b)
+        return np.left_shift(a, b)
+    return _map(checked_left_shift, a, b)
+
+
+def _modular_power(a, b, modulus):
+    if _is_numpy(a, b, modulus):
+        result = _python(checked_modular_power, _numeric(a), _numeric(b), _numeric(modulus))
+        # Results are smaller than the modulus
+        if _is_int(_numeric(modulus)) and _magnitude(_numeric(modulus)) <= INT64_MAX:
+            return result.astype(np.int64)
+        return result
+    return _map_all(checked_modular_power, a, b, modulus)
+
+
+def _right_shift(a, b):
+    _require_integers(a, "Shift operations require integer operands")
+    _require_integers(b, "Shift operations require integer operands")
+    _require_non_negative(b)
+    if _is_numpy(a, b):
+        a, b = _exact(_numeric(a), _numeric(b), lambda x, y: x <= INT64_MAX and y < 63)
+        return np.right_shift(a, b)
+    return _map(operator.rshift, a, b)
+
+
+def _negative(a):
+    if _is_numpy(a):
+        a = _numeric(a)
+        if _is_int(a) and _magnitude(a) > INT64_MAX:
+            a = _objects(a)
+        return np.negative(a)
+    return _map_unary(operator.neg, a)
+
+
+def _positive(a):
+    if _is_numpy(a):
+        return _numeric(a)
+    return _map_unary(operator.pos, a)
+
+
+VECTOR_OPERATIONS = {
+    "add": _arithmetic(np.add if np else None, operator.add, lambda x, y: x + y <= INT64_MAX),
+    "subtract": _arithmetic(np.subtract if np else None, operator.sub, lambda x, y: x + y <= INT64_MAX),
+    "multiply": _arithmetic(np.multiply if np else None, operator.mul, lambda x, y: x * y <= INT64_MAX),
+    "divide": _divide,
+    "power": _power,
+    "modulo": _checked_division(np.remainder if np else None, operator.mod, "Cannot find modulo with zero"),
+    "modular_power": _modular_power,
+    "floor_divide": _checked_division(np.floor_divide if np else None, operator.floordiv, "Cannot divide by zero"),
+    "logical_and": _logical_and,
+    "logical_or": _logical_or,
+    "logical_not": _logical_not,
+    "logical_xor": _logical_xor,
+    "bitwise_and": _bitwise(np.bitwise_and if np else None, operator.and_),
+    "bitwise_or": _bitwise(np.bitwise_or if np else None, operator.or_),
+    "bitwise_xor": _bitwise(np.bitwise_xor if np else None, operator.xor),
+    "bitwise_not": _bitwise_not,
+    "left_shift": _left_shift,
+    "right_shift": _right_shift,
+}
+
+
+# ----- Expressions
+
+_BINARY_OPERATORS = {
+    ast.Add: "add", ast.Sub: "subtract", ast.Mult: "multiply", ast.Div: "divide",
+    ast.Pow: "power", ast.Mod: "modulo", ast.FloorDiv: "floor_divide",
+    ast.BitAnd: "bitwise_and", ast.BitOr: "bitwise_or", ast.BitXor: "bitwise_xor",
+    ast.LShift: "left_shift", ast.RShift: "right_shift",
+}
+_UNARY_OPERATORS = {
+    ast.Not: "logical_not", ast.Invert: "bitwise_not", ast.USub: "__negative", ast.UAdd: "__positive",
+}
+
+
+
+def _short_circuit(left, right, columns, when):
+    """Evaluate ``left and right`` (when True) or ``left or right`` (when False) element-wise
+
+    right is a function of the columns, called only with the rows where the
+    truth of left is when, and left is kept on the other rows.
+    """
+    operands = [x for x in (left, *columns) if not _is_scalar(x)]
+    if not operands:
+        return right(*columns) if bool(left) == when else left
+
+    if _is_numpy(*operands):
+        shape = np.broadcast_shapes(*(np.shape(x) for x in operands))
+        left = np.broadcast_to(left, shape)
+        mask = (_numeric(left, keep_bool=True) != 0) == when
+        selected = np.count_nonzero(mask)
+        if selected == mask.size:
+            return np.where(mask, right(*columns), left)
+        result = np.array(left)
+        if selected:
+            # take/put with flat indexes are faster than boolean indexing
+            indexes = np.flatnonzero(mask)
+            values = right(*(x if _is_scalar(x) else np.broadcast_to(x, shape).take(indexes) for x in columns))
+            result = result.astype(np.result_type(result, values), copy=False)
+            result.put(indexes, values)
+        return result
+
+    size = len(operands[0])
+    if _is_scalar(left):
+        left = [left] * size
+    selected = list(compress(range(size), map(operator.truth if when else operator.not_, left)))
+    if len(selected) == size:
+        values = right(*columns)
+        return [values] * size if _is_scalar(values) else list(values)
+    result = list(left)
+    if selected:
+        values = right(*(x if _is_scalar(x) else list(map(x.__getitem__, selected)) for x in columns))
+        for i, value in zip(selected, repeat(values) if _is_scalar(values) else values):
+            result[i] = value
+    return result
+
+
+_NAMESPACE = dict(VECTOR_OPERATIONS, __negative=_negative, __positive=_positive, __short_circuit=_short_circuit,
+                  __builtins__={})
+
+
+class _Vectorize(ast.NodeTransformer):
+    """Replace the operators of an expression by calls of the column operations"""
+
+    def __init__(self, variables):
+        self.variables = variables
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        return _call(_BINARY_OPERATORS[type(node.op)], [node.left, node.right])
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        return _call(_UNARY_OPERATORS[type(node.op)], [node.operand])
+
+    def visit_BoolOp(self, node):
+        # a and b -> __short_circuit(a, lambda <variables of b>: b, (<variables of b>), True)
+        self.generic_visit(node)
+        when = ast.Constant(value=isinstance(node.op, ast.And))
+        result = node.values[0]
+        for value in node.values[1:]:
+            names = sorted({name.id for name in ast.walk(value)
+                            if isinstance(name, ast.Name) and name.id in self.variables})
+            arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in names],
+                                      kwonlyargs=[], kw_defaults=[], defaults=[])
+            columns = ast.Tuple(elts=[ast.Name(id=name, ctx=ast.Load()) for name in names], ctx=ast.Load())
+            right = ast.Lambda(args=arguments, body=value)
+            result = _call("__short_circuit", [result, right, columns, when])
+        return result
+
+
+def _call(name, args):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Compare re-querying a CSV file with querying its columnar conversion.
+
+Generates a CSV file, converts it once to the columnar format and times
+the same comparisons on both: parsing and filtering the CSV text, and a
+``where`` pushed down to the columnar reader.
+
+    python benchmarks/bench_columnar.py --rows 200000 --repeat 3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.csv_parser import CSVParser
+from parsers.columnar_parser import ColumnarParser
+from transformers.columnar_transformer import ColumnarTransformer
+from utils.predicates import parse_comparison
+
+QUERIES = [
+    ("score>99", None),
+    ("city==city7", None),
+    ("id<100", None),
+    ("active==true", None),
+    ("score>99", ["id", "score"]),
+]
+
+
+def write_csv(path, rows, rng):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write("id,name,city,score,active\n")
+        for i in range(rows):
+            file.write(f"{i},user{rng.randrange(10000)},city{rng.randrange(100)},"
+                       f"{rng.random() * 100:.2f},{rng.choice(['true', 'false'])}\n")
+
+
+def query_csv(path, query, columns):
+    comparison = parse_comparison(query)
+    records = [record for record in CSVParser().parse(path) if comparison.matches(record)]
+    if columns:
+        records = [{name: record[name] for name in columns} for record in records]
+    return records
+
+
+def query_columnar(path, query, columns):
+    return ColumnarParser(columns=columns, where=query).parse(path)
+
+
+def best_time(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000, help="Records in the generated file")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--codec", choices=["none", "zlib"], default="none", help="Columnar compression")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the generated data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, "input.csv")
+        col_path = os.path.join(temp_dir, "input.col")
+        write_csv(csv_path, args.rows, random.Random(args.seed))
+
+        start = time.perf_counter()
+        with open(col_path, 'wb') as output:
+            output.write(ColumnarTransformer(codec=args.codec).transform(CSVParser().parse(csv_path)))
+        print(f"Converted {args.rows} rows in {time.perf_counter() - start:.2f}s: "
+              f"{os.path.getsize(csv_path) / 1e6:.1f} MB CSV, {os.path.getsize(col_path) / 1e6:.1f} MB columnar\n")
+
+        print(f"{'query':<28} {'rows':>7} {'csv (s)':>9} {'columnar (s)':>13} {'speedup':>8}")
+        for query, columns in QUERIES:
+            label = query + (f" [{','.join(columns)}]" if columns else "")
+            matched = len(query_columnar(col_path, query, columns))
+            text = best_time(query_csv, args.repeat, csv_path, query, columns)
+            columnar = best_time(query_columnar, args.repeat, col_path, query, columns)
+            print(f"{label:<28} {matched:>7} {text:>9.3f} {columnar:>13.3f} {text / columnar:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Compare the direct converters with the generic parse/transform path.
+
+Generates synthetic input files, converts each of them with both paths and
+prints the best wall-clock time of several runs.
+
+    python benchmarks/bench_converters.py --rows 200000 --repeat 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.parser_factory import ParserFactory
+from transformers.transformer_factory import TransformerFactory
+
+
+def write_csv(path, rows, rng):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write("id,name,city,score,active\n")
+        for i in range(rows):
+            file.write(f"{i},user{rng.randrange(10000)},city{rng.randrange(100)},"
+                       f"{rng.random() * 100:.2f},{rng.choice(['true', 'false'])}\n")
+
+
+def write_log(path, rows, rng):
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(rows):
+            file.write(f"10.0.{rng.randrange(256)}.{rng.randrange(256)} - - "
+                       f"[10/Oct/2023:13:{i // 60 % 60:02d}:{i % 60:02d} +0000] "
+                       f"\"GET /page/{rng.randrange(1000)} HTTP/1.1\" "
+                       f"{rng.choice([200, 200, 200, 404, 500])} {rng.randrange(100000)}\n")
+
+
+def write_jsonl(path, rows, rng):
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(rows):
+            file.write(json.dumps({"id": i, "name": f"user{rng.randrange(10000)}",
+                                   "score": round(rng.random() * 100, 2),
+                                   "tags": rng.choice(["a", "b", "c"])}) + "\n")
+
+
+def write_xml(path, rows, rng):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("<orders>\n")
+        for i in range(rows):
+            file.write(f'  <order id="{i}"><customer>user{rng.randrange(10000)}</customer>'
+                       f'<total>{rng.random() * 100:.2f}</total></order>\n')
+        file.write("</orders>\n")
+
+
+PAIRS = [
+    ("csv", "jsonl", write_csv),
+    ("csv", "xml", write_csv),
+    ("log", "csv", write_log),
+    ("jsonl", "csv", write_jsonl),
+    ("xml", "jsonl", write_xml),
+]
+
+
+def run_generic(source, target, input_path, output_path):
+    data = ParserFactory().get_parser(source).parse(input_path)
+    transformer = TransformerFactory().get_transformer(source, target)
+    with open(output_path, 'w', encoding='utf-8', newline='') as output:
+        output.write(transformer.transform(data))
+
+
+def run_direct(source, target, input_path, output_path):
+    converter = TransformerFactory().get_transformer(source, target)
+    with open(output_path, 'w', encoding='utf-8', newline='') as output:
+        converter.convert(input_path, output)
+
+
+def best_time(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Records per input file")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the generated data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'pair':<14} {'generic (s)':>12} {'direct (s)':>12} {'speedup':>8}")
+        for source, target, generate in PAIRS:
+            input_path = os.path.join(temp_dir, f"input.{source}")
+            output_path = os.path.join(temp_dir, f"output.{target}")
+            generate(input_path, args.rows, random.Random(args.seed))
+
+            generic = best_time(run_generic, args.repeat, source, target, input_path, output_path)
+            direct = best_time(run_direct, args.repeat, source, target, input_path, output_path)
+            print(f"{source + '->' + target:<14} {generic:>12.3f} {direct:>12.3f} {generic / direct:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
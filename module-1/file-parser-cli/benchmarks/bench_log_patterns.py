@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Measure the per-line cost of each compiled log pattern.
+
+For every format of the pattern library, times a full parse of the
+format's example line (a hit) and of a line no format matches (a miss),
+then the cost of detecting the format from a 10 line sample.
+
+    python benchmarks/bench_log_patterns.py --lines 100000 --repeat 3
+    python benchmarks/bench_log_patterns.py --pattern-file patterns.json
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.log_parser import LogParser
+from parsers.log_patterns import PatternLibrary
+
+MISS_LINE = "-- this line does not look like any known log format --"
+
+
+def best_time(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def match_lines(log_parser, log_format, lines):
+    match_line = log_parser._match_line
+    for line in lines:
+        match_line(log_format, line)
+
+
+def detect_formats(library, sample, rounds):
+    for _ in range(rounds):
+        library.detect(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000, help="Lines parsed per measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--pattern-file", help="JSON pattern file extending the built-in library")
+    parser.add_argument("--typed", action="store_true", help="Include the typed field conversion")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    library = PatternLibrary.load(args.pattern_file)
+    print(f"Loaded and compiled {len(library.formats)} formats in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    log_parser = LogParser(typed=args.typed, pattern_file=args.pattern_file)
+    print(f"{'pattern':<14} {'fields':>6} {'hit (us/line)':>14} {'miss (us/line)':>15} {'detect (us)':>12}")
+    for name, log_format in library.formats.items():
+        if not log_format.example:
+            print(f"{name:<14} no example line to time")
+            continue
+        if not log_format.regex.search(log_format.example):
+            print(f"{name:<14} example line does not match the pattern")
+            continue
+
+        hits = [log_format.example] * args.lines
+        misses = [MISS_LINE] * args.lines
+        hit = best_time(match_lines, args.repeat, log_parser, log_format, hits)
+        miss = best_time(match_lines, args.repeat, log_parser, log_format, misses)
+
+        rounds = max(1, args.lines // 100)
+        detect = best_time(detect_formats, args.repeat, library, [log_format.example] * 10, rounds)
+        chosen = library.detect([log_format.example] * 10)
+        note = "" if chosen is log_format else f"  (detected as {chosen.name if chosen else 'raw'})"
+        print(f"{name:<14} {len(log_format.fields):>6} {hit / args.lines * 1e6:>14.2f} "
+              f"{miss / args.lines * 1e6:>15.2f} {detect / rounds * 1e6:>12.1f}{note}")
+
+
+if __name__ == "__main__":
+    main()
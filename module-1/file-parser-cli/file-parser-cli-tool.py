@@ -5,7 +5,16 @@ import sys
 import tempfile
 from parsers.parser_factory import ParserFactory
 from transformers.transformer_factory import TransformerFactory
+from transformers.direct_converters import DirectConverter
 from utils.output_handler import OutputHandler
+from utils.joiner import HashJoiner
+from utils.sampling import take_head, reservoir_sample
+from utils.fan_out import Sink, FanOutWriter
+from utils.parse_cache import parse_cache
+from utils.server import ParserServer
+from utils.batch import AsyncBatchProcessor
+from utils.manifest import BatchManifest
+from utils.memory import memory_budget, parse_size
 
 VERSION = "1.0.0"
 
@@ -32,6 +41,59 @@ Examples:
     # Filter data and transform it
     python file-parser-cli-tool.py data.csv -q "column=value" -t json
     
+    # Parse once and write CSV, JSON and filtered XML outputs concurrently
+    python file-parser-cli-tool.py data.csv -t csv:out.csv -t json:out.json -t "xml:errors.xml:error"
+    
+    # Enrich log records with a CSV lookup table
+    python file-parser-cli-tool.py access.log --join hosts.csv --on ip --how left
+    
+    # Preview the first 20 matching records of a large file
+    python file-parser-cli-tool.py big.log -q "POST" --head 20
+    
+    # Draw a reproducible random sample of 1000 records
+    python file-parser-cli-tool.py big.csv --sample 1000 --seed 42
+    
+    # Fast search of a large text or log file with two lines of context
+    python file-parser-cli-tool.py server.log --grep "ERROR" --grep "FATAL" -C 2
+    
+    # Count the lines not matching a pattern using 4 processes
+    python file-parser-cli-tool.py huge.txt --grep "^#" --invert --count --jobs 4
+    
+    # Convert every file of a directory tree, reading 64 files at a time
+    python file-parser-cli-tool.py drop/ -t json -o converted/ --io-workers 64 --cpu-workers 4
+    
+    # Nightly run: only convert new or changed files, remove outputs of deleted ones
+    python file-parser-cli-tool.py drop/ -t json -o converted/ --incremental
+    
+    # Cap buffering stages at 512 MB, spilling to temporary files beyond that
+    python file-parser-cli-tool.py huge.log -t csv -o out.csv --max-memory 512M
+    
+    # Typed log fields: numeric comparisons and time windows
+    python file-parser-cli-tool.py access.log --typed -q "status>=500"
+    python file-parser-cli-tool.py access.log --typed -q "datetime>=2023-10-10T13:00:00"
+    
+    # Parse logs with a named library pattern, or with your own patterns
+    python file-parser-cli-tool.py /var/log/syslog --pattern syslog
+    python file-parser-cli-tool.py app.log --pattern-file patterns.json --pattern myapp
+    
+    # Read a semicolon separated Latin-1 CSV export
+    python file-parser-cli-tool.py export.csv --delimiter ";" --encoding latin-1 -t json
+    
+    # Copy the matching lines of a large log byte for byte, without re-encoding them
+    python file-parser-cli-tool.py access.log -q "status>=500" --passthrough -o errors.log
+    
+    # Extract a few fields from a huge XML document in one streaming pass
+    python file-parser-cli-tool.py orders.xml --select "order/line[@sku]" --project @sku,qty,price -t csv
+    python file-parser-cli-tool.py orders.xml --select "//line[@sku]" --project @sku,qty -q "qty>=10"
+    
+    # Convert once to the columnar format, then query only the needed columns
+    python file-parser-cli-tool.py big.csv -t col -o big.col
+    python file-parser-cli-tool.py big.col --columns id,score --where "score>90" -t csv
+    
+    # Keep a warm server running and send it requests with the thin client
+    python file-parser-cli-tool.py --serve /tmp/file-parser.sock --workers 4
+    python file-parser-client.py --socket /tmp/file-parser.sock data.csv -t json
+    
     # Read from stdin (pipe)
     cat data.csv | python file-parser-cli-tool.py - -f csv
     
@@ -81,11 +143,11 @@ def interactive_mode():
             continue
             
         file_format = os.path.splitext(file_path)[1][1:].lower()
-        if file_format not in ["csv", "json", "xml", "txt", "log"]:
+        if file_format not in ["csv", "json", "jsonl", "xml", "txt", "log", "col"]:
             print("Could not determine file format from extension.")
             file_format = get_user_input(
-                "Enter file format (csv, json, xml, txt, log): ",
-                options=["csv", "json", "xml", "txt", "log"]
+                "Enter file format (csv, json, jsonl, xml, txt, log, col): ",
+                options=["csv", "json", "jsonl", "xml", "txt", "log", "col"]
             )
         else:
             print(f"Detected file format: {file_format}")
@@ -114,7 +176,7 @@ def interactive_mode():
                     
             elif choice == "2":
                 print("\nAvailable transformation formats:")
-                transform_formats = ["csv", "json", "xml", "txt"]
+                transform_formats = ["csv", "json", "jsonl", "xml", "txt", "col"]
                 for i, fmt in enumerate(transform_formats, 1):
                     print(f"{i}. {fmt}")
                 
@@ -181,26 +243,174 @@ def interactive_mode():
             print(f"Error: {str(e)}")
             input("\nPress Enter to return to the main menu...")
 
-def main():
+def get_parser_options(args, file_format):
+    """Collect the parser constructor options given on the command line."""
+    options = {}
+    if file_format == "log" and args.typed:
+        options["typed"] = True
+        options["time_format"] = args.time_format
+    if file_format == "log" and args.pattern:
+        options["pattern"] = args.pattern
+    if file_format == "log" and args.pattern_file:
+        options["pattern_file"] = args.pattern_file
+    if file_format in ["csv", "json", "jsonl", "txt", "log"] and args.encoding:
+        options["encoding"] = args.encoding
+    if file_format == "csv":
+        for option in ("delimiter", "quotechar"):
+            if getattr(args, option):
+                options[option] = getattr(args, option)
+        if options.get("delimiter") == "\\t":
+            options["delimiter"] = "\t"
+    if file_format == "xml":
+        if args.select:
+            options["select"] = args.select
+        if args.project:
+            options["project"] = [name.strip() for name in args.project.split(",") if name.strip()]
+    if file_format == "col":
+        if args.columns:
+            options["columns"] = [name.strip() for name in args.columns.split(",") if name.strip()]
+        if args.where:
+            options["where"] = args.where
+    return options
+
+def get_transformer_options(args, target_format):
+    """Collect the transformer constructor options given on the command line."""
+    if target_format == "col" and args.compression:
+        return {"codec": args.compression}
+    return {}
+
+def join_records(parser_factory, file_parser, input_file, args):
+    """Join the input file with the file given by --join and stream the result."""
+    if not args.on:
+        raise ValueError("--join requires a join key given with --on")
+    if not os.path.isfile(args.join):
+        raise ValueError(f"File {args.join} not found")
+    
+    join_format = os.path.splitext(args.join)[1][1:].lower()
+    if join_format not in ["csv", "json", "jsonl", "xml", "txt", "log", "col"]:
+        raise ValueError(f"Cannot determine file format of {args.join} from extension")
+    join_parser = parser_factory.get_parser(join_format, **get_parser_options(args, join_format))
+    
+    joiner = HashJoiner()
+    return joiner.join(file_parser, input_file, join_parser, args.join, args.on, args.how)
+
+def convert_file(converter, input_file, output_path):
+    """Stream a file through a direct converter to the output file or stdout."""
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8', newline='') as output:
+            converter.convert(input_file, output)
+        print(f"Successfully wrote output to {output_path}")
+    else:
+        converter.convert(input_file, sys.stdout)
+
+def passthrough_file(file_parser, input_file, file_format, args):
+    """Copy the parts of the input matching --query to the output unchanged."""
+    if file_format not in ["csv", "log"]:
+        raise ValueError("--passthrough is only supported for csv and log files")
+    if args.transform or args.validate or args.join or args.grep or args.head is not None or args.sample is not None:
+        raise ValueError("--passthrough cannot be combined with -t, -v, --join, --grep, --head or --sample")
+    OutputHandler().write_raw(file_parser.passthrough(input_file, args.query), args.output)
+
+def process_directory(args):
+    """Convert all supported files of a directory into the --output directory."""
+    if not args.transform or not args.output:
+        print("Error: Directory input requires a target format (-t) and an output directory (-o)", file=sys.stderr)
+        sys.exit(1)
+    
+    processor = AsyncBatchProcessor(io_workers=args.io_workers, cpu_workers=args.cpu_workers)
+    try:
+        jobs = processor.plan(args.file, args.output, args.transform, args.format)
+        manifest = BatchManifest.load(args.output, args.file) if args.incremental else None
+        result = processor.run(jobs, args.transform, query=args.query, validate=args.validate,
+                               manifest=manifest)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    for error in result.errors:
+        print(f"- {error}", file=sys.stderr)
+    print(result.summary())
+    if result.failed:
+        sys.exit(1)
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Parse, transform, validate and query structured files",
         epilog="Use '-' as the filename to read from stdin."
     )
-    parser.add_argument("file", nargs='?', help="Path to the file to parse (use '-' for stdin)")
-    parser.add_argument("-f", "--format", help="Explicitly specify file format (csv, json, xml, txt, log)")
-    parser.add_argument("-t", "--transform", help="Transform to format (csv, json, xml, txt)")
+    parser.add_argument("file", nargs='?', help="Path to the file or directory to parse (use '-' for stdin)")
+    parser.add_argument("-f", "--format", help="Explicitly specify file format (csv, json, jsonl, xml, txt, log, col)")
+    parser.add_argument("-t", "--transform", action="append",
+                        help="Transform to format (csv, json, jsonl, xml, txt, col). Repeat as format:path[:query] "
+                             "to write several outputs from a single parse")
     parser.add_argument("-o", "--output", help="Output file path. If not specified, print to console")
     parser.add_argument("-v", "--validate", action="store_true", help="Validate file content")
     parser.add_argument("-q", "--query", help="Filter data with a query expression")
+    parser.add_argument("--join", metavar="FILE", help="Join the records with another file")
+    parser.add_argument("--on", help="Join key, or left_key=right_key when the column names differ")
+    parser.add_argument("--how", choices=HashJoiner.JOIN_TYPES, default="inner", help="Join type (default: inner)")
+    parser.add_argument("--head", type=int, metavar="N", help="Stop after the first N records that pass the filter")
+    parser.add_argument("--sample", type=int, metavar="N", help="Keep a uniform random sample of N records")
+    parser.add_argument("--seed", type=int, help="Random seed for --sample")
+    parser.add_argument("--grep", action="append", metavar="PATTERN", help="Fast regex search of txt/log files (repeatable)")
+    parser.add_argument("--count", action="store_true", help="With --grep, print only the number of selected lines")
+    parser.add_argument("--invert", action="store_true", help="With --grep, select non-matching lines")
+    parser.add_argument("-A", "--after-context", type=int, default=0, metavar="N", help="With --grep, lines of context after each match")
+    parser.add_argument("-B", "--before-context", type=int, default=0, metavar="N", help="With --grep, lines of context before each match")
+    parser.add_argument("-C", "--context", type=int, metavar="N", help="With --grep, lines of context around each match")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help="With --grep, number of processes for large files")
+    parser.add_argument("--serve", metavar="ADDRESS", help="Run as a server on a Unix socket path or localhost host:port")
+    parser.add_argument("--workers", type=int, default=4, metavar="N", help="With --serve, number of worker processes")
+    parser.add_argument("--io-workers", type=int, default=32, metavar="N", help="For directory input, concurrent file reads and writes")
+    parser.add_argument("--cpu-workers", type=int, metavar="N", help="For directory input, parser processes (default: CPU count)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="For directory input, only convert new or changed files, tracked in a manifest in the output directory")
+    parser.add_argument("--typed", action="store_true", help="Log files: return status/size as integers and datetime as a timestamp")
+    parser.add_argument("--time-format", choices=["epoch", "datetime"], default="epoch", help="With --typed, how datetime is returned")
+    parser.add_argument("--pattern", metavar="NAME", help="Log files: use this library pattern (e.g. common, nginx, syslog, app, json_app) instead of detecting one")
+    parser.add_argument("--pattern-file", metavar="FILE", help="Log files: JSON file of grok-style %%{NAME:field} patterns extending the built-in library")
+    parser.add_argument("--delimiter", help="CSV files: field delimiter, '\\t' for tab (default: sniffed from the file)")
+    parser.add_argument("--quotechar", help="CSV files: quote character (default: '\"')")
+    parser.add_argument("--encoding", help="Text encoding of csv, json, jsonl, txt and log files (default: utf-8); "
+                                           "a byte order mark takes precedence")
+    parser.add_argument("--passthrough", action="store_true",
+                        help="Log and CSV files: write the lines matching -q exactly as they are in the input")
+    parser.add_argument("--select", metavar="PATH", help="XML files: stream only the elements matching a path such as 'order/line[@sku]'")
+    parser.add_argument("--project", metavar="A,@B,...", help="With --select, keep only these children and @attributes of each match")
+    parser.add_argument("--columns", metavar="A,B,...", help="Columnar files: read only these columns")
+    parser.add_argument("--where", metavar="COMPARISON", help="Columnar files: keep rows matching field<op>value, skipping blocks by their statistics")
+    parser.add_argument("--compression", choices=["none", "zlib"], help="With -t col, compression of the column data (default: none)")
+    parser.add_argument("--max-memory", metavar="SIZE", help="Memory budget such as 512M or 2G; buffering stages spill to disk beyond it")
     parser.add_argument("--version", action="version", version=f"File Parser CLI Tool v{VERSION}")
     parser.add_argument("--examples", action="store_true", help="Show usage examples")
     parser.add_argument("-i", "--interactive", action="store_true", help="Start in interactive mode")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    
+    transforms = args.transform or []
+    plain_transforms = [spec for spec in transforms if ":" not in spec]
+    if len(plain_transforms) > 1:
+        print("Error: Only one -t without an output path may be given", file=sys.stderr)
+        sys.exit(1)
+    args.transform = plain_transforms[0] if plain_transforms else None
+    try:
+        sinks = [Sink.from_spec(spec) for spec in transforms if ":" in spec]
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
     
     if args.interactive:
         interactive_mode()
         return
+    
+    if args.serve:
+        try:
+            server = ParserServer(main, args.serve, workers=args.workers)
+        except ValueError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        server.serve_forever()
+        return
         
     if args.examples:
         print_banner()
@@ -212,6 +422,20 @@ def main():
         print("Run with --examples to see usage examples.")
         sys.exit(1)
     
+    # The budget is process-wide; server workers run many requests in turn
+    try:
+        memory_budget.reset(parse_size(args.max_memory) if args.max_memory else None)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    if os.path.isdir(args.file):
+        process_directory(args)
+        return
+    if args.incremental:
+        print("Error: --incremental requires a directory input", file=sys.stderr)
+        sys.exit(1)
+    
     temp_file = None
     try:
         if args.file == '-':
@@ -233,15 +457,66 @@ def main():
             file_format = args.format
             if not file_format:
                 file_format = os.path.splitext(args.file)[1][1:].lower()
-                if file_format not in ["csv", "json", "xml", "txt", "log"]:
+                if file_format not in ["csv", "json", "jsonl", "xml", "txt", "log", "col"]:
                     print(f"Error: Cannot determine file format from extension. Please specify with --format", file=sys.stderr)
                     sys.exit(1)
         
         try:
             parser_factory = ParserFactory()
-            file_parser = parser_factory.get_parser(file_format)
+            parser_options = get_parser_options(args, file_format)
+            file_parser = parser_factory.get_parser(file_format, **parser_options)
             
-            data = file_parser.parse(input_file)
+            if args.passthrough:
+                if sinks:
+                    raise ValueError("--passthrough cannot be combined with multiple outputs")
+                passthrough_file(file_parser, input_file, file_format, args)
+                return
+            
+            preview = args.head is not None or args.sample is not None
+            # Under a memory budget, CSV output is produced from a record
+            # stream so that only the spillable buffers hold data. Only
+            # sources whose records are the parsed rows themselves can be
+            # streamed; the others are collected into the shape of parse().
+            stream_output = (memory_budget.enabled and not (args.validate or sinks)
+                             and (args.transform or file_format) == "csv"
+                             and file_format in ["csv", "log"])
+            if args.transform and not (args.validate or args.query or args.join or args.grep or preview
+                                       or sinks or parser_options):
+                transformer = TransformerFactory().get_transformer(file_format, args.transform)
+                if isinstance(transformer, DirectConverter):
+                    convert_file(transformer, input_file, args.output)
+                    if memory_budget.enabled:
+                        print(memory_budget.report(), file=sys.stderr)
+                    return
+            
+            if args.grep:
+                if file_format not in ["txt", "log"]:
+                    raise ValueError("--grep is only supported for txt and log files")
+                before = args.context if args.context is not None else args.before_context
+                after = args.context if args.context is not None else args.after_context
+                data = file_parser.grep(input_file, args.grep, invert=args.invert, count=args.count,
+                                        before=before, after=after, jobs=args.jobs)
+                if args.count:
+                    print(data)
+                    return
+            elif args.join or preview or stream_output:
+                if args.join:
+                    records = join_records(parser_factory, file_parser, input_file, args)
+                    if (preview or stream_output) and args.query:
+                        records = file_parser.filter_records(records, args.query)
+                elif args.query:
+                    records = file_parser.iter_filtered(input_file, args.query)
+                else:
+                    records = file_parser.iter_records(input_file)
+                
+                if args.head is not None:
+                    records = take_head(records, args.head)
+                if args.sample is not None:
+                    records = reservoir_sample(records, args.sample, args.seed)
+                
+                data = records if stream_output else file_parser.collect(records)
+            else:
+                data = parse_cache.parse(file_parser, input_file, file_format)
             
             if args.validate:
                 is_valid, errors = file_parser.validate(data)
@@ -251,16 +526,22 @@ def main():
                         print(f"- {error}", file=sys.stderr)
                     sys.exit(1)
             
-            if args.query:
+            if args.query and not (preview or stream_output):
                 data = file_parser.filter(data, args.query)
             
+            if sinks:
+                FanOutWriter().write(data, sinks, file_parser, file_format)
+                if not (args.transform or args.output):
+                    return
+            
             if args.transform:
-                if args.transform not in ["csv", "json", "xml", "txt"]:
+                if args.transform not in ["csv", "json", "jsonl", "xml", "txt", "col"]:
                     print(f"Error: Unsupported transformation format: {args.transform}", file=sys.stderr)
                     sys.exit(1)
                     
                 transformer_factory = TransformerFactory()
-                transformer = transformer_factory.get_transformer(file_format, args.transform)
+                transformer = transformer_factory.get_transformer(file_format, args.transform,
+                                                                  **get_transformer_options(args, args.transform))
                 data = transformer.transform(data)
                 output_format = args.transform
             else:
@@ -272,6 +553,9 @@ def main():
                 print(f"Successfully wrote output to {args.output}")
             else:
                 output_handler.print_to_console(data, output_format)
+            
+            if memory_budget.enabled:
+                print(memory_budget.report(), file=sys.stderr)
                 
         except Exception as e:
             print(f"Error: {str(e)}", file=sys.stderr)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Thin client for the file parser server (file-parser-cli-tool.py --serve).
+
+Forwards its arguments to a running server and prints the result, without
+importing any of the parsers itself:
+
+    python file-parser-client.py --socket /tmp/file-parser.sock data.csv -t json
+"""
+import base64
+import json
+import os
+import socket
+import sys
+
+DEFAULT_ADDRESS = os.environ.get("FILE_PARSER_SOCKET", "/tmp/file-parser.sock")
+
+def connect(address):
+    host, _, port = address.rpartition(":")
+    if port.isdigit() and "/" not in address:
+        return socket.create_connection((host or "127.0.0.1", int(port)))
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(address)
+    return client
+
+def main():
+    argv = sys.argv[1:]
+    address = DEFAULT_ADDRESS
+    if len(argv) >= 2 and argv[0] == "--socket":
+        address = argv[1]
+        argv = argv[2:]
+    
+    request = {"argv": argv, "cwd": os.getcwd()}
+    if "-" in argv:
+        request["stdin"] = base64.b64encode(sys.stdin.buffer.read()).decode("ascii")
+    
+    try:
+        with connect(address) as client:
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with client.makefile("rb") as response_file:
+                response = json.loads(response_file.readline())
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not reach file parser server at {address}: {str(e)}", file=sys.stderr)
+        sys.exit(2)
+    
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit_code"])
+
+if __name__ == "__main__":
+    main()
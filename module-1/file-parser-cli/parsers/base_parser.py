@@ -1,5 +1,17 @@
 from abc import ABC, abstractmethod
 
+
+def _hashable(value):
+    """Convert lists, dicts and sets of options to hashable equivalents."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
 class BaseParser(ABC):
     """Abstract base class for all file parsers."""
     
@@ -16,7 +28,69 @@ class BaseParser(ABC):
             tuple: (is_valid, error_list)
         """
         pass
-    
+
+    def parse_content(self, content):
+        """Parse file contents that were already read into memory.
+        
+        Args:
+            content (bytes): Raw contents of the file
+            
+        Returns:
+            Structured data, as returned by ``parse``
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot parse in-memory content")
+
+    def iter_records(self, file_path):
+        """Yield the records of the file one at a time.
+
+        The default implementation parses the whole file and walks the
+        result. Parsers that can read incrementally override this so that
+        callers only hold one record in memory at a time.
+
+        Args:
+            file_path: Path to the file to parse
+
+        Yields:
+            Individual records (usually dictionaries)
+        """
+        data = self.parse(file_path)
+        if isinstance(data, list):
+            yield from data
+        elif isinstance(data, str):
+            yield from data.split('\n')
+        else:
+            yield data
+
+    def iter_filtered(self, file_path, query):
+        """Yield the records of the file that match query.
+
+        Equivalent to ``filter_records(iter_records(file_path), query)``,
+        which is what the default implementation does. Parsers that can
+        test the undecoded bytes override it to skip building the records
+        that do not match.
+        """
+        return self.filter_records(self.iter_records(file_path), query)
+
+    def filter_records(self, records, query):
+        """Lazily filter a stream of records with the same rules as ``filter``."""
+        for record in records:
+            if self._matches_query(record, query):
+                yield record
+
+    def collect(self, records):
+        """Assemble streamed records into the shape returned by ``parse``."""
+        return list(records)
+
+    def cache_key(self):
+        """Return a hashable value identifying the options that change ``parse``.
+
+        Parsed files are only shared between parsers with equal keys (see
+        ``ParseCache``). The default uses the public attributes; parsers
+        that keep derived objects instead of their options override it.
+        """
+        return tuple(sorted((name, _hashable(value)) for name, value in vars(self).items()
+                            if not name.startswith("_")))
+
     def filter(self, data, query):
         """Filter data based on query string.
         
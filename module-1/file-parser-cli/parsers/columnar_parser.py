@@ -0,0 +1,93 @@
+from parsers.base_parser import BaseParser
+from utils.columnar import ColumnarFile
+from utils.memory import gc_paused
+from utils.predicates import parse_comparison
+
+class ColumnarParser(BaseParser):
+    """Parser for the native columnar format (.col files).
+    
+    Files are memory-mapped and only the requested columns are decoded.
+    A ``where`` comparison is pushed down to the reader, which skips blocks
+    whose min/max statistics rule it out and builds records only for the
+    matching rows.
+    """
+    
+    def __init__(self, columns=None, where=None):
+        """Create a columnar parser.
+        
+        Args:
+            columns: List of column names to return, or None for all
+            where: "field <op> value" comparison rows must satisfy
+        """
+        self.columns = columns
+        self.where = None
+        self._options = (tuple(columns) if columns else None, where)
+        if where:
+            self.where = parse_comparison(where)
+            if self.where is None:
+                raise ValueError(f"Invalid --where comparison: {where} (expected field<op>value)")
+    
+    def cache_key(self):
+        """Return the selected columns and comparison, which determine the parse."""
+        return self._options
+    
+    def parse(self, file_path):
+        """Parse a columnar file and return its records."""
+        try:
+            with ColumnarFile.open(file_path) as table:
+                return self._read(table)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing columnar file: {str(e)}")
+    
+    def parse_content(self, content):
+        """Parse columnar bytes and return the records."""
+        try:
+            with ColumnarFile.from_bytes(content) as table:
+                return self._read(table)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing columnar file: {str(e)}")
+    
+    def iter_records(self, file_path):
+        """Yield records block by block from the memory-mapped file."""
+        try:
+            with ColumnarFile.open(file_path) as table:
+                for records in table.iter_blocks(self.columns, self.where):
+                    if table.shape == "values":
+                        yield from (record.get("value") for record in records)
+                    else:
+                        yield from records
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing columnar file: {str(e)}")
+    
+    def validate(self, data):
+        """Validate columnar data structure."""
+        if isinstance(data, dict):
+            return True, []
+        if not isinstance(data, list):
+            return False, ["Data is not a list of records"]
+        return True, []
+    
+    def _matches_query(self, item, query):
+        """Match "field <op> value" comparisons, or a regex on any field."""
+        comparison = parse_comparison(query)
+        if comparison is not None and isinstance(item, dict):
+            return comparison.matches(item)
+        return super()._matches_query(item, query)
+    
+    def _read(self, table):
+        """Collect the selected records in the shape they were written in."""
+        records = []
+        with gc_paused():
+            for block in table.iter_blocks(self.columns, self.where):
+                records.extend(block)
+        if table.shape == "values":
+            return [record.get("value") for record in records]
+        if table.shape == "object":
+            return records[0] if records else {}
+        return records
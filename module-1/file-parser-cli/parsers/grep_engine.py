@@ -0,0 +1,202 @@
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+
+class GrepEngine:
+    """Line-oriented regular expression search over memory-mapped bytes.
+
+    Instead of decoding the file and testing every line, the compiled bytes
+    pattern is run over the whole mapping and jumps straight from one match
+    to the next; only matching lines are expanded to their line boundaries.
+    Large files can be split into newline-aligned chunks that are searched
+    by several processes.
+    """
+
+    CHUNK_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, patterns, invert=False, before=0, after=0, ignore_case=False):
+        """Create a search engine.
+
+        Args:
+            patterns: One or more regular expressions; a line matches if any
+                of them matches
+            invert: Select the lines that do not match instead
+            before: Number of context lines to include before each match
+            after: Number of context lines to include after each match
+            ignore_case: Match case-insensitively
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not patterns:
+            raise ValueError("At least one search pattern is required")
+
+        self.patterns = list(patterns)
+        self.invert = invert
+        self.before = before
+        self.after = after
+        self.ignore_case = ignore_case
+
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        combined = b"|".join(b"(?:" + p.encode("utf-8") + b")" for p in self.patterns)
+        try:
+            self.regex = re.compile(combined, flags)
+        except re.error as e:
+            raise ValueError(f"Invalid search pattern: {str(e)}")
+
+    def search(self, file_path, jobs=1):
+        """Return the selected lines, with context, as a list of bytes.
+
+        Non-adjacent groups of lines are separated by a ``b"--"`` line when
+        context lines are requested, as grep does.
+        """
+        with _MappedFile(file_path) as buf:
+            spans = self._collect_spans(file_path, buf, jobs)
+            if self.before or self.after:
+                return list(self._with_context(buf, spans))
+            return [buf[start:end] for start, end in spans]
+
+    def count(self, file_path, jobs=1):
+        """Return the number of selected lines."""
+        with _MappedFile(file_path) as buf:
+            return len(self._collect_spans(file_path, buf, jobs))
+
+    def _collect_spans(self, file_path, buf, jobs):
+        """Find the (start, end) offsets of all selected lines."""
+        chunks = _split_chunks(buf, max(jobs, 1), self.CHUNK_SIZE)
+        # Daemonic processes (e.g. the --serve workers) cannot start a process pool
+        if jobs <= 1 or len(chunks) == 1 or multiprocessing.current_process().daemon:
+            return [span for start, end in chunks for span in self._spans(buf, start, end)]
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_search_chunk, self._settings(), file_path, start, end)
+                       for start, end in chunks]
+            return [span for future in futures for span in future.result()]
+
+    def _settings(self):
+        """Arguments needed to rebuild this engine in a worker process."""
+        return (self.patterns, self.invert, self.ignore_case)
+
+    def _spans(self, buf, start, end):
+        """Yield the offsets of selected lines between start and end."""
+        if self.invert:
+            yield from self._inverted_spans(buf, start, end)
+        else:
+            yield from self._matching_spans(buf, start, end)
+
+    def _matching_spans(self, buf, start, end):
+        """Jump from match to match and expand each one to its line."""
+        search = self.regex.search
+        pos = start
+        while pos < end:
+            match = search(buf, pos, end)
+            if match is None:
+                return
+            line_start = buf.rfind(b"\n", pos, match.start()) + 1 or pos
+            line_end = buf.find(b"\n", match.start(), end)
+            if line_end < 0:
+                line_end = end
+            # A match running into the next line (e.g. "a\s+") only selects
+            # this line if the pattern also matches within it
+            if match.end() <= line_end or search(buf, match.start(), line_end):
+                yield line_start, line_end
+            pos = line_end + 1
+
+    def _inverted_spans(self, buf, start, end):
+        """Yield every line that lies between two matching lines."""
+        pos = start
+        for match_start, match_end in self._matching_spans(buf, start, end):
+            yield from _line_spans(buf, pos, match_start)
+            pos = match_end + 1
+        yield from _line_spans(buf, pos, end)
+
+    def _with_context(self, buf, spans):
+        """Yield the selected lines surrounded by their context lines."""
+        size = len(buf)
+        emitted_end = -1
+        for start, end in spans:
+            if start > emitted_end:
+                context_start = start
+                for _ in range(self.before):
+                    if context_start <= emitted_end + 1:
+                        break
+                    context_start = buf.rfind(b"\n", 0, context_start - 1) + 1
+
+                if emitted_end >= 0 and context_start > emitted_end + 1:
+                    yield b"--"
+                for line_start, line_end in _line_spans(buf, context_start, start):
+                    yield buf[line_start:line_end]
+                yield buf[start:end]
+                emitted_end = end
+
+            context_end = end
+            for _ in range(self.after):
+                if context_end >= size - 1:
+                    break
+                next_end = buf.find(b"\n", context_end + 1)
+                context_end = size if next_end < 0 else next_end
+            if context_end > emitted_end:
+                for line_start, line_end in _line_spans(buf, emitted_end + 1, context_end):
+                    yield buf[line_start:line_end]
+                emitted_end = context_end
+
+
+class _MappedFile:
+    """Context manager returning a read-only mapping of a file, or b"" if empty."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = None
+        self.mapping = None
+
+    def __enter__(self):
+        self.file = open(self.file_path, "rb")
+        if os.fstat(self.file.fileno()).st_size == 0:
+            return b""
+        self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.mapping
+
+    def __exit__(self, *exc_info):
+        if self.mapping is not None:
+            self.mapping.close()
+        self.file.close()
+
+
+def _line_spans(buf, start, end):
+    """Yield the (start, end) offsets of every line between start and end."""
+    pos = start
+    while pos < end:
+        line_end = buf.find(b"\n", pos, end)
+        if line_end < 0:
+            line_end = end
+        yield pos, line_end
+        pos = line_end + 1
+
+
+def _split_chunks(buf, jobs, chunk_size):
+    """Split the buffer into newline-aligned (start, end) ranges."""
+    size = len(buf)
+    if jobs <= 1 or size <= chunk_size:
+        return [(0, size)]
+
+    chunk_size = max(chunk_size, size // (jobs * 4) + 1)
+    chunks = []
+    start = 0
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = buf.find(b"\n", end)
+            end = size if newline < 0 else newline + 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def _search_chunk(settings, file_path, start, end):
+    """Worker entry point: search one chunk of a file."""
+    patterns, invert, ignore_case = settings
+    engine = GrepEngine(patterns, invert=invert, ignore_case=ignore_case)
+    with _MappedFile(file_path) as buf:
+        return list(engine._spans(buf, start, end))
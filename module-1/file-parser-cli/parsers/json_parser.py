@@ -1,19 +1,38 @@
 import json
 from parsers.base_parser import BaseParser
+from utils.encoding import decode, open_text
 
 class JSONParser(BaseParser):
     """Parser for JSON files."""
     
+    def __init__(self, encoding="utf-8"):
+        """Create a JSON parser.
+        
+        Args:
+            encoding: Text encoding of the file, unless it starts with a
+                byte order mark
+        """
+        self.encoding = encoding
+    
     def parse(self, file_path):
         """Parse JSON file and return structured data."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
+            with open_text(file_path, self.encoding) as file:
                 return json.load(file)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON: {str(e)}")
         except Exception as e:
             raise ValueError(f"Error parsing JSON file: {str(e)}")
     
+    def parse_content(self, content):
+        """Parse JSON bytes and return structured data."""
+        try:
+            return json.loads(decode(content, self.encoding))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error parsing JSON file: {str(e)}")
+    
     def validate(self, data):
         """Validate JSON data structure."""
         if data is None:
@@ -0,0 +1,59 @@
+import json
+from parsers.base_parser import BaseParser
+from utils.encoding import decode, open_text
+
+class JSONLParser(BaseParser):
+    """Parser for JSON Lines files (one JSON document per line)."""
+    
+    def __init__(self, encoding="utf-8"):
+        """Create a JSON Lines parser.
+        
+        Args:
+            encoding: Text encoding of the file, unless it starts with a
+                byte order mark
+        """
+        self.encoding = encoding
+    
+    def parse(self, file_path):
+        """Parse JSON Lines file and return a list of records."""
+        return list(self.iter_records(file_path))
+    
+    def parse_content(self, content):
+        """Parse JSON Lines bytes and return a list of records."""
+        records = []
+        for line_number, line in enumerate(decode(content, self.encoding).split('\n'), 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {str(e)}")
+        return records
+    
+    def iter_records(self, file_path):
+        """Yield one decoded JSON document per non-empty line."""
+        try:
+            with open_text(file_path, self.encoding) as file:
+                for line_number, line in enumerate(file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Invalid JSON on line {line_number}: {str(e)}")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error parsing JSON Lines file: {str(e)}")
+    
+    def validate(self, data):
+        """Validate JSON Lines data structure."""
+        if not isinstance(data, list):
+            return False, ["Data is not a list of records"]
+        
+        errors = []
+        for i, item in enumerate(data, 1):
+            if isinstance(item, dict) and "" in item:
+                errors.append(f"Line {i}: Empty key found")
+                
+        return len(errors) == 0, errors
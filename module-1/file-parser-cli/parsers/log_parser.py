@@ -1,31 +1,256 @@
-import re
+import json
+from itertools import chain, islice
 from parsers.base_parser import BaseParser
+from parsers.grep_engine import GrepEngine
+from parsers.log_patterns import PatternLibrary
+from parsers.log_timestamps import TimestampParser
+from utils.encoding import ascii_transparent, bytes_pattern, decode, iter_raw_lines, open_text, sniff_file
+from utils.predicates import parse_comparison
 
 class LogParser(BaseParser):
     """Parser for log files."""
     
-    LOG_PATTERNS = [
-        r'(?P<ip>\d+\.\d+\.\d+\.\d+) - (?P<user>.*?) \[(?P<datetime>.*?)\] "(?P<request>.*?)" (?P<status>\d+) (?P<size>\d+)',
-        r'(?P<datetime>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(,\d+)?)\s+(?P<level>\w+)\s+(?P<message>.*)'
-    ]
+    VERDICT_CACHE_SIZE = 4096
+    
+    def __init__(self, typed=False, time_format="epoch", pattern=None, pattern_file=None, encoding="utf-8"):
+        """Create a log parser.
+        
+        Args:
+            typed: Convert the integer fields of the pattern (such as
+                ``status``/``size``) to int and ``datetime`` to a timestamp
+                instead of returning every field as a string
+            time_format: "epoch" for epoch seconds or "datetime" for
+                datetime objects, used when typed is True
+            pattern: Name of the library pattern to use instead of
+                detecting one from the first lines
+            pattern_file: JSON pattern file extending the built-in library
+                (see ``PatternLibrary``)
+            encoding: Text encoding of the file, unless it starts with a
+                byte order mark
+        """
+        if time_format not in ("epoch", "datetime"):
+            raise ValueError(f"Unsupported time format: {time_format}")
+        self.typed = typed
+        self.timestamps = TimestampParser(as_datetime=time_format == "datetime")
+        self.library = PatternLibrary.load(pattern_file)
+        self.log_format = self.library.get(pattern) if pattern else None
+        self.encoding = encoding
+        self._options = (typed, time_format, pattern, pattern_file, encoding)
+    
+    def cache_key(self):
+        """Return the constructor options, which determine the parse."""
+        return self._options
     
     def parse(self, file_path):
         """Parse log file and return structured data."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            with open_text(file_path, self.encoding, errors='replace') as file:
                 content = file.read()
                 
-            lines = content.strip().split('\n')
-            
-            for pattern in self.LOG_PATTERNS:
-                parsed_lines = self._try_parse_with_pattern(lines, pattern)
-                if parsed_lines:
-                    return parsed_lines
-            
-            return lines
+            return self._parse_text(content)
+        except Exception as e:
+            raise ValueError(f"Error parsing log file: {str(e)}")
+    
+    def parse_content(self, content):
+        """Parse log bytes and return structured data."""
+        try:
+            return self._parse_text(decode(content, self.encoding, errors='replace'))
         except Exception as e:
             raise ValueError(f"Error parsing log file: {str(e)}")
     
+    def _parse_text(self, content):
+        """Parse the decoded contents of a log file."""
+        lines = content.strip().split('\n')
+        
+        log_format = self._detect_pattern(lines[:10])
+        if log_format is None:
+            return lines
+        
+        return [self._match_line(log_format, line) for line in lines]
+    
+    def iter_records(self, file_path):
+        """Yield parsed log entries one line at a time.
+
+        The format is detected from the first lines of the file with the
+        same rules as ``parse``; the rest of the file is then streamed.
+        """
+        try:
+            with open_text(file_path, self.encoding, errors='replace') as file:
+                sample = []
+                for line in file:
+                    sample.append(line.rstrip('\n'))
+                    if len(sample) >= 10:
+                        break
+
+                log_format = self._detect_pattern(sample)
+                if log_format is None:
+                    yield from sample
+                    for line in file:
+                        yield line.rstrip('\n')
+                    return
+
+                for line in sample:
+                    yield self._match_line(log_format, line)
+                for line in file:
+                    yield self._match_line(log_format, line.rstrip('\n'))
+        except Exception as e:
+            raise ValueError(f"Error parsing log file: {str(e)}")
+
+    def grep(self, file_path, patterns, invert=False, count=False, before=0, after=0, jobs=1):
+        """Search the raw file bytes and parse only the selected lines.
+        
+        Takes the same arguments as ``TextParser.grep``. Context separators
+        are dropped, since the result is a list of log entries.
+        
+        Returns:
+            list or int: Parsed log entries, or the number of selected lines
+        """
+        engine = GrepEngine(patterns, invert=invert, before=before, after=after)
+        if count:
+            return engine.count(file_path, jobs=jobs)
+        
+        lines = [line.decode(self.encoding, errors='replace')
+                 for line in engine.search(file_path, jobs=jobs) if line != b'--']
+        log_format = self._detect_pattern(lines[:10])
+        if log_format is None:
+            return lines
+        return [self._match_line(log_format, line) for line in lines]
+
+    def iter_filtered(self, file_path, query):
+        """Yield the entries matching query, building only those.
+
+        Lines are read as bytes and tested with a bytes version of the
+        pattern, decoding just the field the query compares (see
+        ``passthrough``); the full entry is only built for matching lines.
+        """
+        bom, encoding = sniff_file(file_path, self.encoding)
+        if not ascii_transparent(encoding):
+            yield from self.filter_records(self.iter_records(file_path), query)
+            return
+        try:
+            with open(file_path, 'rb') as file:
+                file.seek(len(bom))
+                log_format, lines = self._detect_raw(file, encoding)
+                matches = self._raw_matcher(log_format, query, encoding)
+                for line in lines:
+                    if matches(line):
+                        yield self._raw_entry(log_format, line, encoding)
+        except Exception as e:
+            raise ValueError(f"Error parsing log file: {str(e)}")
+
+    def passthrough(self, file_path, query=None):
+        """Yield the original bytes of the lines whose entry matches query.
+
+        Nothing is decoded or encoded again on the way out: the output
+        starts with the file's byte order mark, if any, and every selected
+        line keeps its bytes and line ending. ASCII lines are matched with a
+        bytes version of the pattern and only the compared field is decoded;
+        other lines are decoded and parsed as usual, so the selection is
+        the same as with ``filter``.
+
+        Raises:
+            ValueError: If the encoding cannot be searched as bytes
+        """
+        bom, encoding = sniff_file(file_path, self.encoding)
+        if not ascii_transparent(encoding):
+            raise ValueError(f"Pass-through needs an ASCII compatible encoding such as UTF-8, not {encoding}")
+        try:
+            with open(file_path, 'rb') as file:
+                file.seek(len(bom))
+                if bom:
+                    yield bom
+                log_format, lines = self._detect_raw(file, encoding)
+                matches = self._raw_matcher(log_format, query, encoding)
+                for line in lines:
+                    if matches(line):
+                        yield line
+        except Exception as e:
+            raise ValueError(f"Error parsing log file: {str(e)}")
+
+    def _detect_raw(self, file, encoding):
+        """Detect the format of a binary file; return it with all its lines."""
+        lines = iter_raw_lines(file)
+        sample = list(islice(lines, 10))
+        log_format = self._detect_pattern([line.decode(encoding, errors='replace').rstrip('\r\n')
+                                           for line in sample])
+        return log_format, chain(sample, lines)
+
+    def _raw_entry(self, log_format, line, encoding):
+        """Decode a raw line and convert it as ``iter_records`` does."""
+        text = line.decode(encoding, errors='replace').rstrip('\r\n')
+        if log_format is None:
+            return text
+        return self._match_line(log_format, text)
+
+    def _raw_matcher(self, log_format, query, encoding):
+        """Return a function telling whether the entry of a raw line matches query.
+
+        The bytes fast path applies to ASCII lines, where a bytes pattern
+        finds exactly what the text pattern finds. Queries that need the
+        whole entry (embedded JSON, unknown fields, no detected format)
+        decode every line.
+        """
+        def decoded(line):
+            return self._matches_query(self._raw_entry(log_format, line, encoding), query)
+
+        if not query:
+            return lambda line: True
+        regex = bytes_pattern(log_format.regex.pattern, log_format.regex.flags) if log_format else None
+        if regex is None or log_format.json_field:
+            return decoded
+
+        comparison = parse_comparison(query)
+        if comparison is not None:
+            field = comparison.field
+            if field not in regex.groupindex or field == "raw":
+                return decoded
+            index = regex.groupindex[field]
+            # Fields such as status or level repeat, so remember the verdicts
+            verdicts = {}
+
+            def matches(line):
+                if not line.isascii():
+                    return decoded(line)
+                match = regex.search(line, 0, len(line.rstrip(b"\r\n")))
+                if match is None:
+                    return False
+                raw = match.group(index)
+                verdict = verdicts.get(raw)
+                if verdict is None:
+                    verdict = False
+                    if raw is not None:
+                        value = raw.decode('ascii')
+                        if self.typed:
+                            value = self._convert_value(field, value, log_format.integer_fields)
+                        verdict = comparison.matches({field: value})
+                    if len(verdicts) < self.VERDICT_CACHE_SIZE:
+                        verdicts[raw] = verdict
+                return verdict
+            return matches
+
+        search = bytes_pattern(query)
+        if search is None or self.typed:
+            return decoded
+
+        def matches(line):
+            if not line.isascii():
+                return decoded(line)
+            end = len(line.rstrip(b"\r\n"))
+            match = regex.search(line, 0, end)
+            if match is None:
+                return search.search(line, 0, end) is not None
+            # str(None) is what the text query sees for a missing group
+            return any(search.search(value if value is not None else b"None")
+                       for value in match.groupdict().values())
+        return matches
+
+    def _matches_query(self, item, query):
+        """Match "field <op> value" comparisons, or a regex on any field."""
+        comparison = parse_comparison(query)
+        if comparison is not None and isinstance(item, dict):
+            return comparison.matches(item)
+        return super()._matches_query(item, query)
+
     def validate(self, data):
         """Validate log data structure."""
         if not isinstance(data, list):
@@ -37,24 +262,48 @@ class LogParser(BaseParser):
             
         return len(errors) == 0, errors
     
-    def _try_parse_with_pattern(self, lines, pattern):
-        """Try to parse log lines with a specific pattern."""
-        compiled_pattern = re.compile(pattern)
-        parsed_lines = []
-        match_count = 0
-        
-        for i, line in enumerate(lines[:min(10, len(lines))]):
-            match = compiled_pattern.search(line)
-            if match:
-                match_count += 1
-        
-        if match_count >= min(10, len(lines)) * 0.7:
-            for line in lines:
-                match = compiled_pattern.search(line)
-                if match:
-                    parsed_lines.append(match.groupdict())
-                else:
-                    parsed_lines.append({"raw": line})
-            return parsed_lines
-        
-        return None
+    def _detect_pattern(self, sample):
+        """Return the chosen LogFormat, or the library's best fit for sample."""
+        if self.log_format is not None:
+            return self.log_format
+        return self.library.detect(sample)
+
+    def _match_line(self, log_format, line):
+        """Convert a single log line to a dictionary of fields."""
+        match = log_format.regex.search(line)
+        if match:
+            entry = match.groupdict()
+            if log_format.json_field:
+                self._merge_json(entry, log_format.json_field)
+            if self.typed:
+                self._convert_types(entry, log_format.integer_fields)
+            return entry
+        return {"raw": line}
+
+    def _merge_json(self, entry, field):
+        """Replace an embedded JSON object field by its keys."""
+        try:
+            payload = json.loads(entry[field])
+        except (TypeError, ValueError):
+            return
+        if isinstance(payload, dict):
+            del entry[field]
+            for key, value in payload.items():
+                entry.setdefault(key, value)
+
+    def _convert_types(self, entry, integer_fields):
+        """Convert numeric and timestamp fields of an entry in place."""
+        for field in integer_fields:
+            value = entry.get(field)
+            if isinstance(value, str):
+                entry[field] = int(value) if value.isdigit() else None
+        if "datetime" in entry:
+            entry["datetime"] = self.timestamps.parse(entry["datetime"])
+
+    def _convert_value(self, field, value, integer_fields):
+        """Convert a single field as ``_convert_types`` would."""
+        if field in integer_fields:
+            return int(value) if value.isdigit() else None
+        if field == "datetime":
+            return self.timestamps.parse(value)
+        return value
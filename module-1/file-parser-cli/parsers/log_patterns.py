@@ -0,0 +1,160 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+BUILTIN_PATTERN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "log_patterns.json")
+
+_REFERENCE = re.compile(r"%\{(\w+)(?::(\w+))?\}")
+
+
+class LogFormat:
+    """A named, compiled log line format.
+
+    Attributes:
+        name: Name of the format in the library
+        regex: Compiled regular expression with one named group per field
+        integer_fields: Fields converted to int when parsing typed entries
+        json_field: Field holding a JSON object whose keys are merged into
+            the entry, or None
+        example: Sample line used for documentation and benchmarks
+    """
+
+    def __init__(self, name, regex, integer_fields=(), json_field=None, example=None):
+        self.name = name
+        self.regex = regex
+        self.integer_fields = tuple(integer_fields)
+        self.json_field = json_field
+        self.example = example
+
+    @property
+    def fields(self):
+        return list(self.regex.groupindex)
+
+
+class PatternLibrary:
+    """Grok-style library of reusable sub-patterns and log formats.
+
+    A pattern file is a JSON object with two sections::
+
+        {
+          "patterns": {"PORT": "\\\\d+", ...},
+          "formats": {
+            "access": {"pattern": "%{IPV4:ip}:%{PORT:port} %{GREEDYDATA:message}",
+                       "integers": ["port"], "json_field": null,
+                       "example": "10.0.0.1:80 hello"}
+          }
+        }
+
+    ``%{NAME}`` inserts the sub-pattern NAME as a non-capturing group and
+    ``%{NAME:field}`` as a group named ``field``; sub-patterns may refer to
+    each other. A format may also be given as a plain pattern string.
+    Formats are expanded and compiled once, when the library is built.
+    """
+
+    def __init__(self, patterns=None, formats=None):
+        self.patterns = dict(patterns or {})
+        self.formats = {}
+        for name, spec in (formats or {}).items():
+            self.formats[name] = self._compile_format(name, spec)
+
+    @classmethod
+    def load(cls, path=None):
+        """Return the built-in library, extended with a pattern file.
+
+        Definitions in the pattern file override built-ins of the same
+        name, and its formats are tried first during detection. Libraries
+        are cached, so each file is read and compiled once per process.
+
+        Raises:
+            ValueError: If the file cannot be read or a pattern is invalid
+        """
+        return _load_library(os.path.abspath(path) if path else None)
+
+    def get(self, name):
+        """Return the format called name.
+
+        Raises:
+            ValueError: If there is no such format
+        """
+        try:
+            return self.formats[name]
+        except KeyError:
+            raise ValueError(f"Unknown log pattern: {name} (available: {', '.join(self.formats)})")
+
+    def expand(self, pattern):
+        """Expand the ``%{NAME:field}`` references of a pattern."""
+        return self._expand(pattern, ())
+
+    def detect(self, sample, threshold=0.7):
+        """Return the format that best fits a sample of lines, or None.
+
+        Every format is tried on the sample; the one matching the most
+        lines wins, provided it matches at least threshold of them. Ties go
+        to the format extracting more fields, so that e.g. the combined
+        nginx layout is preferred over the common log format it extends.
+        """
+        if not sample:
+            return None
+        best = None
+        best_score = None
+        for log_format in self.formats.values():
+            search = log_format.regex.search
+            match_count = sum(1 for line in sample if search(line))
+            if match_count < len(sample) * threshold:
+                continue
+            score = (match_count, len(log_format.regex.groupindex))
+            if best_score is None or score > best_score:
+                best, best_score = log_format, score
+        return best
+
+    def _expand(self, pattern, seen):
+        def replace(match):
+            name, field = match.groups()
+            if name in seen:
+                raise ValueError(f"Recursive log sub-pattern: {' -> '.join(seen + (name,))}")
+            if name not in self.patterns:
+                raise ValueError(f"Unknown log sub-pattern: {name}")
+            expanded = self._expand(self.patterns[name], seen + (name,))
+            if field:
+                return f"(?P<{field}>{expanded})"
+            return f"(?:{expanded})"
+
+        return _REFERENCE.sub(replace, pattern)
+
+    def _compile_format(self, name, spec):
+        if isinstance(spec, str):
+            spec = {"pattern": spec}
+        if not isinstance(spec, dict) or "pattern" not in spec:
+            raise ValueError(f"Log pattern '{name}' must be a string or an object with a 'pattern'")
+        try:
+            regex = re.compile(self.expand(spec["pattern"]))
+        except re.error as e:
+            raise ValueError(f"Invalid log pattern '{name}': {str(e)}")
+        return LogFormat(name, regex,
+                         integer_fields=spec.get("integers", ()),
+                         json_field=spec.get("json_field"),
+                         example=spec.get("example"))
+
+
+def read_pattern_file(path):
+    """Read the "patterns" and "formats" sections of a pattern file."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            config = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Error reading pattern file {path}: {str(e)}")
+    if not isinstance(config, dict):
+        raise ValueError(f"Pattern file {path} must contain a JSON object")
+    return config.get("patterns", {}), config.get("formats", {})
+
+
+@lru_cache(maxsize=16)
+def _load_library(path):
+    patterns, formats = read_pattern_file(BUILTIN_PATTERN_FILE)
+    if path:
+        user_patterns, user_formats = read_pattern_file(path)
+        patterns.update(user_patterns)
+        formats = {**user_formats, **{name: spec for name, spec in formats.items()
+                                      if name not in user_formats}}
+    return PatternLibrary(patterns, formats)
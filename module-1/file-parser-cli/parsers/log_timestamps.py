@@ -0,0 +1,72 @@
+import calendar
+from datetime import datetime, timedelta, timezone
+
+
+class TimestampParser:
+    """Converts log timestamps to epoch seconds or datetimes, with caching.
+
+    Consecutive log lines almost always share the same date, hour and
+    minute, so the expensive ``strptime`` call is made once per distinct
+    minute prefix and cached. The seconds (and milliseconds) are then added
+    with plain integer arithmetic. Supported layouts:
+
+    - Apache/nginx: ``10/Oct/2000:13:55:36 -0700``
+    - ISO-like: ``2023-01-01 12:00:00`` or ``2023-01-01 12:00:00,123``
+      (read as UTC since the text carries no offset)
+
+    Other values fall back to a full ``strptime`` of the known layouts and
+    are returned unchanged if none of them matches.
+    """
+
+    MAX_CACHE_ENTRIES = 4096
+
+    def __init__(self, as_datetime=False):
+        self.as_datetime = as_datetime
+        self._minutes = {}
+
+    def parse(self, value):
+        """Convert a timestamp string, returning it unchanged if unknown."""
+        if not isinstance(value, str):
+            return value
+        if len(value) == 26 and value[2] == '/' and value[17] == ':':
+            key = value[:17] + value[20:]
+            seconds = value[18:20]
+            fraction = 0
+        elif len(value) >= 19 and value[4] == '-' and value[13] == ':' and value[16] == ':':
+            key = value[:16]
+            seconds = value[17:19]
+            fraction = int(value[20:23].ljust(3, '0')) if len(value) > 20 and value[20:23].isdigit() else 0
+        else:
+            return value
+
+        base = self._minutes.get(key)
+        if base is None:
+            base = self._parse_minute(key)
+            if base is None:
+                return value
+            if len(self._minutes) >= self.MAX_CACHE_ENTRIES:
+                self._minutes.clear()
+            self._minutes[key] = base
+
+        try:
+            offset = int(seconds) + fraction / 1000
+        except ValueError:
+            return value
+
+        if self.as_datetime:
+            return base + timedelta(seconds=offset)
+        return base + offset if fraction else int(base + offset)
+
+    def _parse_minute(self, key):
+        """Parse a minute prefix into epoch seconds or a datetime."""
+        try:
+            if key[2] == '/':
+                parsed = datetime.strptime(key, "%d/%b/%Y:%H:%M %z")
+            else:
+                parsed = datetime.strptime(key, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+        if self.as_datetime:
+            return parsed
+        return calendar.timegm(parsed.utctimetuple())
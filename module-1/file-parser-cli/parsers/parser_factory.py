@@ -1,17 +1,21 @@
 from parsers.csv_parser import CSVParser
 from parsers.json_parser import JSONParser
+from parsers.jsonl_parser import JSONLParser
 from parsers.xml_parser import XMLParser
 from parsers.text_parser import TextParser
 from parsers.log_parser import LogParser
+from parsers.columnar_parser import ColumnarParser
 
 class ParserFactory:
     """Factory class to create appropriate parser for file format."""
     
-    def get_parser(self, file_format):
+    def get_parser(self, file_format, **options):
         """Get the appropriate parser for the specified format.
         
         Args:
-            file_format (str): Format of the file (csv, json, xml, txt, log)
+            file_format (str): Format of the file (csv, json, jsonl, xml, txt, log, col)
+            **options: Keyword arguments for the parser's constructor, such
+                as ``typed=True`` for log files or ``delimiter=";"`` for CSV
             
         Returns:
             BaseParser: Parser instance for the specified format
@@ -22,14 +26,18 @@ class ParserFactory:
         file_format = file_format.lower()
         
         if file_format == "csv":
-            return CSVParser()
+            return CSVParser(**options)
         elif file_format == "json":
-            return JSONParser()
+            return JSONParser(**options)
+        elif file_format == "jsonl":
+            return JSONLParser(**options)
         elif file_format == "xml":
-            return XMLParser()
+            return XMLParser(**options)
         elif file_format == "txt":
-            return TextParser()
+            return TextParser(**options)
         elif file_format == "log":
-            return LogParser()
+            return LogParser(**options)
+        elif file_format == "col":
+            return ColumnarParser(**options)
         else:
             raise ValueError(f"Unsupported file format: {file_format}")
@@ -1,16 +1,47 @@
 from parsers.base_parser import BaseParser
+from parsers.grep_engine import GrepEngine
+from utils.encoding import decode, open_text
 
 class TextParser(BaseParser):
     """Parser for plain text files."""
     
+    def __init__(self, encoding="utf-8"):
+        """Create a text parser.
+        
+        Args:
+            encoding: Text encoding of the file, unless it starts with a
+                byte order mark
+        """
+        self.encoding = encoding
+    
     def parse(self, file_path):
         """Parse text file and return content as a string."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
+            with open_text(file_path, self.encoding) as file:
                 return file.read()
         except Exception as e:
             raise ValueError(f"Error parsing text file: {str(e)}")
     
+    def parse_content(self, content):
+        """Decode text bytes and return content as a string."""
+        try:
+            return decode(content, self.encoding)
+        except Exception as e:
+            raise ValueError(f"Error parsing text file: {str(e)}")
+    
+    def iter_records(self, file_path):
+        """Yield the lines of the text file one at a time."""
+        try:
+            with open_text(file_path, self.encoding) as file:
+                for line in file:
+                    yield line.rstrip('\n')
+        except Exception as e:
+            raise ValueError(f"Error parsing text file: {str(e)}")
+    
+    def collect(self, records):
+        """Join streamed lines back into a single string."""
+        return '\n'.join(records)
+    
     def validate(self, data):
         """Validate text data."""
         if not isinstance(data, str):
@@ -31,3 +62,24 @@ class TextParser(BaseParser):
         lines = data.split('\n')
         matched_lines = [line for line in lines if re.search(query, line)]
         return '\n'.join(matched_lines)
+    
+    def grep(self, file_path, patterns, invert=False, count=False, before=0, after=0, jobs=1):
+        """Search the file without decoding it or splitting it into lines.
+        
+        Args:
+            file_path: Path to the text file
+            patterns: Regular expression or list of expressions to match
+            invert: Select non-matching lines instead
+            count: Return the number of selected lines instead of the lines
+            before: Context lines to include before each match
+            after: Context lines to include after each match
+            jobs: Number of processes used to search large files
+            
+        Returns:
+            str or int: Selected lines joined by newlines, or their count
+        """
+        engine = GrepEngine(patterns, invert=invert, before=before, after=after)
+        if count:
+            return engine.count(file_path, jobs=jobs)
+        lines = engine.search(file_path, jobs=jobs)
+        return b'\n'.join(lines).decode(self.encoding, errors='replace')
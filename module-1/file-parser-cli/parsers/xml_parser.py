@@ -1,11 +1,36 @@
+import io
 import xml.etree.ElementTree as ET
 from parsers.base_parser import BaseParser
+from parsers.xml_path import XPathSelector
+from utils.predicates import parse_comparison
 
 class XMLParser(BaseParser):
     """Parser for XML files."""
     
+    def __init__(self, select=None, project=None):
+        """Create an XML parser.
+        
+        Args:
+            select: Path expression such as ``order/line[@sku]``; when
+                given, the file is streamed and only matching elements
+                are returned, as a list of records
+            project: With select, the children (``qty``, ``price/amount``)
+                and attributes (``@sku``) to keep, or ``#text`` for the
+                element's own text; each match becomes one flat record
+        """
+        if project and not select:
+            raise ValueError("Projection requires a path selected with --select")
+        self.selector = XPathSelector(select) if select else None
+        self.project = project
+        self._options = (select, tuple(project) if project else None)
+        # Attributes and text of the root seen by the last iter_records call
+        self._root_attributes = {}
+        self._root_text = ""
+    
     def parse(self, file_path):
         """Parse XML file and return structured data as a dictionary."""
+        if self.selector is not None:
+            return list(self.iter_records(file_path))
         try:
             tree = ET.parse(file_path)
             root = tree.getroot()
@@ -15,6 +40,119 @@ class XMLParser(BaseParser):
         except Exception as e:
             raise ValueError(f"Error parsing XML file: {str(e)}")
     
+    def parse_content(self, content):
+        """Parse XML bytes and return structured data as a dictionary."""
+        if self.selector is not None:
+            return list(self._select(io.BytesIO(content)))
+        try:
+            return self._xml_to_dict(ET.fromstring(content))
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error parsing XML file: {str(e)}")
+    
+    def iter_records(self, file_path):
+        """Yield the children of the root element one at a time.
+        
+        Each record is a dictionary mapping the child's tag to its converted
+        content. Children are discarded once converted, so memory use stays
+        bounded by the size of the largest child. With a ``select`` path,
+        the matching elements are yielded instead. The root's attributes and
+        text are kept for ``collect``.
+        """
+        if self.selector is not None:
+            yield from self._select(file_path)
+            return
+        self._root_attributes = {}
+        self._root_text = ""
+        try:
+            root = None
+            depth = 0
+            for event, element in ET.iterparse(file_path, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = element
+                        self._root_attributes = dict(element.attrib)
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth <= 1:
+                    self._root_text = root.text.strip() if root.text else ""
+                if depth == 1:
+                    yield {element.tag: self._xml_to_dict(element)}
+                    root.remove(element)
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error parsing XML file: {str(e)}")
+    
+    def cache_key(self):
+        """Return the select path and projection, which determine the parse."""
+        return self._options
+    
+    def collect(self, records):
+        """Rebuild the root dictionary of ``parse`` from streamed children.
+
+        Children are grouped by tag as in ``parse`` and the root's attributes
+        and text are restored; with a ``select`` path the records are
+        returned as a list.
+        """
+        if self.selector is not None:
+            return list(records)
+        result = {}
+        for record in records:
+            for tag, child_data in record.items():
+                if tag in result:
+                    if type(result[tag]) is list:
+                        result[tag].append(child_data)
+                    else:
+                        result[tag] = [result[tag], child_data]
+                else:
+                    result[tag] = child_data
+        if self._root_attributes:
+            result = {"@attributes": self._root_attributes, **result}
+        if self._root_text and not result:
+            return self._root_text
+        elif self._root_text:
+            result["#text"] = self._root_text
+        return result
+    
+    def _select(self, source):
+        """Yield a record for every element matching the select path."""
+        try:
+            for element in self.selector.select(source):
+                yield self._project(element)
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error parsing XML file: {str(e)}")
+    
+    def _project(self, element):
+        """Convert a selected element, keeping only the projected fields."""
+        if not self.project:
+            return {element.tag: self._xml_to_dict(element)}
+        
+        record = {}
+        for field in self.project:
+            if field.startswith("@"):
+                record[field] = element.get(field[1:])
+            elif field == "#text":
+                record[field] = element.text.strip() if element.text else ""
+            else:
+                values = [self._xml_to_dict(child) for child in element.findall(field)]
+                if not values:
+                    record[field] = None
+                else:
+                    record[field] = values[0] if len(values) == 1 else values
+        return record
+    
+    def _matches_query(self, item, query):
+        """With --select, match "field <op> value" comparisons on the records."""
+        comparison = parse_comparison(query) if self.selector is not None else None
+        if comparison is not None and isinstance(item, dict):
+            return comparison.matches(item)
+        return super()._matches_query(item, query)
+    
     def validate(self, data):
         """Validate XML data structure."""
         if data is None:
@@ -23,6 +161,10 @@ class XMLParser(BaseParser):
         errors = []
         if isinstance(data, dict):
             self._validate_dict(data, errors)
+        elif isinstance(data, list):
+            for i, item in enumerate(data, 1):
+                if isinstance(item, dict):
+                    self._validate_dict(item, errors, prefix=f"Match {i}: ")
             
         return len(errors) == 0, errors
     
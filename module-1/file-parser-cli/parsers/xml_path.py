@@ -0,0 +1,186 @@
+import re
+import xml.etree.ElementTree as ET
+
+_SEPARATOR = re.compile(r"//|/")
+_STEP = re.compile(r"(\*|\{[^}]*\}[\w.-]+|[\w.:-]+)((?:\[[^\]]*\])*)")
+_PREDICATE = re.compile(r"\[\s*(@?)(\{[^}]*\}[\w.-]+|[\w.:-]+)\s*(?:(!?=)\s*(['\"])(.*?)\4\s*)?\]")
+_NO_STATES = frozenset()
+
+
+class PathStep:
+    """One step of a path: a tag test plus attribute and child predicates."""
+
+    def __init__(self, name, descendant=False):
+        self.name = name
+        self.descendant = descendant
+        self.attribute_tests = []
+        self.child_tests = []
+
+    def matches_tag(self, tag):
+        if self.name == "*" or tag == self.name:
+            return True
+        # Unqualified names match elements of any namespace
+        return tag.endswith("}" + self.name) and self.name[0] != "{"
+
+    def matches_attributes(self, attrib):
+        for name, operator, value in self.attribute_tests:
+            actual = attrib.get(name)
+            if actual is None:
+                return False
+            if operator == "=" and actual != value:
+                return False
+            if operator == "!=" and actual == value:
+                return False
+        return True
+
+    def matches_children(self, element):
+        for name, operator, value in self.child_tests:
+            texts = ["".join(child.itertext()) for child in element.findall(name)]
+            if not texts:
+                return False
+            if operator == "=" and value not in texts:
+                return False
+            if operator == "!=" and all(text == value for text in texts):
+                return False
+        return True
+
+
+class XPathSelector:
+    """Streaming evaluator for a subset of XPath.
+
+    Supported syntax::
+
+        order/line              line children of order children of the root
+        /orders/order           absolute path, starting at the root element
+        //line, order//line     descendants at any depth
+        *                       any element
+        line[@sku]              attribute present
+        line[@sku='A1']         attribute equal (or != for not equal)
+        line[qty]               child element present
+        line[qty='2']           child element text equal (or != )
+
+    As with ``Element.findall``, a child's text is its complete text
+    content, including that of its descendants.
+
+    Relative paths are evaluated from the root element, as with
+    ``Element.findall``. Child predicates are only allowed on the last step,
+    since they are checked when the element is complete.
+
+    The document is read with ``iterparse``. The set of path steps that can
+    still match is tracked for every open element; elements outside any
+    match are cleared and detached as soon as they end, so memory use is
+    bounded by the depth of the document and the size of one match.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.steps, self.absolute = self._compile(path)
+        self._last = len(self.steps) - 1
+        # Without attribute tests, transitions only depend on the tag
+        self._cacheable = not any(step.attribute_tests for step in self.steps)
+        self._transitions = {}
+
+    def select(self, source):
+        """Yield the matching elements of an XML file or file object.
+
+        Each element is complete (with all its descendants) when it is
+        yielded, and is cleared as soon as the consumer asks for the next
+        one, so it must be converted before then.
+        """
+        document_states = frozenset([0]) if self.absolute else None
+        open_states = []
+        open_elements = []
+        inside_matches = 0
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                parent_states = open_states[-1][0] if open_states else document_states
+                if parent_states is None:
+                    states, candidate = frozenset([0]), False
+                elif not parent_states:
+                    states, candidate = _NO_STATES, False
+                else:
+                    states, candidate = self._advance(parent_states, element)
+                open_states.append((states, candidate))
+                open_elements.append(element)
+                if candidate:
+                    inside_matches += 1
+                continue
+
+            states, candidate = open_states.pop()
+            open_elements.pop()
+            if candidate:
+                inside_matches -= 1
+                if self.steps[self._last].matches_children(element):
+                    yield element
+            if not inside_matches and open_elements:
+                element.clear()
+                open_elements[-1].remove(element)
+
+    def _advance(self, parent_states, element):
+        """Return (states for the children, whether element is a candidate)."""
+        tag = element.tag
+        if self._cacheable:
+            key = (parent_states, tag)
+            cached = self._transitions.get(key)
+            if cached is not None:
+                return cached
+
+        states = set()
+        candidate = False
+        for index in parent_states:
+            step = self.steps[index]
+            if step.descendant:
+                states.add(index)
+            if step.matches_tag(tag) and step.matches_attributes(element.attrib):
+                if index == self._last:
+                    candidate = True
+                else:
+                    states.add(index + 1)
+
+        result = (frozenset(states) if states else _NO_STATES, candidate)
+        if self._cacheable:
+            self._transitions[key] = result
+        return result
+
+    def _compile(self, path):
+        """Split a path into PathStep objects.
+
+        Raises:
+            ValueError: If the path uses unsupported syntax
+        """
+        text = path.strip()
+        if not text:
+            raise ValueError("Empty XML path")
+        absolute = text.startswith("/")
+        steps = []
+        position = 0
+        separator = ""
+        while position < len(text):
+            if steps or absolute:
+                match = _SEPARATOR.match(text, position)
+                if not match:
+                    raise ValueError(f"Invalid XML path '{path}' at position {position}")
+                separator = match.group()
+                position = match.end()
+            match = _STEP.match(text, position)
+            if not match:
+                raise ValueError(f"Invalid XML path '{path}' at position {position}")
+            step = PathStep(match.group(1), descendant=separator == "//")
+            predicates = match.group(2)
+            for predicate in re.findall(r"\[[^\]]*\]", predicates):
+                parsed = _PREDICATE.fullmatch(predicate)
+                if not parsed:
+                    raise ValueError(f"Unsupported XML path predicate: {predicate}")
+                is_attribute, name, operator, _, value = parsed.groups()
+                test = (name, operator, value)
+                if is_attribute:
+                    step.attribute_tests.append(test)
+                else:
+                    step.child_tests.append(test)
+            steps.append(step)
+            position = match.end()
+
+        for step in steps[:-1]:
+            if step.child_tests:
+                raise ValueError("Child predicates are only supported on the last step of an XML path")
+        return steps, absolute
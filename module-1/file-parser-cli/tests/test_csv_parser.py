@@ -0,0 +1,67 @@
+"""Differential tests of CSVParser against csv.DictReader."""
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.csv_parser import CSVParser
+
+# Characters that make the parser take its quoted, ragged and multi-line paths
+ALPHABET = "abc xyz019.-'\";|\t,\n\r"
+
+
+def random_value(rng):
+    value = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 8)))
+    return value if rng.random() < 0.6 else rng.choice(["", "'ok'", "Rock 'n' roll", "'Tis", '"x"', "1,5"])
+
+
+def random_csv(rng):
+    """Return a comma CSV written by csv.writer, sometimes with ragged rows."""
+    width = rng.randint(1, 5)
+    header = [f"col{i}" for i in range(width)]
+    rows = [header]
+    # csv.writer only quotes the characters of its line terminator
+    terminator = rng.choice(["\n", "\r\n"])
+    for _ in range(rng.randint(0, 12)):
+        size = width if rng.random() < 0.8 else rng.randint(0, width + 2)
+        rows.append([random_value(rng).replace("\r", "" if terminator == "\n" else "\r") for _ in range(size)])
+    output = io.StringIO(newline="")
+    csv.writer(output, lineterminator=terminator).writerows(rows)
+    return output.getvalue()
+
+
+class CSVParserDifferentialTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "data.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_same_as_dictreader(self, text):
+        with open(self.path, "w", encoding="utf-8", newline="") as file:
+            file.write(text)
+        with open(self.path, encoding="utf-8", newline="") as file:
+            expected = list(csv.DictReader(file))
+        parser = CSVParser()
+        self.assertEqual(parser.parse(self.path), expected, repr(text))
+        self.assertEqual(list(parser.iter_records(self.path)), expected, repr(text))
+        self.assertEqual(parser.parse_content(text.encode("utf-8")), expected, repr(text))
+
+    def test_apostrophes_are_not_quotes(self):
+        self.assert_same_as_dictreader("id,title,band\n1,'Tis the season,Band A\n2,Rock 'n' roll,Band B\n")
+        self.assert_same_as_dictreader("a,b\n'ok',x\n")
+
+    def test_random_files(self):
+        rng = random.Random(36)
+        for _ in range(3000):
+            self.assert_same_as_dictreader(random_csv(rng))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Tests that a memory budget does not change the converted output."""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOL = os.path.join(ROOT, "file-parser-cli-tool.py")
+
+SOURCES = {
+    "csv": 'name,city\nAda,"London, UK"\nBob,Paris\nCy\n',
+    "xml": '<people region="eu"><person id="1"><name>Ada</name></person>'
+           '<person id="2"><name>Bob</name></person></people>',
+    "log": '127.0.0.1 - - [10/Oct/2023:13:55:36 +0000] "GET / HTTP/1.1" 200 12\n'
+           '10.0.0.2 - bob [10/Oct/2023:13:55:37 +0000] "POST /a HTTP/1.1" 404 0\n',
+    "jsonl": '{"a": 1, "b": "x"}\n{"a": 2}\n',
+    "json": '[{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]',
+}
+
+
+class MaxMemoryOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def convert(self, source, *options):
+        output = os.path.join(self.tmp.name, f"out{len(os.listdir(self.tmp.name))}.csv")
+        subprocess.run([sys.executable, TOOL, source, "-t", "csv", "-o", output, *options],
+                       check=True, capture_output=True)
+        with open(output, "rb") as f:
+            return f.read()
+
+    def test_same_output_with_and_without_budget(self):
+        for file_format, content in SOURCES.items():
+            with self.subTest(file_format=file_format):
+                source = os.path.join(self.tmp.name, f"input.{file_format}")
+                with open(source, "w", newline="") as f:
+                    f.write(content)
+                self.assertEqual(self.convert(source, "--max-memory", "1K"), self.convert(source))
+                self.assertEqual(self.convert(source, "--max-memory", "1K", "--head", "1"),
+                                 self.convert(source, "--head", "1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
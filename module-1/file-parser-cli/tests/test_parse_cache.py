@@ -0,0 +1,39 @@
+"""Tests that ParseCache only shares results between equal parser options."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.parser_factory import ParserFactory
+from utils.parse_cache import ParseCache
+
+
+class ParseCacheKeyTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w", newline="") as f:
+            f.write("a;b,c\n1;2,3\n")
+        self.factory = ParserFactory()
+        self.cache = ParseCache(8)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def parse(self, **options):
+        return self.cache.parse(self.factory.get_parser("csv", **options), self.path, "csv")
+
+    def test_other_options_parse_again(self):
+        self.assertEqual(self.parse(delimiter=";"), [{"a": "1", "b,c": "2,3"}])
+        self.assertEqual(self.parse(delimiter=","), [{"a;b": "1;2", "c": "3"}])
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+    def test_equal_options_hit(self):
+        first = self.parse(delimiter=";")
+        self.assertIs(self.parse(delimiter=";"), first)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
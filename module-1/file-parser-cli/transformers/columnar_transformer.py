@@ -0,0 +1,38 @@
+from transformers.base_transformer import BaseTransformer
+from utils.columnar import write_columnar, BLOCK_ROWS
+
+class ColumnarTransformer(BaseTransformer):
+    """Transformer to convert data to the native columnar format."""
+    
+    def __init__(self, codec="none", block_rows=BLOCK_ROWS):
+        """Create a columnar transformer.
+        
+        Args:
+            codec: Compression of the column buffers, "none" or "zlib"
+            block_rows: Number of records per block
+        """
+        self.codec = codec
+        self.block_rows = block_rows
+    
+    def transform(self, data):
+        """Transform data to the columnar format.
+        
+        Args:
+            data: List or stream of records. A single dictionary is stored
+                as one record, strings and lists of other values as a
+                single ``value`` column.
+            
+        Returns:
+            bytes: Contents of the columnar file
+        """
+        shape = "records"
+        if isinstance(data, str):
+            data = data.strip().split('\n')
+        if isinstance(data, dict):
+            data = [data]
+            shape = "object"
+        elif isinstance(data, list) and data and not all(isinstance(item, dict) for item in data):
+            data = [{"value": item} for item in data]
+            shape = "values"
+        
+        return write_columnar(data, codec=self.codec, block_rows=self.block_rows, shape=shape)
@@ -1,6 +1,7 @@
 import csv
 import io
 from transformers.base_transformer import BaseTransformer
+from utils.memory import memory_budget, SpillBuffer
 
 class CSVTransformer(BaseTransformer):
     """Transformer to convert data to CSV format."""
@@ -9,12 +10,16 @@ class CSVTransformer(BaseTransformer):
         """Transform data to CSV format.
         
         Args:
-            data: Input data (list of dicts, dict, list, or string)
+            data: Input data (list of dicts, dict, list, string, or an
+                iterator of records)
             
         Returns:
-            str: CSV formatted string
+            str: CSV formatted string, or an iterator of CSV text chunks when
+                the input is an iterator
         """
-        if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+        if not isinstance(data, (list, dict, str)) and hasattr(data, '__next__'):
+            return self._transform_records(data)
+        elif isinstance(data, list) and all(isinstance(item, dict) for item in data):
             return self._transform_list_of_dicts(data)
         elif isinstance(data, dict):
             return self._transform_list_of_dicts([data])
@@ -43,6 +48,40 @@ class CSVTransformer(BaseTransformer):
         
         return output.getvalue()
     
+    def _transform_records(self, records, chunk_rows=1000):
+        """Stream an iterator of records to CSV text chunks.
+        
+        The header needs the keys of every record, so records are buffered
+        while the keys are collected. The buffer moves to a temporary file
+        when the memory budget runs low, and the rows are then written back
+        out in chunks instead of as one large string.
+        """
+        with SpillBuffer(memory_budget, "csv header discovery") as buffer:
+            fieldnames = set()
+            all_dicts = True
+            for record in records:
+                if isinstance(record, dict):
+                    fieldnames.update(record.keys())
+                else:
+                    all_dicts = False
+                buffer.append(record)
+            
+            output = io.StringIO()
+            if all_dicts:
+                writer = csv.DictWriter(output, fieldnames=sorted(fieldnames))
+                if fieldnames:
+                    writer.writeheader()
+            else:
+                writer = csv.writer(output)
+            
+            for i, record in enumerate(buffer, 1):
+                writer.writerow(record if all_dicts else [record])
+                if i % chunk_rows == 0:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate()
+            yield output.getvalue()
+    
     def _transform_list(self, data):
         """Transform a simple list to CSV."""
         output = io.StringIO()
@@ -0,0 +1,237 @@
+import csv
+import json
+import shutil
+import tempfile
+from abc import abstractmethod
+from operator import itemgetter
+from xml.sax.saxutils import escape
+from parsers.csv_parser import CSVParser
+from parsers.log_parser import LogParser
+from parsers.xml_parser import XMLParser
+from transformers.base_transformer import BaseTransformer
+from utils.encoding import open_text
+
+class DirectConverter(BaseTransformer):
+    """Base class for fused file-to-file converters.
+
+    A direct converter reads the source file and writes the target format
+    record by record, without building the parsed data set in memory. When
+    it is handed already parsed data (for example after a query), it falls
+    back to the generic transformer for the target format.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def transform(self, data):
+        """Transform parsed data with the generic transformer."""
+        return self.fallback.transform(data)
+
+    @abstractmethod
+    def convert(self, input_path, output):
+        """Stream the converted contents of input_path to a text stream.
+
+        Args:
+            input_path: Path to the source file
+            output: Writable text file object
+        """
+        pass
+
+
+class CSVToJSONLConverter(DirectConverter):
+    """Writes each CSV row as a JSON Lines record."""
+
+    def convert(self, input_path, output):
+        dumps = json.dumps
+        write = output.write
+        for row in CSVParser().iter_records(input_path):
+            write(dumps(row) + '\n')
+
+
+class CSVToXMLConverter(DirectConverter):
+    """Writes each CSV row as an <item> element, as XMLTransformer does."""
+
+    def convert(self, input_path, output):
+        write = output.write
+        with open_text(input_path, newline='') as file:
+            reader = CSVParser().iter_rows(file)
+            header = next(reader, None)
+            rows = (row for row in reader if row)
+            first = next(rows, None) if header else None
+            if first is None:
+                write('<?xml version="1.0" ?>\n<root/>\n')
+                return
+
+            open_tags = [f"    <{name}>" for name in header]
+            close_tags = [f"</{name}>\n" for name in header]
+            empty_tags = [f"    <{name}/>\n" for name in header]
+
+            write('<?xml version="1.0" ?>\n<root>\n')
+            for row in _prepend(first, rows):
+                parts = ["  <item>\n"]
+                for i, value in enumerate(row[:len(header)]):
+                    if value:
+                        parts.append(open_tags[i] + escape(value, _QUOTE_ENTITY) + close_tags[i])
+                    else:
+                        parts.append(empty_tags[i])
+                # Fields missing from short rows are empty elements too
+                parts.extend(empty_tags[len(row):])
+                parts.append("  </item>\n")
+                write(''.join(parts))
+            write('</root>\n')
+
+
+class LogToCSVConverter(DirectConverter):
+    """Writes parsed log entries straight to CSV.
+
+    The header is the sorted list of fields of the detected log pattern plus
+    the ``raw`` column used for lines the pattern does not match. Unlike the
+    generic path, ``raw`` is always present, since the converter cannot know
+    in advance whether every line will match. Formats with an embedded JSON
+    object have no fixed set of fields and go through the generic path.
+    """
+
+    def convert(self, input_path, output):
+        log_parser = LogParser()
+        with open_text(input_path, errors='replace') as file:
+            sample = []
+            for line in file:
+                sample.append(line.rstrip('\n'))
+                if len(sample) >= 10:
+                    break
+
+            log_format = log_parser._detect_pattern(sample)
+            if log_format is None:
+                writer = csv.writer(output)
+                writer.writerows([line] for line in sample)
+                writer.writerows([line.rstrip('\n')] for line in file)
+                return
+            if log_format.json_field:
+                records = [log_parser._match_line(log_format, line) for line in sample]
+                records.extend(log_parser._match_line(log_format, line.rstrip('\n')) for line in file)
+                output.write(self.transform(records))
+                return
+
+            compiled_pattern = log_format.regex
+            fields = sorted(list(compiled_pattern.groupindex) + ["raw"])
+            writer = csv.writer(output)
+            writer.writerow(fields)
+
+            raw_index = fields.index("raw")
+            group_order = [compiled_pattern.groupindex.get(name) for name in fields]
+            empty_row = [""] * len(fields)
+            search = compiled_pattern.search
+
+            def rows(lines):
+                for line in lines:
+                    match = search(line)
+                    if match:
+                        yield [match.group(g) if g else "" for g in group_order]
+                    else:
+                        row = list(empty_row)
+                        row[raw_index] = line
+                        yield row
+
+            writer.writerows(rows(sample))
+            writer.writerows(rows(line.rstrip('\n') for line in file))
+
+
+class JSONLToCSVConverter(DirectConverter):
+    """Writes JSON Lines records to CSV without collecting them in a list.
+
+    The CSV header has to list every key before the first row is written.
+    The converter assumes the keys of the first record and spools the rows
+    to a temporary file while reading; if a later record introduces a new
+    key, it falls back to a second pass over the input with the full set of
+    keys. Records are written with a single ``itemgetter`` call instead of
+    the per-row key checks done by ``csv.DictWriter``.
+    """
+
+    SPOOL_MEMORY = 32 * 1024 * 1024
+
+    def convert(self, input_path, output):
+        with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MEMORY, mode='w+',
+                                           newline='', encoding='utf-8') as spool:
+            fields = self._write_rows(input_path, spool, None)
+            if fields is None:
+                fields = self._collect_fields(input_path)
+                spool.seek(0)
+                spool.truncate()
+                self._write_rows(input_path, spool, fields)
+            if not fields:
+                return
+
+            csv.writer(output).writerow(fields)
+            spool.seek(0)
+            shutil.copyfileobj(spool, output)
+
+    def _write_rows(self, input_path, spool, fields):
+        """Write all rows, returning the header or None if it proved too small."""
+        writer = csv.writer(spool)
+        field_set = set(fields) if fields is not None else None
+        getter = None
+        with open_text(input_path) as file:
+            for record in _jsonl_records(file):
+                if field_set is None:
+                    fields = sorted(record)
+                    field_set = set(fields)
+                if getter is None and fields:
+                    getter = _row_getter(fields)
+
+                keys = record.keys()
+                if keys == field_set:
+                    writer.writerow(getter(record))
+                elif keys <= field_set:
+                    writer.writerow([record.get(field, "") for field in fields])
+                else:
+                    return None
+        return fields if fields is not None else []
+
+    def _collect_fields(self, input_path):
+        """Return the sorted union of the keys of all records."""
+        fieldnames = set()
+        with open_text(input_path) as file:
+            for record in _jsonl_records(file):
+                fieldnames.update(record.keys())
+        return sorted(fieldnames)
+
+
+class XMLToJSONLConverter(DirectConverter):
+    """Writes each child of the XML root element as a JSON Lines record.
+
+    Records have the same shape as ``XMLParser.iter_records`` produces:
+    ``{child_tag: converted_child}``.
+    """
+
+    def convert(self, input_path, output):
+        dumps = json.dumps
+        write = output.write
+        for record in XMLParser().iter_records(input_path):
+            write(dumps(record) + '\n')
+
+
+_QUOTE_ENTITY = {'"': '&quot;'}
+
+
+def _jsonl_records(file):
+    """Yield the dictionaries stored in a JSON Lines file."""
+    for line in file:
+        if line.strip():
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("JSON Lines records must be objects to convert to CSV")
+            yield record
+
+
+def _row_getter(fields):
+    """Return a function extracting the values of fields from a record as a tuple."""
+    if len(fields) == 1:
+        field = fields[0]
+        return lambda record: (record[field],)
+    return itemgetter(*fields)
+
+
+def _prepend(first, rest):
+    """Yield first, then everything in rest."""
+    yield first
+    yield from rest
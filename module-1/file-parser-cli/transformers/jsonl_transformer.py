@@ -0,0 +1,26 @@
+import json
+from transformers.base_transformer import BaseTransformer
+
+class JSONLTransformer(BaseTransformer):
+    """Transformer to convert data to JSON Lines format."""
+    
+    def transform(self, data):
+        """Transform data to JSON Lines format.
+        
+        Args:
+            data: Input data (list of records, dict, or string)
+            
+        Returns:
+            str: One JSON document per line
+        """
+        if isinstance(data, str):
+            records = data.strip().split('\n')
+        elif isinstance(data, list):
+            records = data
+        else:
+            records = [data]
+        
+        try:
+            return ''.join(json.dumps(record) + '\n' for record in records)
+        except TypeError as e:
+            raise ValueError(f"Cannot convert to JSON Lines: {str(e)}")
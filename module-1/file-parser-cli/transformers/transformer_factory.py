@@ -1,18 +1,37 @@
 from transformers.base_transformer import BaseTransformer
 from transformers.csv_transformer import CSVTransformer
 from transformers.json_transformer import JSONTransformer
+from transformers.jsonl_transformer import JSONLTransformer
 from transformers.xml_transformer import XMLTransformer
 from transformers.text_transformer import TextTransformer
+from transformers.columnar_transformer import ColumnarTransformer
+from transformers.direct_converters import (
+    CSVToJSONLConverter, CSVToXMLConverter, LogToCSVConverter,
+    JSONLToCSVConverter, XMLToJSONLConverter
+)
 
 class TransformerFactory:
     """Factory class to create appropriate transformer based on source and target formats."""
     
-    def get_transformer(self, source_format, target_format):
+    DIRECT_CONVERTERS = {
+        ("csv", "jsonl"): CSVToJSONLConverter,
+        ("csv", "xml"): CSVToXMLConverter,
+        ("log", "csv"): LogToCSVConverter,
+        ("jsonl", "csv"): JSONLToCSVConverter,
+        ("xml", "jsonl"): XMLToJSONLConverter,
+    }
+    
+    def get_transformer(self, source_format, target_format, **options):
         """Get a transformer to convert from source format to target format.
         
+        For common format pairs this returns a DirectConverter, which can also
+        stream a source file straight into the target format with ``convert``.
+        
         Args:
             source_format (str): Source file format
             target_format (str): Target file format
+            **options: Keyword arguments for the transformer's constructor,
+                such as ``codec="zlib"`` for the columnar format
             
         Returns:
             BaseTransformer: Appropriate transformer
@@ -23,13 +42,25 @@ class TransformerFactory:
         source_format = source_format.lower()
         target_format = target_format.lower()
         
+        transformer = self._get_generic_transformer(target_format, options)
+        converter_class = self.DIRECT_CONVERTERS.get((source_format, target_format))
+        if converter_class:
+            return converter_class(transformer)
+        return transformer
+    
+    def _get_generic_transformer(self, target_format, options=None):
+        """Get the transformer that converts parsed data to the target format."""
         if target_format == "csv":
             return CSVTransformer()
         elif target_format == "json":
             return JSONTransformer()
+        elif target_format == "jsonl":
+            return JSONLTransformer()
         elif target_format == "xml":
             return XMLTransformer()
         elif target_format == "txt":
             return TextTransformer()
+        elif target_format == "col":
+            return ColumnarTransformer(**(options or {}))
         else:
             raise ValueError(f"Unsupported target format: {target_format}")
@@ -43,6 +43,9 @@ class XMLTransformer(BaseTransformer):
     def _add_dict_to_element(self, parent, data):
         """Add dictionary data to an XML element."""
         for key, value in data.items():
+            if key is None:
+                # Extra fields of long CSV rows have no column name
+                continue
             if key.startswith('@'):
                 parent.set(key[1:], str(value))
             elif isinstance(value, dict):
@@ -53,11 +56,13 @@ class XMLTransformer(BaseTransformer):
                     child = ET.SubElement(parent, key)
                     if isinstance(item, dict):
                         self._add_dict_to_element(child, item)
-                    else:
+                    elif item is not None:
                         child.text = str(item)
             else:
+                # None (e.g. a field missing from a short CSV row) is an empty element
                 child = ET.SubElement(parent, key)
-                child.text = str(value)
+                if value is not None:
+                    child.text = str(value)
     
     def _list_of_dicts_to_xml(self, data):
         """Convert a list of dictionaries to XML."""
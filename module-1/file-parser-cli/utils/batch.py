@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from parsers.parser_factory import ParserFactory
+from transformers.transformer_factory import TransformerFactory
+from utils.manifest import MANIFEST_NAME, settings_hash
+
+SUPPORTED_FORMATS = ["csv", "json", "jsonl", "xml", "txt", "log", "col"]
+
+
+class BatchJob:
+    """A single file of a directory batch."""
+
+    def __init__(self, input_path, output_path, file_format):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.file_format = file_format
+        # Filled in for incremental runs (see BatchManifest)
+        self.size = None
+        self.mtime_ns = None
+        self.digest = None
+        self.settings = None
+
+
+class BatchResult:
+    """Counters and errors collected while processing a batch."""
+
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.bytes_read = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def summary(self):
+        """Return a one-line human readable summary."""
+        rate = self.processed / self.elapsed if self.elapsed else 0.0
+        incremental = ""
+        if self.unchanged or self.removed:
+            incremental = f"{self.unchanged} unchanged, {self.removed} outputs removed, "
+        return (f"Processed {self.processed} files ({self.bytes_read / 1024 / 1024:.1f} MB), "
+                f"{incremental}{self.failed} failed, in {self.elapsed:.2f}s ({rate:.0f} files/s)")
+
+
+class AsyncBatchProcessor:
+    """Converts every supported file of a directory tree.
+
+    File reads and writes run on a bounded thread pool driven by asyncio,
+    so many small files are read concurrently and the job is not limited by
+    the latency of a single open/read call (which dominates on network file
+    systems). Read contents are handed to parse/transform workers through a
+    bounded queue; parsing runs in a process pool with the regular parsers'
+    ``parse_content``. I/O and CPU concurrency are configured separately.
+    """
+
+    def __init__(self, io_workers=32, cpu_workers=None, queue_size=None):
+        self.io_workers = max(1, io_workers)
+        self.cpu_workers = max(1, cpu_workers or os.cpu_count() or 1)
+        self.queue_size = queue_size or self.cpu_workers * 4
+
+    def plan(self, input_dir, output_dir, target_format, file_format=None):
+        """List the jobs for a directory tree.
+
+        Args:
+            input_dir: Directory to scan recursively
+            output_dir: Directory receiving the converted files, mirroring
+                the input layout
+            target_format: Output format
+            file_format: Force the input format instead of using extensions
+
+        Returns:
+            list: BatchJob objects, in a stable order
+
+        Raises:
+            ValueError: If two inputs would be written to the same output
+        """
+        jobs = []
+        sources = {}
+        for root, dirs, files in os.walk(input_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if name == MANIFEST_NAME:
+                    continue
+                base, extension = os.path.splitext(name)
+                source_format = file_format or extension[1:].lower()
+                if source_format not in SUPPORTED_FORMATS:
+                    continue
+                input_path = os.path.join(root, name)
+                relative_dir = os.path.relpath(root, input_dir)
+                output_name = f"{base}.{target_format}"
+                output_path = os.path.normpath(os.path.join(output_dir, relative_dir, output_name))
+                if output_path in sources:
+                    raise ValueError(f"{sources[output_path]} and {input_path} would both be written to "
+                                     f"{output_path}; rename one of them")
+                sources[output_path] = input_path
+                jobs.append(BatchJob(input_path, output_path, source_format))
+        return jobs
+
+    def run(self, jobs, target_format, query=None, validate=False, manifest=None):
+        """Process the jobs and return a BatchResult.
+
+        With a BatchManifest, only new and changed inputs are converted,
+        the outputs of inputs that disappeared are removed, and the
+        manifest is saved afterwards.
+        """
+        if manifest is None:
+            return asyncio.run(self._run(jobs, target_format, query, validate))
+
+        start = time.perf_counter()
+        settings = lambda job: settings_hash(job.file_format, target_format, query, validate)
+        changed = manifest.changed_jobs(jobs, settings, io_workers=self.io_workers)
+        result = asyncio.run(self._run(changed, target_format, query, validate, manifest))
+        result.unchanged = len(jobs) - len(changed)
+        result.removed = manifest.remove_deleted(jobs)
+        manifest.save()
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def _run(self, jobs, target_format, query, validate, manifest=None):
+        result = BatchResult()
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        pending = iter(jobs)
+
+        # Daemonic processes (e.g. the --serve workers) cannot start a process pool
+        if self.cpu_workers > 1 and not multiprocessing.current_process().daemon:
+            cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        else:
+            cpu_pool = ThreadPoolExecutor(max_workers=1)
+
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool, cpu_pool:
+            async def read_files():
+                for job in pending:
+                    try:
+                        content = await loop.run_in_executor(io_pool, _read_file, job.input_path)
+                        if manifest is not None:
+                            job.digest = await loop.run_in_executor(io_pool, _digest, content)
+                    except OSError as e:
+                        _record_error(result, job, e, manifest)
+                        continue
+                    result.bytes_read += len(content)
+                    await queue.put((job, content))
+
+            async def process_files():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    job, content = item
+                    try:
+                        output = await loop.run_in_executor(
+                            cpu_pool, process_content, content, job.file_format,
+                            target_format, query, validate)
+                        await loop.run_in_executor(io_pool, _write_file, job.output_path, output)
+                        result.processed += 1
+                        if manifest is not None:
+                            manifest.record(job)
+                    except Exception as e:
+                        _record_error(result, job, e, manifest)
+
+            readers = [asyncio.create_task(read_files()) for _ in range(self.io_workers)]
+            workers = [asyncio.create_task(process_files()) for _ in range(self.cpu_workers)]
+            await asyncio.gather(*readers)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+        result.elapsed = time.perf_counter() - start
+        return result
+
+
+def process_content(content, file_format, target_format, query=None, validate=False):
+    """Parse, filter and transform the contents of one file.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Returns:
+        str: The text to write to the output file
+    """
+    file_parser = ParserFactory().get_parser(file_format)
+    data = file_parser.parse_content(content)
+
+    if validate:
+        is_valid, errors = file_parser.validate(data)
+        if not is_valid:
+            raise ValueError("Validation failed: " + "; ".join(errors))
+    if query:
+        data = file_parser.filter(data, query)
+
+    transformer = TransformerFactory().get_transformer(file_format, target_format)
+    return transformer.transform(data)
+
+
+def _read_file(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def _digest(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _write_file(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if isinstance(text, bytes):
+        with open(path, 'wb') as file:
+            file.write(text)
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(text)
+
+
+def _record_error(result, job, error, manifest=None):
+    if manifest is not None:
+        manifest.forget(job)
+    result.failed += 1
+    result.errors.append(f"{job.input_path}: {str(error)}")
@@ -0,0 +1,447 @@
+import io
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from itertools import compress, repeat
+from operator import itemgetter
+
+MAGIC = b"FPCOL\x00\x01\x00"
+VERSION = 1
+CODECS = ("none", "zlib")
+BLOCK_ROWS = 65536
+
+_FOOTER_LENGTH = struct.Struct("<Q")
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+_TYPECODES = {"int64": "q", "float64": "d", "bool": "b"}
+_MISSING = object()
+
+
+class ColumnarWriter:
+    """Writes records to the native columnar format.
+
+    Layout of a file::
+
+        MAGIC | block 0 column chunks | block 1 ... | footer JSON | footer length | MAGIC
+
+    Records are written in blocks of ``block_rows``. Inside a block every
+    column is stored separately with its own type, chosen from the values:
+
+    - ``int64``, ``float64`` and ``bool``: fixed-width little-endian arrays,
+      plus the positions of null values. Text columns whose every value
+      round-trips through int or float, or a float with a fixed number of
+      decimals (as in most machine-generated CSV), are stored this way too
+      and marked ``text`` so that the reader gives back the original
+      strings.
+    - ``string`` and ``json`` (mixed or nested values): dictionary encoded,
+      a JSON list of the distinct values and one small integer code per row.
+    - ``null``: every value is None, nothing is stored.
+
+    The footer records, for every block and column, the type, the buffer
+    offsets and the min/max of the values, so that readers can skip
+    columns and whole blocks. Buffers may be compressed with zlib.
+    """
+
+    def __init__(self, output, codec="none", block_rows=BLOCK_ROWS):
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported columnar codec: {codec} (expected one of {', '.join(CODECS)})")
+        self.output = output
+        self.codec = codec
+        self.block_rows = block_rows
+        self.columns = []
+        self.blocks = []
+        self.rows = 0
+        self._known = set()
+        self._offset = len(MAGIC)
+        output.write(MAGIC)
+
+    def write_records(self, records, shape="records"):
+        """Write an iterable of dictionaries and the footer.
+
+        Args:
+            records: Iterable of dictionaries with string keys
+            shape: How readers should return the data: "records" for a
+                list of dictionaries, "values" for a list of the ``value``
+                column, "object" for the single record
+        """
+        block = []
+        for record in records:
+            block.append(record)
+            if len(block) >= self.block_rows:
+                self._write_block(block)
+                block = []
+        if block:
+            self._write_block(block)
+        self._write_footer(shape)
+
+    def _write_block(self, records):
+        first_keys = records[0].keys()
+        uniform = all(map(first_keys.__eq__, map(dict.keys, records)))
+        if uniform:
+            names = list(first_keys)
+        else:
+            names = list(dict.fromkeys(key for record in records for key in record))
+
+        chunks = {}
+        for name in names:
+            if not isinstance(name, str):
+                raise ValueError(f"Column names must be strings, got {name!r}")
+            if name not in self._known:
+                self._known.add(name)
+                self.columns.append(name)
+            if uniform:
+                values = list(map(itemgetter(name), records))
+            else:
+                values = [record.get(name, _MISSING) for record in records]
+            chunks[name] = self._write_column(values, uniform)
+
+        self.blocks.append({"rows": len(records), "columns": chunks})
+        self.rows += len(records)
+
+    def _write_column(self, values, uniform):
+        meta, buffers = encode_column(values, check_missing=not uniform)
+        for buffer_name, data in buffers.items():
+            if self.codec == "zlib":
+                data = zlib.compress(data)
+            meta[buffer_name] = [self._offset, len(data)]
+            self.output.write(data)
+            self._offset += len(data)
+        return meta
+
+    def _write_footer(self, shape):
+        footer = json.dumps({
+            "version": VERSION,
+            "codec": self.codec,
+            "shape": shape,
+            "rows": self.rows,
+            "columns": self.columns,
+            "blocks": self.blocks,
+        }).encode('utf-8')
+        self.output.write(footer)
+        self.output.write(_FOOTER_LENGTH.pack(len(footer)))
+        self.output.write(MAGIC)
+
+
+def encode_column(values, check_missing=True):
+    """Choose a type for one column of a block and encode it.
+
+    Args:
+        values: Values of the column, with ``_MISSING`` where a record has
+            no such key
+        check_missing: False if every record is known to have the key
+
+    Returns:
+        tuple: (metadata dictionary, {buffer name: bytes})
+    """
+    missing = None
+    if check_missing:
+        missing = [i for i, value in enumerate(values) if value is _MISSING]
+        if missing:
+            values = [None if value is _MISSING else value for value in values]
+
+    types = set(map(type, values))
+    has_nulls = type(None) in types
+    types.discard(type(None))
+    present = [value for value in values if value is not None] if has_nulls else values
+
+    meta = {}
+    buffers = {}
+    if missing:
+        buffers["missing"] = _to_bytes(array("I", missing))
+
+    if not types:
+        meta["type"] = "null"
+        return meta, buffers
+
+    typed = None
+    if types == {str}:
+        typed = _numeric_text(present)
+        if typed:
+            meta["text"] = True
+            if typed[2] is not None:
+                meta["decimals"] = typed[2]
+            typed = typed[:2]
+    elif types == {int}:
+        typed = ("int64", present) if _INT64_MIN <= min(present) and max(present) <= _INT64_MAX else None
+    elif types == {float}:
+        typed = ("float64", present)
+    elif types == {bool}:
+        typed = ("bool", present)
+
+    if typed:
+        column_type, numbers = typed
+        meta["type"] = column_type
+        if has_nulls:
+            nulls = [i for i, value in enumerate(values) if value is None]
+            numbers_iter = iter(numbers)
+            numbers = [0 if value is None else next(numbers_iter) for value in values]
+            buffers["nulls"] = _to_bytes(array("I", nulls))
+            meta["null_count"] = len(nulls)
+        buffers["values"] = _to_bytes(array(_TYPECODES[column_type], numbers))
+        if column_type != "float64" or not any(number != number for number in typed[1]):
+            meta["min"] = min(typed[1])
+            meta["max"] = max(typed[1])
+        return meta, buffers
+
+    if types == {str}:
+        meta["type"] = "string"
+        dictionary = {}
+        codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+        distinct = list(dictionary)
+        buffers["dictionary"] = json.dumps(distinct).encode('utf-8')
+        strings = [value for value in distinct if value is not None]
+        meta["min"] = min(strings)
+        meta["max"] = max(strings)
+    else:
+        meta["type"] = "json"
+        dictionary = {}
+        try:
+            codes = [dictionary.setdefault(json.dumps(value), len(dictionary)) for value in values]
+        except TypeError as e:
+            raise ValueError(f"Cannot convert to columnar format: {str(e)}")
+        buffers["dictionary"] = ("[" + ",".join(dictionary) + "]").encode('utf-8')
+
+    typecode = "B" if len(dictionary) <= 0x100 else "H" if len(dictionary) <= 0x10000 else "I"
+    meta["code_type"] = typecode
+    buffers["codes"] = _to_bytes(array(typecode, codes))
+    return meta, buffers
+
+
+class ColumnarFile:
+    """Read-only view of a columnar file, memory-mapped from disk.
+
+    Only the footer is parsed when the file is opened. Column chunks are
+    decoded when a block is read, and only for the requested columns; a
+    ``where`` comparison is first checked against the block statistics,
+    then evaluated on the filter column alone, so that the other columns
+    are only materialized for the matching rows.
+    """
+
+    def __init__(self, data, closer=None):
+        self._data = data
+        self._closer = closer
+        if len(data) < 2 * len(MAGIC) + _FOOTER_LENGTH.size or bytes(data[:len(MAGIC)]) != MAGIC \
+                or bytes(data[-len(MAGIC):]) != MAGIC:
+            self.close()
+            raise ValueError("Not a columnar file (bad magic number)")
+        end = len(data) - len(MAGIC)
+        (footer_length,) = _FOOTER_LENGTH.unpack(data[end - _FOOTER_LENGTH.size:end])
+        footer_end = end - _FOOTER_LENGTH.size
+        footer = json.loads(bytes(data[footer_end - footer_length:footer_end]))
+        if footer.get("version") != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar file version: {footer.get('version')}")
+        self.codec = footer["codec"]
+        self.shape = footer["shape"]
+        self.rows = footer["rows"]
+        self.columns = footer["columns"]
+        self.blocks = footer["blocks"]
+
+    @classmethod
+    def open(cls, file_path):
+        """Memory-map a columnar file."""
+        with open(file_path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+
+        def closer():
+            view.release()
+            mapped.close()
+
+        return cls(view, closer)
+
+    @classmethod
+    def from_bytes(cls, content):
+        """Read a columnar file that is already in memory."""
+        return cls(memoryview(content))
+
+    def close(self):
+        if self._closer is not None:
+            self._closer()
+            self._closer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def iter_blocks(self, columns=None, where=None):
+        """Yield the records of each block as a list.
+
+        Args:
+            columns: Names of the columns to return, or None for all
+            where: Optional ``utils.predicates.Comparison``; only rows that
+                satisfy it are returned
+
+        Yields:
+            list: Dictionaries for the selected rows of one block
+        """
+        for block in self.blocks:
+            chunks = block["columns"]
+            rows = block["rows"]
+            selected = None
+            if where is not None:
+                meta = chunks.get(where.field)
+                if meta is None or not _may_match(meta, where):
+                    continue
+                selected = self._match(meta, rows, where)
+                if not selected:
+                    continue
+
+            names = [name for name in (columns or self.columns) if name in chunks]
+            values = [self._values(chunks[name], rows, selected) for name in names]
+            if values:
+                records = [dict(zip(names, row)) for row in zip(*values)]
+            else:
+                records = [{} for _ in range(rows if selected is None else len(selected))]
+            for name in names:
+                if "missing" in chunks[name]:
+                    self._drop_missing(records, name, self._positions(chunks[name]["missing"]), selected)
+            yield records
+
+    def _buffer(self, location):
+        offset, length = location
+        data = self._data[offset:offset + length]
+        if self.codec == "zlib":
+            return zlib.decompress(data)
+        return data
+
+    def _array(self, typecode, location):
+        values = array(typecode)
+        values.frombytes(self._buffer(location))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def _positions(self, location):
+        return self._array("I", location)
+
+    def _values(self, meta, rows, selected=None):
+        """Decode a column chunk, keeping only the selected row positions."""
+        column_type = meta["type"]
+        if column_type == "null":
+            return [None] * (rows if selected is None else len(selected))
+
+        if column_type not in _TYPECODES:
+            dictionary = json.loads(bytes(self._buffer(meta["dictionary"])))
+            codes = self._array(meta["code_type"], meta["codes"])
+            if selected is not None:
+                codes = map(codes.__getitem__, selected)
+            return list(map(dictionary.__getitem__, codes))
+
+        numbers = self._array(_TYPECODES[column_type], meta["values"])
+        values = numbers.tolist() if selected is None else list(map(numbers.__getitem__, selected))
+        if column_type == "bool":
+            values = list(map(bool, values))
+        elif meta.get("text"):
+            if column_type == "int64":
+                values = list(map(str, values))
+            elif "decimals" in meta:
+                values = list(map(_decimal_formatter(meta["decimals"]), values))
+            else:
+                values = list(map(repr, values))
+
+        if "nulls" in meta:
+            nulls = self._positions(meta["nulls"])
+            if selected is None:
+                for position in nulls:
+                    values[position] = None
+            else:
+                nulls = set(nulls)
+                values = [None if position in nulls else value
+                          for position, value in zip(selected, values)]
+        return values
+
+    def _match(self, meta, rows, where):
+        """Return the positions of the rows of a block satisfying where."""
+        column_type = meta["type"]
+        if column_type in ("int64", "float64", "bool") and (not meta.get("text") or where.number is not None):
+            values = self._array(_TYPECODES[column_type], meta["values"])
+            sample = bool(values[0]) if column_type == "bool" else values[0]
+            target = where.number if meta.get("text") else where.coerce(sample)
+            try:
+                flags = list(map(where.compare, values, repeat(target)))
+            except TypeError:
+                return []
+            if "nulls" in meta:
+                for position in self._positions(meta["nulls"]):
+                    flags[position] = False
+            return list(compress(range(rows), flags))
+
+        if column_type in ("string", "json"):
+            dictionary = json.loads(bytes(self._buffer(meta["dictionary"])))
+            accepted = [where.matches({where.field: value}) for value in dictionary]
+            codes = self._array(meta["code_type"], meta["codes"])
+            return list(compress(range(rows), map(accepted.__getitem__, codes)))
+
+        values = self._values(meta, rows)
+        return [i for i, value in enumerate(values) if where.matches({where.field: value})]
+
+    def _drop_missing(self, records, name, missing, selected):
+        if selected is None:
+            for position in missing:
+                del records[position][name]
+            return
+        index = {row: i for i, row in enumerate(selected)}
+        for position in missing:
+            if position in index:
+                del records[index[position]][name]
+
+
+def _may_match(meta, where):
+    """Use the block statistics to rule out blocks that cannot match."""
+    if "min" not in meta:
+        return True
+    if meta.get("text") and where.number is None:
+        # Compared as text, which the numeric statistics do not describe
+        return True
+    return where.could_match(meta["min"], meta["max"])
+
+
+def _numeric_text(strings):
+    """Return (type, numbers, decimals) if every string round-trips.
+
+    Integers must print back identically with ``str``; floats either with
+    ``repr`` (decimals None) or with a fixed number of decimals, as in
+    ``84.70``.
+    """
+    try:
+        numbers = list(map(int, strings))
+        if list(map(str, numbers)) == strings and _INT64_MIN <= min(numbers) and max(numbers) <= _INT64_MAX:
+            return "int64", numbers, None
+        return None
+    except ValueError:
+        pass
+    try:
+        numbers = list(map(float, strings))
+    except ValueError:
+        return None
+    if list(map(repr, numbers)) == strings:
+        return "float64", numbers, None
+    point = strings[0].find(".")
+    if point != -1:
+        decimals = len(strings[0]) - point - 1
+        if list(map(_decimal_formatter(decimals), numbers)) == strings:
+            return "float64", numbers, decimals
+    return None
+
+
+def _decimal_formatter(decimals):
+    return f"{{:.{decimals}f}}".format
+
+
+def _to_bytes(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_columnar(records, codec="none", block_rows=BLOCK_ROWS, shape="records"):
+    """Encode records to the columnar format and return the bytes."""
+    output = io.BytesIO()
+    ColumnarWriter(output, codec=codec, block_rows=block_rows).write_records(records, shape=shape)
+    return output.getvalue()
@@ -0,0 +1,99 @@
+import codecs
+import re
+from functools import lru_cache
+
+# Longest first: the UTF-32-LE mark starts with the UTF-16-LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_bom(head):
+    """Return (bom, encoding) for a byte order mark at the start of head.
+
+    The encoding is the codec that strips the mark when decoding. Without
+    a mark, returns (b"", None).
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return bom, encoding
+    return b"", None
+
+
+def sniff_file(file_path, encoding=None):
+    """Return (bom, encoding) to read a file with.
+
+    A byte order mark overrides the requested encoding, which defaults
+    to UTF-8.
+    """
+    with open(file_path, "rb") as file:
+        bom, detected = detect_bom(file.read(4))
+    return bom, detected or encoding or "utf-8"
+
+
+def open_text(file_path, encoding=None, errors="strict", newline=None):
+    """Open a file for reading text, honouring a byte order mark."""
+    _, encoding = sniff_file(file_path, encoding)
+    return open(file_path, "r", encoding=encoding, errors=errors, newline=newline)
+
+
+def iter_raw_lines(file, block_size=1024 * 1024):
+    """Yield the lines of a binary file with their line endings.
+
+    Lines end at \\n, \\r\\n or \\r, as in text mode with universal
+    newlines. The file is read a block of whole lines at a time.
+    """
+    while True:
+        block = file.read(block_size)
+        if not block:
+            return
+        yield from (block + file.readline()).splitlines(True)
+
+
+def decode(content, encoding=None, errors="strict"):
+    """Decode bytes, honouring a byte order mark."""
+    _, detected = detect_bom(content[:4])
+    return content.decode(detected or encoding or "utf-8", errors)
+
+
+@lru_cache(maxsize=32)
+def ascii_transparent(encoding):
+    """Return True if the encoding can be searched as bytes.
+
+    That is the case when ASCII characters are encoded as the same single
+    bytes and those bytes never occur inside another character: UTF-8 and
+    the single-byte ASCII supersets (latin-1, cp1252, ...), but not
+    UTF-16 or Shift JIS. Pure ASCII data (``bytes.isascii()``) can be
+    searched as bytes whatever the encoding is.
+    """
+    name = codecs.lookup(encoding).name
+    if name in ("utf-8", "utf-8-sig", "ascii"):
+        return True
+    try:
+        if bytes(range(128)).decode(name) != "".join(map(chr, range(128))):
+            return False
+    except UnicodeDecodeError:
+        return False
+    # Multi-byte encodings combine high bytes into fewer characters
+    return len(bytes(range(128, 256)).decode(name, "replace")) == 128
+
+
+@lru_cache(maxsize=128)
+def bytes_pattern(pattern, flags=0):
+    """Compile a text regular expression for searching bytes, or return None.
+
+    Only ASCII patterns are converted. On ASCII input the result finds the
+    same matches as the text pattern; on other input the character classes
+    (``\\w``, ``\\d``, ``\\s``) and IGNORECASE differ, so callers fall back
+    to decoding the lines that are not ASCII.
+    """
+    if not pattern.isascii():
+        return None
+    try:
+        return re.compile(pattern.encode("ascii"), flags & ~re.UNICODE)
+    except re.error:
+        return None
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from transformers.transformer_factory import TransformerFactory
+from utils.output_handler import OutputHandler
+
+
+class Sink:
+    """One output of a fan-out: target format, file path and optional query."""
+
+    def __init__(self, format_type, path, query=None):
+        self.format_type = format_type.lower()
+        self.path = path
+        self.query = query
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Create a sink from a "format:path[:query]" specification.
+
+        Raises:
+            ValueError: If the specification has no path
+        """
+        format_type, _, rest = spec.partition(":")
+        path, _, query = rest.partition(":")
+        if not format_type or not path:
+            raise ValueError(f"Invalid output specification '{spec}', expected format:path[:query]")
+        return cls(format_type, path, query or None)
+
+
+class FanOutWriter:
+    """Writes one parsed data set to several sinks concurrently.
+
+    The data is parsed once by the caller; every sink then applies its own
+    filter, transforms the result and writes it on a thread pool, so the
+    writes of different outputs overlap.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+
+    def write(self, data, sinks, file_parser, source_format):
+        """Filter, transform and write data to every sink.
+
+        Args:
+            data: Parsed data
+            sinks: List of Sink objects
+            file_parser: Parser that produced the data, used for sink queries
+            source_format: Format of the parsed input
+
+        Raises:
+            ValueError: If any of the sinks failed; the message lists all
+                failures
+        """
+        if not sinks:
+            return
+
+        workers = max(1, min(self.max_workers, len(sinks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._write_sink, data, sink, file_parser, source_format)
+                       for sink in sinks]
+
+        errors = []
+        for sink, future in zip(sinks, futures):
+            error = future.exception()
+            if error:
+                errors.append(f"{sink.path}: {str(error)}")
+        if errors:
+            raise ValueError("Failed to write outputs: " + "; ".join(errors))
+
+    def _write_sink(self, data, sink, file_parser, source_format):
+        """Produce a single output."""
+        if sink.query:
+            data = file_parser.filter(data, sink.query)
+        transformer = TransformerFactory().get_transformer(source_format, sink.format_type)
+        OutputHandler().write_to_file(transformer.transform(data), sink.path, sink.format_type)
@@ -0,0 +1,195 @@
+import os
+import pickle
+import shutil
+import tempfile
+from utils.memory import memory_budget, estimate_size
+
+
+class HashJoiner:
+    """Joins the records of two files on a key column.
+
+    The smaller input is loaded into an in-memory hash index and the larger
+    input is streamed through it record by record. If the index grows past
+    ``max_build_bytes``, or the global memory budget asks to spill, the join
+    falls back to a grace hash join: both sides
+    are partitioned by key into temporary files and every partition is then
+    joined on its own, so only one partition of the build side is held in
+    memory at a time.
+    """
+
+    JOIN_TYPES = ("inner", "left")
+
+    def __init__(self, max_build_bytes=256 * 1024 * 1024, partitions=64, budget=memory_budget):
+        self.max_build_bytes = max_build_bytes
+        self.partitions = partitions
+        self.budget = budget
+
+    def join(self, left_parser, left_path, right_parser, right_path, on, how="inner"):
+        """Join two files and yield the merged records.
+
+        Args:
+            left_parser: Parser for the main input file
+            left_path: Path to the main input file
+            right_parser: Parser for the file to join against
+            right_path: Path to the file to join against
+            on: Key column, or "left_key=right_key" when the names differ
+            how: "inner" or "left" (keep unmatched records of the main input)
+
+        Yields:
+            dict: Merged records
+
+        Raises:
+            ValueError: If the join type is not supported or the inputs are
+                not record oriented
+        """
+        if how not in self.JOIN_TYPES:
+            raise ValueError(f"Unsupported join type: {how}")
+
+        left_key, _, right_key = on.partition("=")
+        right_key = right_key or left_key
+
+        left = _Side(left_parser, left_path, left_key, is_left=True)
+        right = _Side(right_parser, right_path, right_key, is_left=False)
+
+        if os.path.getsize(right_path) <= os.path.getsize(left_path):
+            build, probe = right, left
+        else:
+            build, probe = left, right
+
+        # With a left join the main input has to survive even when it is
+        # the build side, so unmatched build records are emitted at the end.
+        keep_build = how == "left" and build.is_left
+        keep_probe = how == "left" and probe.is_left
+
+        build_records = build.records()
+        index, used, complete = self._build_index(build_records, build.key)
+        try:
+            if complete:
+                yield from self._probe(index, probe.records(), probe.key, build.is_left,
+                                       keep_build, keep_probe)
+            else:
+                yield from self._grace_join(index, build_records, build, probe,
+                                            keep_build, keep_probe)
+        finally:
+            self.budget.release(used)
+
+    def _build_index(self, records, key):
+        """Load records into a hash index until the memory limit is reached.
+
+        Returns:
+            tuple: (index, used, complete) where used is the estimated size
+                of the index and complete is False if the limit was reached
+                before the end of the build side
+        """
+        index = {}
+        used = 0
+        for record in records:
+            index.setdefault(record.get(key), []).append([record, False])
+            size = estimate_size(record)
+            used += size
+            self.budget.track(size)
+            if used > self.max_build_bytes or self.budget.should_spill():
+                return index, used, False
+        return index, used, True
+
+    def _probe(self, index, records, key, build_is_left, keep_build, keep_probe):
+        """Stream records through a hash index and yield the matches."""
+        for record in records:
+            value = record.get(key)
+            matches = index.get(value) if value is not None else None
+            if matches:
+                for entry in matches:
+                    entry[1] = True
+                    if build_is_left:
+                        yield _merge(entry[0], record)
+                    else:
+                        yield _merge(record, entry[0])
+            elif keep_probe:
+                yield dict(record)
+
+        if keep_build:
+            for matches in index.values():
+                for record, matched in matches:
+                    if not matched:
+                        yield dict(record)
+
+    def _grace_join(self, index, build_records, build, probe,
+                    keep_build, keep_probe):
+        """Partition both sides to disk and join partition by partition."""
+        temp_dir = tempfile.mkdtemp(prefix="file-parser-join-")
+        try:
+            build_files = self._partition(
+                _chain_index(index, build_records), build.key, temp_dir, "build")
+            index.clear()
+            probe_files = self._partition(probe.records(), probe.key, temp_dir, "probe")
+
+            self.budget.record_spill("join", sum(os.path.getsize(path) for path in build_files + probe_files))
+
+            for build_file, probe_file in zip(build_files, probe_files):
+                partition_index = {}
+                for record in _read_partition(build_file):
+                    partition_index.setdefault(record.get(build.key), []).append([record, False])
+                yield from self._probe(partition_index, _read_partition(probe_file), probe.key,
+                                       build.is_left, keep_build, keep_probe)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _partition(self, records, key, temp_dir, prefix):
+        """Write records into hash partitions and return the file paths."""
+        paths = [os.path.join(temp_dir, f"{prefix}-{i}.bin") for i in range(self.partitions)]
+        files = [open(path, "wb") for path in paths]
+        try:
+            for record in records:
+                partition = hash(record.get(key)) % self.partitions
+                pickle.dump(record, files[partition], pickle.HIGHEST_PROTOCOL)
+        finally:
+            for file in files:
+                file.close()
+        return paths
+
+
+class _Side:
+    """One input of a join: its parser, path and key column."""
+
+    def __init__(self, parser, path, key, is_left):
+        self.parser = parser
+        self.path = path
+        self.key = key
+        self.is_left = is_left
+
+    def records(self):
+        """Yield the records of this side, checking they are dictionaries."""
+        for record in self.parser.iter_records(self.path):
+            if not isinstance(record, dict):
+                raise ValueError(f"Cannot join {self.path}: records are not key/value pairs")
+            yield record
+
+
+def _chain_index(index, remaining):
+    """Yield the records already indexed followed by the rest of the input."""
+    for matches in index.values():
+        for record, _ in matches:
+            yield record
+    yield from remaining
+
+
+def _read_partition(path):
+    """Yield the records stored in a partition file."""
+    with open(path, "rb") as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def _merge(left, right):
+    """Merge a matched pair, suffixing clashing columns from the right side."""
+    merged = dict(left)
+    for key, value in right.items():
+        if key in merged and merged[key] != value:
+            merged[f"{key}_right"] = value
+        else:
+            merged[key] = value
+    return merged
+
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = ".fpc-manifest.json"
+MANIFEST_VERSION = 1
+
+
+class BatchManifest:
+    """Record of the files a directory conversion has already produced.
+
+    The manifest lives in the output directory and maps every converted
+    input (relative to the input directory) to its size, modification
+    time, SHA-256 content hash, output file and a hash of the conversion
+    settings::
+
+        {"version": 1, "input_dir": "/data/drop",
+         "files": {"2023/a.csv": {"size": 120, "mtime_ns": 1696942536000000000,
+                                  "sha256": "...", "output": "2023/a.json",
+                                  "settings": "..."}}}
+
+    A file is unchanged when its size and modification time match and its
+    settings and output are the same, so an unchanged tree costs one stat
+    per file. When only the modification time differs (a touched or copied
+    file) the content hash decides.
+    """
+
+    def __init__(self, output_dir, input_dir, files=None):
+        self.output_dir = output_dir
+        self.input_dir = input_dir
+        self.files = dict(files or {})
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, output_dir, input_dir):
+        """Read the manifest of output_dir, or start an empty one.
+
+        A manifest written for another input directory is not reused.
+
+        Raises:
+            ValueError: If the manifest exists but cannot be read
+        """
+        input_dir = os.path.abspath(input_dir)
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return cls(output_dir, input_dir)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Error reading manifest {path}: {str(e)}")
+        if data.get("version") != MANIFEST_VERSION or data.get("input_dir") != input_dir:
+            return cls(output_dir, input_dir)
+        return cls(output_dir, input_dir, data.get("files"))
+
+    def changed_jobs(self, jobs, settings, io_workers=32):
+        """Return the jobs whose input, output or settings changed.
+
+        Every job is given its ``size``, ``mtime_ns`` and ``settings``;
+        unchanged jobs whose content hash had to be checked keep their
+        entry with the new modification time.
+
+        Args:
+            jobs: BatchJob objects planned for the input directory
+            settings: Function returning the settings hash of a job
+            io_workers: Threads used to stat (and, if needed, hash) inputs
+        """
+        with ThreadPoolExecutor(max_workers=max(1, io_workers)) as pool:
+            changed = pool.map(lambda job: self._has_changed(job, settings(job)), jobs)
+            return [job for job, is_changed in zip(jobs, changed) if is_changed]
+
+    def record(self, job):
+        """Store a successfully converted job, removing a stale old output."""
+        key = self._key(job.input_path)
+        output = os.path.relpath(job.output_path, self.output_dir)
+        previous = self.files.get(key)
+        if previous and previous.get("output") != output:
+            self._remove_output(previous)
+        self.files[key] = {
+            "size": job.size,
+            "mtime_ns": job.mtime_ns,
+            "sha256": job.digest,
+            "output": output,
+            "settings": job.settings,
+        }
+
+    def forget(self, job):
+        """Drop a job that failed, so that it is retried next time."""
+        self.files.pop(self._key(job.input_path), None)
+
+    def remove_deleted(self, jobs):
+        """Remove the outputs of inputs that are no longer planned.
+
+        Returns:
+            int: Number of output files removed
+        """
+        planned = {self._key(job.input_path) for job in jobs}
+        removed = 0
+        for key in [key for key in self.files if key not in planned]:
+            removed += self._remove_output(self.files.pop(key))
+        return removed
+
+    def save(self):
+        """Write the manifest atomically."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "input_dir": self.input_dir, "files": self.files}
+        handle, temp_path = tempfile.mkstemp(dir=self.output_dir, prefix=MANIFEST_NAME, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as file:
+                json.dump(data, file, separators=(",", ":"), sort_keys=True)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _has_changed(self, job, settings):
+        """Stat a job's input and compare it with its entry."""
+        stat = os.stat(job.input_path)
+        job.size = stat.st_size
+        job.mtime_ns = stat.st_mtime_ns
+        job.settings = settings
+
+        entry = self.files.get(self._key(job.input_path))
+        if (entry is None or entry["size"] != job.size or entry["settings"] != settings
+                or entry["output"] != os.path.relpath(job.output_path, self.output_dir)
+                or not os.path.exists(job.output_path)):
+            return True
+        if entry["mtime_ns"] == job.mtime_ns:
+            return False
+        if file_digest(job.input_path) != entry["sha256"]:
+            return True
+        entry["mtime_ns"] = job.mtime_ns
+        return False
+
+    def _key(self, input_path):
+        return os.path.relpath(os.path.abspath(input_path), self.input_dir)
+
+    def _remove_output(self, entry):
+        """Delete the output file of an entry; returns 1 if it was removed."""
+        path = os.path.normpath(os.path.join(self.output_dir, entry["output"]))
+        if os.path.relpath(path, self.output_dir).startswith(os.pardir):
+            return 0
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+
+def settings_hash(*settings):
+    """Return a short hash of JSON-serializable conversion settings."""
+    text = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,214 @@
+import gc
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class MemoryBudget:
+    """Process-wide memory budget shared by the buffering stages.
+
+    Stages that have to hold records (the table renderer, CSV header
+    discovery, hash joins) report the estimated size of what they keep with
+    ``track``/``release`` and ask ``should_spill`` whether to move it to
+    disk. The estimate is cross-checked against the resident set size, which
+    is sampled every ``sample_every`` calls since reading it is a system
+    call. A budget without a limit never asks anyone to spill.
+    """
+
+    def __init__(self, limit=None, sample_every=1000):
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+        self.reset(limit)
+
+    def reset(self, limit=None):
+        """Set a new limit and clear the counters, e.g. before another run."""
+        self.limit = limit
+        self.tracked = 0
+        self.peak_tracked = 0
+        self.peak_rss = 0
+        self.spills = {}
+        self._calls = 0
+        self._last_rss = 0
+
+    @property
+    def enabled(self):
+        return self.limit is not None
+
+    def track(self, size):
+        """Record that size more bytes are held in memory."""
+        with self._lock:
+            self.tracked += size
+            self.peak_tracked = max(self.peak_tracked, self.tracked)
+
+    def release(self, size):
+        """Record that size bytes were freed or spilled."""
+        with self._lock:
+            self.tracked = max(0, self.tracked - size)
+
+    def should_spill(self, threshold=0.8):
+        """Return True when usage is above threshold times the limit."""
+        if self.limit is None:
+            return False
+        self._calls += 1
+        if self._calls % self.sample_every == 1 or self.tracked > self.limit * threshold:
+            self._last_rss = self.sample_rss()
+        return max(self.tracked, self._last_rss) > self.limit * threshold
+
+    def record_spill(self, stage, size):
+        """Count size bytes written to disk by a stage."""
+        with self._lock:
+            count, total = self.spills.get(stage, (0, 0))
+            self.spills[stage] = (count + 1, total + size)
+
+    def sample_rss(self):
+        """Return the current resident set size in bytes (0 if unknown)."""
+        rss = 0
+        try:
+            with open("/proc/self/statm") as statm:
+                rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            if resource is not None:
+                # ru_maxrss is the peak, in kilobytes on Linux and bytes on macOS
+                scale = 1 if sys.platform == "darwin" else 1024
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def report(self):
+        """Return a human readable summary of memory use and spills."""
+        self.sample_rss()
+        lines = [f"Memory budget: {format_size(self.limit)}",
+                 f"Peak tracked buffers: {format_size(self.peak_tracked)}",
+                 f"Peak resident memory: {format_size(self.peak_rss)}"]
+        for stage, (count, total) in sorted(self.spills.items()):
+            lines.append(f"Spilled by {stage}: {count} times, {format_size(total)}")
+        return "\n".join(lines)
+
+
+class SpillBuffer:
+    """Append-only record buffer that moves to a temporary file when needed.
+
+    Records are kept in a list until the memory budget asks to spill; the
+    list is then pickled to an anonymous temporary file and all further
+    records go straight to disk. Iterating replays the records in order.
+    """
+
+    def __init__(self, budget, stage):
+        self.budget = budget
+        self.stage = stage
+        self._records = []
+        self._tracked = 0
+        self._file = None
+        self._spilled = 0
+
+    def append(self, record):
+        if self._file is not None:
+            pickle.dump(record, self._file, pickle.HIGHEST_PROTOCOL)
+            return
+        self._records.append(record)
+        if self.budget.enabled:
+            size = estimate_size(record)
+            self._tracked += size
+            self.budget.track(size)
+            if self.budget.should_spill():
+                self._spill()
+
+    def __iter__(self):
+        if self._file is None:
+            yield from self._records
+            return
+        self._file.flush()
+        self._file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self._file)
+            except EOFError:
+                break
+        self._file.seek(0, os.SEEK_END)
+
+    def close(self):
+        """Free the buffered records and remove the temporary file."""
+        self.budget.release(self._tracked)
+        self._tracked = 0
+        self._records = []
+        if self._file is not None:
+            self.budget.record_spill(self.stage, self._file.tell())
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _spill(self):
+        self._file = tempfile.TemporaryFile(prefix="file-parser-spill-")
+        for record in self._records:
+            pickle.dump(record, self._file, pickle.HIGHEST_PROTOCOL)
+        self._records = []
+        self.budget.release(self._tracked)
+        self._tracked = 0
+
+
+@contextmanager
+def gc_paused():
+    """Disable the cyclic garbage collector for the duration of the block.
+
+    Building hundreds of thousands of acyclic records triggers repeated
+    full collections that find nothing to free; pausing the collector
+    while a parser fills its result list avoids them.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def estimate_size(record):
+    """Roughly estimate the memory used by a record in bytes."""
+    if isinstance(record, dict):
+        return sys.getsizeof(record) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in record.items())
+    if isinstance(record, (list, tuple)):
+        return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record)
+    return sys.getsizeof(record)
+
+
+def parse_size(text):
+    """Parse a size such as "512M", "2G" or "1048576" into bytes.
+
+    Raises:
+        ValueError: If the size cannot be parsed
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid memory size: {text}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " kmgt".index(unit.lower() or " "))
+
+
+def format_size(size):
+    """Format a byte count for display."""
+    if size is None:
+        return "unlimited"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+memory_budget = MemoryBudget()
@@ -1,13 +1,20 @@
 import json
 import csv
 import io
+import itertools
+import sys
+from utils.memory import memory_budget, SpillBuffer
 
 class OutputHandler:
     """Handles different output methods for parsed data."""
     
     def print_to_console(self, data, format_type):
         """Print data to the console in a readable format."""
-        if isinstance(data, str):
+        if _is_stream(data):
+            self._print_stream(data, format_type)
+        elif isinstance(data, bytes):
+            self._write_binary_stdout(data)
+        elif isinstance(data, str):
             print(data)
         elif format_type == "json":
             if isinstance(data, (dict, list)):
@@ -22,9 +29,17 @@ class OutputHandler:
     def write_to_file(self, data, file_path, format_type):
         """Write data to a file in the specified format."""
         try:
+            if isinstance(data, bytes):
+                with open(file_path, 'wb') as file:
+                    file.write(data)
+                print(f"Data successfully written to {file_path}")
+                return
             with open(file_path, 'w', encoding='utf-8') as file:
                 if isinstance(data, str):
                     file.write(data)
+                elif _is_stream(data):
+                    for chunk in data:
+                        file.write(chunk if isinstance(chunk, str) else str(chunk) + "\n")
                 elif format_type == "json" and isinstance(data, (dict, list)):
                     json.dump(data, file, indent=2)
                 else:
@@ -33,22 +48,74 @@ class OutputHandler:
         except Exception as e:
             raise ValueError(f"Error writing to file: {str(e)}")
     
-    def _print_csv_as_table(self, data):
-        """Print CSV data as a formatted table."""
-        if not data:
+    def write_raw(self, chunks, file_path=None):
+        """Write undecoded chunks, such as pass-through output, unchanged.
+        
+        Without a file path the chunks go to stdout's binary buffer, or are
+        decoded as UTF-8 if stdout is a plain text stream.
+        """
+        try:
+            if file_path:
+                with open(file_path, 'wb') as file:
+                    file.writelines(chunks)
+                print(f"Data successfully written to {file_path}")
+                return
+            buffer = getattr(sys.stdout, "buffer", None)
+            if buffer is None:
+                for chunk in chunks:
+                    sys.stdout.write(chunk.decode('utf-8', errors='replace'))
+                return
+            sys.stdout.flush()
+            buffer.writelines(chunks)
+            buffer.flush()
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error writing output: {str(e)}")
+    
+    def _write_binary_stdout(self, data):
+        """Write binary output such as a columnar file to a redirected stdout."""
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is None or sys.stdout.isatty():
+            raise ValueError("Binary output cannot be printed to the console; "
+                             "use -o FILE or redirect stdout to a file")
+        sys.stdout.flush()
+        buffer.write(data)
+        buffer.flush()
+    
+    def _print_stream(self, data, format_type):
+        """Print an iterator of text chunks or records."""
+        first = next(data, None)
+        if first is None:
             print("No data")
             return
-            
-        headers = set()
-        for row in data:
-            headers.update(row.keys())
-        headers = sorted(headers)
+        data = itertools.chain([first], data)
+        if isinstance(first, str):
+            for chunk in data:
+                print(chunk, end="")
+        elif format_type == "csv" and isinstance(first, dict):
+            with SpillBuffer(memory_budget, "table renderer") as buffer:
+                for row in data:
+                    buffer.append(row)
+                self._print_csv_as_table(buffer)
+        else:
+            for record in data:
+                print(record)
+    
+    def _print_csv_as_table(self, data):
+        """Print CSV data as a formatted table.
         
-        widths = {header: len(header) for header in headers}
+        Makes two passes over data: one for the column widths and one to
+        print the rows, so data may be any re-iterable such as a SpillBuffer.
+        """
+        widths = {}
         for row in data:
-            for header in headers:
-                value = row.get(header, "")
-                widths[header] = max(widths[header], len(str(value)))
+            for header, value in row.items():
+                widths[header] = max(widths.get(header, len(str(header))), len(str(value)))
+        if not widths:
+            print("No data")
+            return
+        headers = sorted(widths)
         
         header_row = " | ".join(h.ljust(widths[h]) for h in headers)
         print(header_row)
@@ -57,3 +124,8 @@ class OutputHandler:
         for row in data:
             values = [str(row.get(h, "")).ljust(widths[h]) for h in headers]
             print(" | ".join(values))
+
+
+def _is_stream(data):
+    """Return True for one-shot iterators such as generators."""
+    return not isinstance(data, (str, bytes, list, dict)) and hasattr(data, '__next__')
@@ -0,0 +1,57 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ParseCache:
+    """Least-recently-used cache of parsed files.
+
+    Entries are keyed by path, format, parser options (``cache_key``),
+    size and modification time, so a file that changes on disk, or is read
+    with other options, is parsed again. The cache is disabled
+    (``max_entries=0``) unless a long-running process such as the server
+    mode turns it on. Cached data is shared between callers and must not be
+    modified in place.
+    """
+
+    def __init__(self, max_entries=0):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, file_parser, file_path, file_format):
+        """Return the parsed contents of file_path, parsing it if needed."""
+        if self.max_entries <= 0:
+            return file_parser.parse(file_path)
+
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), file_format, type(file_parser).__name__,
+               file_parser.cache_key(), stat.st_size, stat.st_mtime_ns)
+        try:
+            hash(key)
+        except TypeError:
+            # Options that cannot be compared, such as a custom object
+            return file_parser.parse(file_path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        data = file_parser.parse(file_path)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+parse_cache = ParseCache()
@@ -0,0 +1,133 @@
+import operator
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "==": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_COMPARISON = re.compile(r"^\s*([\w.@#-]+)\s*(>=|<=|!=|==|>|<)\s*(.*?)\s*$")
+
+
+class Comparison:
+    """A parsed "field <op> value" query such as ``status>=500``.
+
+    The literal is converted once to the type of the values it is compared
+    with: numbers for numeric fields, epoch seconds or datetimes for
+    timestamps (ISO 8601 literals such as ``2023-10-10T13:00:00`` are
+    accepted), and plain strings otherwise.
+    """
+
+    def __init__(self, field, symbol, literal):
+        self.field = field
+        self.symbol = symbol
+        self.compare = OPERATORS[symbol]
+        self.literal = literal
+        self._number = _to_number(literal)
+        self._timestamp = _to_datetime(literal)
+
+    def matches(self, record):
+        """Return True if the record's field satisfies the comparison."""
+        if not isinstance(record, dict) or self.field not in record:
+            return False
+        value = record[self.field]
+        if value is None:
+            return False
+        if isinstance(value, str) and self._number is not None:
+            # Untyped input: compare numerically if the text is a number
+            number = _to_number(value)
+            if number is not None:
+                value = number
+        try:
+            return self.compare(value, self.coerce(value))
+        except TypeError:
+            return False
+
+    @property
+    def number(self):
+        """The literal as an int or float, or None if it is not a number."""
+        return self._number
+
+    def could_match(self, minimum, maximum):
+        """Return False if no value between minimum and maximum can match.
+
+        Used with block statistics to skip data without looking at it; the
+        answer is True whenever the range cannot rule a match out.
+        """
+        if isinstance(minimum, str) and self._number is not None:
+            # Text that looks numeric is compared as a number
+            return True
+        try:
+            target = self.coerce(minimum)
+            if self.symbol == ">":
+                return maximum > target
+            if self.symbol == ">=":
+                return maximum >= target
+            if self.symbol == "<":
+                return minimum < target
+            if self.symbol == "<=":
+                return minimum <= target
+            if self.symbol == "==":
+                return minimum <= target <= maximum
+            return not minimum == maximum == target
+        except TypeError:
+            return True
+
+    def coerce(self, value):
+        """Convert the literal to something comparable with value."""
+        if isinstance(value, bool):
+            return self.literal.lower() in ("1", "true", "yes")
+        if isinstance(value, (int, float)):
+            if self._number is not None:
+                return self._number
+            if self._timestamp is not None:
+                return self._timestamp.timestamp()
+            return self.literal
+        if isinstance(value, datetime):
+            if self._timestamp is None:
+                return self.literal
+            if value.tzinfo is None:
+                return self._timestamp.replace(tzinfo=None)
+            return self._timestamp
+        return self.literal
+
+
+@lru_cache(maxsize=128)
+def parse_comparison(query):
+    """Return a Comparison for "field <op> value" queries, or None.
+
+    Queries that are not comparisons (plain regular expressions) return
+    None so that callers can fall back to regex matching.
+    """
+    match = _COMPARISON.match(query or "")
+    if not match:
+        return None
+    field, symbol, literal = match.groups()
+    return Comparison(field, symbol, literal)
+
+
+def _to_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _to_datetime(text):
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -0,0 +1,61 @@
+import itertools
+import math
+import random
+
+
+def take_head(records, count):
+    """Return the first ``count`` records and stop reading the input.
+
+    Args:
+        records: Iterable of records, usually a parser's ``iter_records``
+        count (int): Number of records to keep
+
+    Returns:
+        list: At most ``count`` records
+    """
+    return list(itertools.islice(records, max(count, 0)))
+
+
+def reservoir_sample(records, count, seed=None):
+    """Draw a uniform random sample of ``count`` records in a single pass.
+
+    Uses reservoir sampling (Li's Algorithm L), which keeps only ``count``
+    records in memory and skips ahead over records that will not be picked
+    instead of drawing a random number for every one of them.
+
+    Args:
+        records: Iterable of records
+        count (int): Sample size
+        seed: Optional seed for reproducible samples
+
+    Returns:
+        list: The sampled records, in no particular order
+    """
+    if count <= 0:
+        return []
+
+    rng = random.Random(seed)
+    iterator = iter(records)
+    reservoir = list(itertools.islice(iterator, count))
+    if len(reservoir) < count:
+        return reservoir
+
+    weight = math.exp(math.log(_uniform(rng)) / count)
+    while True:
+        skip = int(math.log(_uniform(rng)) / math.log(1 - weight))
+        record = next(itertools.islice(iterator, skip, None), _EXHAUSTED)
+        if record is _EXHAUSTED:
+            return reservoir
+        reservoir[rng.randrange(count)] = record
+        weight *= math.exp(math.log(_uniform(rng)) / count)
+
+
+def _uniform(rng):
+    """Draw a random number in the open interval (0, 1)."""
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
+
+
+_EXHAUSTED = object()
@@ -0,0 +1,173 @@
+import base64
+import contextlib
+import io
+import ipaddress
+import json
+import multiprocessing
+import os
+import signal
+import socketserver
+import sys
+from utils.parse_cache import parse_cache
+
+
+class ParserServer:
+    """Keeps a warm pool of worker processes serving CLI requests.
+
+    Each request carries the same argument list as the command line tool,
+    plus the client's working directory and optional stdin data. The
+    workers are forked after the parsers and transformers have been
+    imported and keep their own parse cache, so a request only pays for the
+    actual work. Requests and responses are single JSON lines exchanged over
+    a Unix domain socket or a localhost TCP socket.
+    """
+
+    REJECTED_OPTIONS = {"-i", "--interactive", "--serve"}
+
+    def __init__(self, handler, address, workers=4, cache_entries=32):
+        """Create a server.
+
+        Args:
+            handler: Function taking an argv list, e.g. the CLI ``main``
+            address: Unix socket path, or "host:port" for TCP
+            workers: Number of worker processes
+            cache_entries: Parsed files kept by each worker's parse cache
+
+        Raises:
+            ValueError: For a TCP address on a host other than the loopback
+        """
+        parse_tcp_address(address)
+        self.handler = handler
+        self.address = address
+        self.workers = workers
+        self.cache_entries = cache_entries
+
+    def serve_forever(self):
+        """Start the worker pool and answer requests until interrupted."""
+        context = multiprocessing.get_context("fork")
+        pool = context.Pool(self.workers, initializer=_init_worker, initargs=(self.cache_entries,))
+        server = self._create_server(pool)
+        signal.signal(signal.SIGTERM, _stop_on_signal)
+        try:
+            print(f"Serving on {self.address} with {self.workers} workers (Ctrl+C to stop)")
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nShutting down server")
+        finally:
+            server.server_close()
+            # Let the workers finish their current request and exit; terminate()
+            # can wait forever for the task queue lock held by an idle worker
+            pool.close()
+            pool.join()
+            if isinstance(server, _UnixServer) and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def _create_server(self, pool):
+        """Bind a threading socket server to the configured address."""
+        outer = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                response = outer._dispatch(pool, line)
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+        host, port = parse_tcp_address(self.address)
+        if port is not None:
+            return _TCPServer((host, port), Handler)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        return _UnixServer(self.address, Handler)
+
+    def _dispatch(self, pool, line):
+        """Decode a request, run it on the pool and build the response."""
+        try:
+            request = json.loads(line)
+            argv = [str(arg) for arg in request["argv"]]
+            cwd = request.get("cwd") or os.getcwd()
+            stdin_data = base64.b64decode(request["stdin"]) if request.get("stdin") else b""
+        except (ValueError, KeyError, TypeError) as e:
+            return {"exit_code": 2, "stdout": "", "stderr": f"Error: Invalid request: {str(e)}\n"}
+
+        rejected = self.REJECTED_OPTIONS.intersection(argv)
+        if rejected:
+            return {"exit_code": 2, "stdout": "",
+                    "stderr": f"Error: {', '.join(sorted(rejected))} cannot be used through the server\n"}
+
+        exit_code, stdout, stderr = pool.apply(_run_request, (self.handler, argv, cwd, stdin_data))
+        return {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def parse_tcp_address(address):
+    """Split "host:port" into (host, port); returns (None, None) for socket paths.
+
+    Raises:
+        ValueError: If the host is not localhost or a loopback address; the
+            server runs requests with the user's file access and has no
+            authentication, so it must not be reachable from other machines
+    """
+    host, _, port = address.rpartition(":")
+    if port.isdigit() and "/" not in address:
+        host = host or "127.0.0.1"
+        if not _is_loopback(host):
+            raise ValueError(f"Refusing to serve on {host}: only localhost and loopback addresses are allowed")
+        return host, int(port)
+    return None, None
+
+
+def _is_loopback(host):
+    """Return True for "localhost" and loopback IP addresses."""
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _stop_on_signal(signum, frame):
+    """Turn SIGTERM into the same clean shutdown as Ctrl+C."""
+    raise KeyboardInterrupt
+
+
+def _init_worker(cache_entries):
+    """Enable the parse cache in a freshly started worker."""
+    # Ctrl+C reaches the whole process group; only the parent shuts down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    parse_cache.max_entries = cache_entries
+
+
+def _run_request(handler, argv, cwd, stdin_data):
+    """Run one CLI invocation in a worker, capturing its output."""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+    saved_stdin = sys.stdin
+    sys.stdin = io.TextIOWrapper(io.BytesIO(stdin_data), encoding="utf-8")
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            handler(argv)
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            stderr.write(f"{e.code}\n")
+            exit_code = 1
+    except Exception as e:
+        stderr.write(f"Error: {str(e)}\n")
+        exit_code = 1
+    finally:
+        sys.stdin = saved_stdin
+    return exit_code, stdout.getvalue(), stderr.getvalue()
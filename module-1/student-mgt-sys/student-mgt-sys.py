@@ -1,9 +1,66 @@
 import sqlite3
 import os
 import re
+import csv
+import json
+import time
+import argparse
 from datetime import datetime
 import sys
 
+# Columns read from import files; other columns are ignored
+IMPORT_FIELDS = ('name', 'age', 'grade', 'email', 'phone', 'address', 'enrollment_date')
+IMPORT_CHUNK_SIZE = 5000
+
+# Schema migrations in order; a database at PRAGMA user_version N has had the first N applied
+MIGRATIONS = [
+    # 1: the original tables
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS students (
+            student_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER,
+            grade TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            enrollment_date TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            date TEXT,
+            status TEXT,
+            FOREIGN KEY (student_id) REFERENCES students (student_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS marks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            subject TEXT,
+            score REAL,
+            exam_date TEXT,
+            FOREIGN KEY (student_id) REFERENCES students (student_id)
+        )
+        ''',
+    ],
+    # 2: one attendance record per student and date, one mark per student, subject
+    # and exam date (keeping the latest of any duplicates), and indexes for lookups
+    [
+        "DELETE FROM attendance WHERE id NOT IN (SELECT MAX(id) FROM attendance GROUP BY student_id, date)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance (student_id, date)",
+        "DELETE FROM marks WHERE id NOT IN (SELECT MAX(id) FROM marks GROUP BY student_id, subject, exam_date)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_marks_student_subject_date ON marks (student_id, subject, exam_date)",
+        "CREATE INDEX IF NOT EXISTS idx_students_name ON students (name)",
+        "CREATE INDEX IF NOT EXISTS idx_students_grade ON students (grade)",
+        "CREATE INDEX IF NOT EXISTS idx_students_email ON students (email)",
+    ],
+]
+
 class Student:
     """
     Student class represents a student entity with attributes and validation.
@@ -64,49 +121,28 @@ class StudentManagementSystem:
         self.initialize_db()
     
     def initialize_db(self):
-        """Initialize database connection and create tables if they don't exist"""
+        """Initialize database connection and bring the schema up to date"""
         try:
             self.connection = sqlite3.connect(self.db_path)
             self.cursor = self.connection.cursor()
-            
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS students (
-                    student_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    age INTEGER,
-                    grade TEXT,
-                    email TEXT,
-                    phone TEXT,
-                    address TEXT,
-                    enrollment_date TEXT
-                )
-            ''')
-            
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS attendance (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER,
-                    date TEXT,
-                    status TEXT,
-                    FOREIGN KEY (student_id) REFERENCES students (student_id)
-                )
-            ''')
-            
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS marks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER,
-                    subject TEXT,
-                    score REAL,
-                    exam_date TEXT,
-                    FOREIGN KEY (student_id) REFERENCES students (student_id)
-                )
-            ''')
-            
-            self.connection.commit()
+            self.migrate()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
     
+    def migrate(self):
+        """Apply the migrations the database has not had yet, each in its own transaction"""
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], version + 1):
+            try:
+                self.cursor.execute("BEGIN")
+                for statement in statements:
+                    self.cursor.execute(statement)
+                self.cursor.execute(f"PRAGMA user_version = {number}")
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+    
     def close_connection(self):
         """Close the database connection"""
         if self.connection:
@@ -129,6 +165,91 @@ class StudentManagementSystem:
         except sqlite3.Error as e:
             return False, [f"Error adding student: {e}"]
     
+    def bulk_import(self, path, file_format=None, chunk_size=IMPORT_CHUNK_SIZE, rejects_path=None, progress=None):
+        """Import students from a CSV, JSON or JSON Lines file
+        
+        Rows are validated as they are read and the valid ones inserted with
+        executemany, one transaction per chunk of chunk_size rows. Rows that
+        fail validation are skipped and reported, and also written to
+        rejects_path as CSV when it is given. progress is called with
+        (rows imported, rows rejected) after every chunk.
+        
+        Returns a dictionary with the number of 'imported' rows, the
+        'rejected' rows as (row number, errors) pairs, the elapsed 'seconds'
+        and an 'error' message if the import stopped early.
+        """
+        result = {'imported': 0, 'rejected': [], 'seconds': 0.0, 'error': None}
+        start = time.perf_counter()
+        today = datetime.now().strftime('%Y-%m-%d')
+        rejects_file = None
+        
+        # Tuned for the load, restored afterwards; WAL stays on
+        synchronous = self.cursor.execute("PRAGMA synchronous").fetchone()[0]
+        cache_size = self.cursor.execute("PRAGMA cache_size").fetchone()[0]
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA cache_size=-65536")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        
+        try:
+            if rejects_path:
+                rejects_file = open(rejects_path, 'w', encoding='utf-8', newline='')
+                rejects_writer = csv.writer(rejects_file)
+                rejects_writer.writerow(('row', 'errors') + IMPORT_FIELDS)
+            
+            chunk = []
+            for row_number, row in _read_student_rows(path, file_format):
+                if isinstance(row, str):
+                    errors = [row]
+                    row = {}
+                else:
+                    student = Student(**{field: _import_value(row.get(field)) for field in IMPORT_FIELDS})
+                    if not student.enrollment_date:
+                        student.enrollment_date = today
+                    errors = student.validate()
+                if errors:
+                    result['rejected'].append((row_number, errors))
+                    if rejects_file:
+                        rejects_writer.writerow([row_number, "; ".join(errors)] + [row.get(field, '') for field in IMPORT_FIELDS])
+                    continue
+                
+                chunk.append((student.name, int(student.age), student.grade, student.email,
+                              student.phone, student.address, student.enrollment_date))
+                if len(chunk) >= chunk_size:
+                    self._insert_students(chunk)
+                    result['imported'] += len(chunk)
+                    chunk = []
+                    if progress:
+                        progress(result['imported'], len(result['rejected']))
+            
+            if chunk:
+                self._insert_students(chunk)
+                result['imported'] += len(chunk)
+                if progress:
+                    progress(result['imported'], len(result['rejected']))
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            result['error'] = f"Error importing students: {e}"
+        except (OSError, UnicodeDecodeError, csv.Error, ValueError) as e:
+            self.connection.rollback()
+            result['error'] = f"Error reading {path}: {e}"
+        finally:
+            if rejects_file:
+                rejects_file.close()
+            self.cursor.execute(f"PRAGMA synchronous={int(synchronous)}")
+            self.cursor.execute(f"PRAGMA cache_size={int(cache_size)}")
+        
+        result['seconds'] = time.perf_counter() - start
+        return result
+    
+    def _insert_students(self, rows):
+        """Insert a chunk of student rows in one transaction"""
+        with self.connection:
+            self.connection.executemany('''
+                INSERT INTO students (name, age, grade, email, phone, address, enrollment_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
     def update_student(self, student_id, student_data):
         """Update an existing student's information"""
         student = Student(student_id=student_id, **student_data)
@@ -241,64 +362,40 @@ class StudentManagementSystem:
             return []
     
     def mark_attendance(self, student_id, date, status):
-        """Mark attendance for a student"""
+        """Mark attendance for a student, replacing any record for that date"""
         try:
-            if not self.get_student_by_id(student_id):
-                return False, ["Student not found"]
-            
             self.cursor.execute("""
-                SELECT * FROM attendance 
-                WHERE student_id=? AND date=?
-            """, (student_id, date))
-            
-            if self.cursor.fetchone():
-                self.cursor.execute("""
-                    UPDATE attendance
-                    SET status=?
-                    WHERE student_id=? AND date=?
-                """, (status, student_id, date))
-            else:
-                self.cursor.execute("""
-                    INSERT INTO attendance (student_id, date, status)
-                    VALUES (?, ?, ?)
-                """, (student_id, date, status))
-            
+                INSERT INTO attendance (student_id, date, status)
+                SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM students WHERE student_id=?)
+                ON CONFLICT (student_id, date) DO UPDATE SET status=excluded.status
+            """, (student_id, date, status, student_id))
             self.connection.commit()
+            
+            if self.cursor.rowcount == 0:
+                return False, ["Student not found"]
             return True, ["Attendance marked successfully!"]
         except sqlite3.Error as e:
             return False, [f"Error marking attendance: {e}"]
     
     def add_marks(self, student_id, subject, score, exam_date):
-        """Add marks/grades for a student"""
+        """Add marks/grades for a student, replacing any score for that subject and exam date"""
+        try:
+            score = float(score)
+            if score < 0 or score > 100:
+                return False, ["Score must be between 0 and 100"]
+        except ValueError:
+            return False, ["Score must be a valid number"]
+        
         try:
-            if not self.get_student_by_id(student_id):
-                return False, ["Student not found"]
-            
-            try:
-                score = float(score)
-                if score < 0 or score > 100:
-                    return False, ["Score must be between 0 and 100"]
-            except ValueError:
-                return False, ["Score must be a valid number"]
-            
             self.cursor.execute("""
-                SELECT * FROM marks 
-                WHERE student_id=? AND subject=? AND exam_date=?
-            """, (student_id, subject, exam_date))
-            
-            if self.cursor.fetchone():
-                self.cursor.execute("""
-                    UPDATE marks
-                    SET score=?
-                    WHERE student_id=? AND subject=? AND exam_date=?
-                """, (score, student_id, subject, exam_date))
-            else:
-                self.cursor.execute("""
-                    INSERT INTO marks (student_id, subject, score, exam_date)
-                    VALUES (?, ?, ?, ?)
-                """, (student_id, subject, score, exam_date))
-            
+                INSERT INTO marks (student_id, subject, score, exam_date)
+                SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM students WHERE student_id=?)
+                ON CONFLICT (student_id, subject, exam_date) DO UPDATE SET score=excluded.score
+            """, (student_id, subject, score, exam_date, student_id))
             self.connection.commit()
+            
+            if self.cursor.rowcount == 0:
+                return False, ["Student not found"]
             return True, ["Marks added successfully!"]
         except sqlite3.Error as e:
             return False, [f"Error adding marks: {e}"]
@@ -367,6 +464,51 @@ class StudentManagementSystem:
         return total_score / len(marks)
 
 
+def _import_value(value):
+    """Normalize a field of an import row to text, as entered at the prompts; empty values become None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _read_student_rows(path, file_format=None):
+    """Yield (row number, dict of fields) for the rows of an import file
+    
+    The format is taken from the extension unless file_format is given:
+    CSV with a header row, a JSON array of objects, or JSON Lines with one
+    object per line (.jsonl, .ndjson). CSV and JSON Lines files are
+    streamed; a row that cannot be parsed is yielded as an error message.
+    """
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = {'.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extension, 'csv')
+    
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        elif file_format == 'json':
+            rows = json.load(file)
+            if not isinstance(rows, list):
+                raise ValueError("JSON import files must contain an array of students")
+            for row_number, row in enumerate(rows, 1):
+                yield row_number, row if isinstance(row, dict) else "Row must be a JSON object"
+        elif file_format == 'jsonl':
+            for row_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield row_number, f"Invalid JSON: {e}"
+                    continue
+                yield row_number, row if isinstance(row, dict) else "Row must be a JSON object"
+        else:
+            raise ValueError(f"Unsupported import format: {file_format}")
+
+
 class CLI:
     """
     Command Line Interface for the Student Management System.
@@ -385,14 +527,15 @@ class CLI:
         print("6. Mark Attendance")
         print("7. Add Marks/Grades")
         print("8. View Student Report")
-        print("9. Exit")
+        print("9. Bulk Import Students")
+        print("10. Exit")
         print("=====================================")
     
     def run(self):
         """Run the CLI application"""
         while True:
             self.display_menu()
-            choice = input("Enter your choice (1-9): ")
+            choice = input("Enter your choice (1-10): ")
             
             if choice == '1':
                 self.add_student()
@@ -411,6 +554,8 @@ class CLI:
             elif choice == '8':
                 self.view_student_report()
             elif choice == '9':
+                self.bulk_import()
+            elif choice == '10':
                 print("Exiting Student Management System...")
                 self.sms.close_connection()
                 sys.exit(0)
@@ -596,6 +741,39 @@ class CLI:
         for message in messages:
             print(message)
     
+    def bulk_import(self):
+        """Import students from a CSV or JSON file"""
+        path = input("\nEnter path of CSV/JSON file: ")
+        rejects_path = input("Write rejected rows to (optional CSV path): ")
+        self.import_students(path, rejects_path or None)
+    
+    def import_students(self, path, rejects_path=None):
+        """Run a bulk import and print its report; returns True if every row was imported"""
+        if not os.path.exists(path):
+            print(f"File not found: {path}")
+            return False
+        
+        print(f"\n--- Importing students from {path} ---")
+        result = self.sms.bulk_import(
+            path, rejects_path=rejects_path,
+            progress=lambda imported, rejected: print(f"\r{imported} imported, {rejected} rejected", end="", flush=True))
+        print()
+        
+        seconds = result['seconds']
+        rate = result['imported'] / seconds if seconds else 0
+        print(f"Imported {result['imported']} students in {seconds:.2f}s ({rate:,.0f} rows/sec)")
+        if result['rejected']:
+            print(f"Rejected {len(result['rejected'])} rows:")
+            for row_number, errors in result['rejected'][:10]:
+                print(f"  Row {row_number}: {'; '.join(errors)}")
+            if len(result['rejected']) > 10:
+                print(f"  ... and {len(result['rejected']) - 10} more")
+            if rejects_path:
+                print(f"Rejected rows written to {rejects_path}")
+        if result['error']:
+            print(result['error'])
+        return not result['rejected'] and not result['error']
+    
     def view_student_report(self):
         """View comprehensive report for a student"""
         student_id = input("\nEnter student ID: ")
@@ -660,5 +838,17 @@ class CLI:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Student Management System. Runs the interactive menu unless --import is given.")
+    parser.add_argument("--import", dest="import_path", metavar="FILE",
+                        help="Import students from a CSV, JSON or JSON Lines file and exit")
+    parser.add_argument("--rejects", metavar="PATH", help="With --import, write the rejected rows to this CSV file")
+    args = parser.parse_args()
+    if args.rejects and not args.import_path:
+        parser.error("--rejects requires --import")
+    
     cli = CLI()
+    if args.import_path:
+        success = cli.import_students(args.import_path, args.rejects)
+        cli.sms.close_connection()
+        sys.exit(0 if success else 1)
     cli.run()